@@ -0,0 +1,180 @@
+"""
+asset_resolver.py
+Maps a college or country name to a logo/flag that is already on disk, so
+"Pitt", "Pittsburgh" and "Ohio St." find the files fetched as pitt.png and
+ohio-state.png instead of triggering another Commons search.
+- Index keys: every file stem in the asset folders plus the alias keys and
+  values (assets/aliases.*.json) that point at one of those files
+- Candidates come from a character-trigram index; each is scored on tokens
+  (exact, abbreviation prefix, trigram similarity), taking the weaker of the
+  two directions so "Iowa" never matches "Iowa State"
+- "University" / "college" tell schools apart ("Boston University" is not
+  boston-college.png, "Miami University" is not miami.png); "the", "of", "at"
+  only break ties. A prefix counts only as an abbreviation of a much longer
+  word ("Pitt" / "Pittsburgh", not "Niger" / "Nigeria")
+- Below the threshold resolve() returns None and callers fall back to fetching
+- Indexes are cached per folder set and rebuilt when a folder or alias file changes
+Usage:
+  python asset_resolver.py college "Ohio St." Pittsburgh
+  python asset_resolver.py flag BRA "Cote d'Ivoire"
+  python asset_resolver.py check     # regression cases (wrong matches that must not happen)
+"""
+import re, sys, json
+from pathlib import Path
+from collections import defaultdict
+
+DIRS = {"college": [Path("assets/college_logos"), Path("assets/logos/colleges")],
+        "flag": [Path("assets/flags"), Path("assets/logos/flags")]}
+ALIASES = {"college": Path("assets/aliases.colleges.json"), "flag": Path("assets/aliases.flags.json")}
+THRESHOLD = 0.85
+ABBREV = {"st":"state", "univ":"university", "intl":"international", "mt":"mount"}
+STOP = {"the", "of", "at"}
+INSTITUTION = {"university", "college"}
+INSTITUTION_PENALTY = 0.2  # one side names the institution, the other doesn't: below THRESHOLD
+STOP_PENALTY = 0.01
+TOKEN_RATIO = 0.6          # fewer tokens / more tokens, compared without stop words
+# tokens that tell two otherwise similar names apart ("Iowa" vs "Iowa State")
+DISCRIMINATORS = {"state", "tech", "a", "m", "northern", "southern", "eastern", "western", "central", "north", "south"}
+
+def tokens(name):
+    raw = re.sub(r"[^a-z0-9]+", " ", (name or "").lower()).split()
+    return tuple(ABBREV.get(t, t) for t in raw)
+
+def _core(toks):
+    """(name tokens, set of stop / institution words) of a token tuple."""
+    core = tuple(t for t in toks if t not in STOP and t not in INSTITUTION)
+    return core or toks, set(toks) - set(core)
+
+def _trigrams(s):
+    s = f"  {s} "
+    return {s[i:i+3] for i in range(len(s) - 2)}
+
+def _token_sim(a, b):
+    if a == b: return 1.0
+    if min(len(a), len(b)) < 4: return 0.0  # short codes (BRA, LSU, A&M) match exactly or not at all
+    short, long_ = sorted((a, b), key=len)
+    if long_.startswith(short) and len(long_) >= 2 * len(short): return 0.9  # abbreviation
+    ta, tb = _trigrams(a), _trigrams(b)
+    return 2 * len(ta & tb) / (len(ta) + len(tb))
+
+def _directed(q, c):
+    return sum(max(_token_sim(a, b) for b in c) for a in q) / len(q)
+
+def score(q, c):
+    """Similarity of two token tuples in [0, 1]."""
+    if not q or not c: return 0.0
+    (q, qs), (c, cs) = _core(q), _core(c)
+    if (set(q) & DISCRIMINATORS) != (set(c) & DISCRIMINATORS): return 0.0
+    if min(len(q), len(c)) / max(len(q), len(c)) < TOKEN_RATIO: return 0.0
+    s = min(_directed(q, c), _directed(c, q))
+    qi, ci = qs & INSTITUTION, cs & INSTITUTION
+    if qi != ci:
+        if qi and ci: return 0.0  # Boston University / Boston College
+        s -= INSTITUTION_PENALTY
+    return max(0.0, s - STOP_PENALTY * len((qs ^ cs) - INSTITUTION))
+
+class AssetResolver:
+    def __init__(self, dirs, aliases=None, threshold=THRESHOLD):
+        self.threshold = threshold
+        self.keys = {}                      # token tuple -> file
+        by_stem = {}
+        for folder in dirs:
+            if not folder.is_dir(): continue
+            for p in sorted(folder.glob("*.png")):
+                if p.stat().st_size == 0: continue
+                by_stem.setdefault(tokens(p.stem), p)
+        self.keys.update(by_stem)
+        for k, v in (aliases or {}).items():
+            hit = by_stem.get(tokens(k)) or by_stem.get(tokens(v))
+            if hit:
+                self.keys.setdefault(tokens(k), hit); self.keys.setdefault(tokens(v), hit)
+        self.grams = defaultdict(set)
+        for key in self.keys:
+            for g in _trigrams(" ".join(key)): self.grams[g].add(key)
+
+    def match(self, name, limit=12):
+        """(path, score, matched key) of the best candidate, or None."""
+        q = tokens(name)
+        if not q: return None
+        if q in self.keys: return self.keys[q], 1.0, q
+        counts = defaultdict(int)
+        for g in _trigrams(" ".join(q)):
+            for key in self.grams.get(g, ()): counts[key] += 1
+        best = None
+        for key in sorted(counts, key=counts.get, reverse=True)[:limit]:
+            s = score(q, key)
+            if best is None or s > best[1]: best = (self.keys[key], s, key)
+        return best
+
+    def resolve(self, name):
+        m = self.match(name)
+        return m[0] if m and m[1] >= self.threshold else None
+
+_CACHE = {}
+
+def _stamp(paths):
+    return tuple(p.stat().st_mtime_ns if p.exists() else 0 for p in paths)
+
+def _load_aliases(path):
+    try: return json.load(open(path, "r", encoding="utf-8")) if path and path.exists() else {}
+    except Exception as e:
+        print("[warn] aliases load:", path, e); return {}
+
+def get(kind="college", dirs=None):
+    """Cached resolver for a kind ("college"/"flag") over dirs (defaults to DIRS[kind])."""
+    dirs = tuple(Path(d) for d in (dirs or DIRS[kind]))
+    alias_path = ALIASES.get(kind)
+    stamp = _stamp(dirs + ((alias_path,) if alias_path else ()))
+    hit = _CACHE.get((kind, dirs))
+    if hit and hit[0] == stamp: return hit[1]
+    r = AssetResolver(dirs, _load_aliases(alias_path))
+    _CACHE[(kind, dirs)] = (stamp, r)
+    return r
+
+def resolve(kind, name, dirs=None):
+    return get(kind, dirs).resolve(name)
+
+# (kind, files on disk, name, file it must resolve to or None)
+CASES = [
+    ("college", ["boston-college"], "Boston University", None),
+    ("college", ["boston-college", "boston-university"], "Boston University", "boston-university"),
+    ("college", ["miami"], "Miami University", None),
+    ("college", ["miami-university"], "Miami", None),
+    ("college", ["iowa-state"], "Iowa", None),
+    ("college", ["pitt"], "Pittsburgh", "pitt"),
+    ("college", ["ohio-state"], "Ohio St.", "ohio-state"),
+    ("college", ["boston-college"], "Boston College", "boston-college"),
+    ("college", ["notre-dame"], "The Notre Dame", "notre-dame"),
+    ("flag", ["NIGERIA"], "Niger", None),
+    ("flag", ["NIGER"], "Nigeria", None),
+    ("flag", ["NIGER", "NIGERIA"], "Niger", "NIGER"),
+    ("flag", ["BRAZIL"], "Brazil", "BRAZIL"),
+]
+
+def check(cases=CASES):
+    """Runs CASES against throwaway folders; returns the failures."""
+    import tempfile
+    failures = []
+    for kind, files, name, want in cases:
+        with tempfile.TemporaryDirectory() as d:
+            for f in files: (Path(d) / f"{f}.png").write_bytes(b"png")
+            got = AssetResolver([Path(d)]).resolve(name)
+            if (got.stem if got else None) != want: failures.append((kind, files, name, want, got and got.stem))
+    return failures
+
+def main(argv):
+    if argv[:1] == ["check"]:
+        failures = check()
+        for kind, files, name, want, got in failures: print(f"FAIL {kind} {name!r} in {files}: want {want}, got {got}")
+        print(f"{len(CASES) - len(failures)}/{len(CASES)} cases ok")
+        return 1 if failures else 0
+    if len(argv) < 2 or argv[0] not in DIRS:
+        print(__doc__.strip().splitlines()[-3].strip(), file=sys.stderr); return 1
+    r = get(argv[0])
+    for name in argv[1:]:
+        m = r.match(name)
+        print(f"{name!r:30s} -> " + (f"{m[0]} ({m[1]:.2f}{'' if m[1] >= r.threshold else ', below threshold'})" if m else "no match"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
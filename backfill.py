@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+backfill.py
+Re-renders the archive after a theme change: cards and the Short for every
+out/trivia_*.json, and a guess-team video for every pool lineup.
+- Jobs stream from a generator into a process pool; only as many run at once
+  as the memory cap allows, sized from the peak RSS the workers report
+  (each 1080x1920 encode holds frame arrays plus ffmpeg buffers)
+- Workers are recycled every --recycle jobs so fragmentation can't accumulate
+- Every finished job is appended to a checkpoint JSONL; a rerun skips what is
+  already done, so an interrupted backfill resumes where it stopped
+- Pool lineups are written to data/out/pool/<mode>_<nn>/ (same JSON as the daily run)
+Usage:
+  python backfill.py [--workers 2] [--mem-mb 3000] [--only cards,short,guess_team]
+                     [--checkpoint out/backfill.jsonl] [--restart] [--dry-run]
+"""
+import os, sys, json, time, glob, contextlib
+import multiprocessing as mp
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from tracing import span, _rss_mb
+
+CHECKPOINT = Path("out/backfill.jsonl")
+POOL_OUT = Path("data/out/pool")
+KINDS = ("cards", "short", "guess_team")
+
+def iter_jobs(only=KINDS):
+    """Yields job dicts lazily; nothing is rendered or written here."""
+    for p in sorted(glob.glob("out/trivia_*.json")):
+        if "cards" in only: yield {"key":f"cards:{p}", "kind":"cards", "json":p}
+        if "short" in only: yield {"key":f"short:{p}", "kind":"short", "json":p}
+    if "guess_team" in only:
+        from records import load_selector
+        sel = load_selector()
+        for mode, bg in sel.SPORTS:
+            for i, _ in enumerate(sel.load_pool(mode)):
+                yield {"key":f"guess_team:{mode}:{i}", "kind":"guess_team", "mode":mode, "bg":bg, "index":i}
+
+def run_job(job):
+    """Runs in a worker process; returns (job, output, seconds, worker peak MB)."""
+    t0 = time.perf_counter()
+    with open(os.devnull, "w") as quiet, contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet), \
+         span(f"backfill.{job['kind']}", key=job["key"]):
+        if job["kind"] == "cards":
+            from render_cards import render_cards
+            out = render_cards(job["json"])
+        elif job["kind"] == "short":
+            from render_short import render_short
+            out = render_short(job["json"], 1, None, "assets/soft_loop.mp3")
+        else:
+            from records import load_selector
+            from render_guess_team import render_guess_team
+            sel = load_selector()
+            obj = sel.load_pool(job["mode"])[job["index"]]
+            path = sel.write_file(job["mode"], job["bg"], obj, POOL_OUT / f"{job['mode']}_{job['index']:02d}")
+            out = render_guess_team(str(path))
+    return job, str(out), round(time.perf_counter() - t0, 2), _rss_mb() or 0.0
+
+def load_checkpoint(path):
+    done = set()
+    if Path(path).exists():
+        for line in open(path, "r", encoding="utf-8"):
+            try: rec = json.loads(line)
+            except json.JSONDecodeError: continue  # torn last line after a kill
+            if rec.get("status") == "done": done.add(rec["key"])
+    return done
+
+def backfill(jobs, workers=2, mem_mb=3000, checkpoint=CHECKPOINT, recycle=8):
+    done = load_checkpoint(checkpoint)
+    pending = (j for j in jobs if j["key"] not in done)
+    Path(checkpoint).parent.mkdir(parents=True, exist_ok=True)
+    est = None                      # peak MB of one busy worker, learned from the first job
+    inflight, counts = {}, {"done":0, "failed":0, "skipped":len(done)}
+    ctx = mp.get_context("spawn")   # fresh interpreters: no copied parent heap, and recycling works
+    with ProcessPoolExecutor(workers, mp_context=ctx, max_tasks_per_child=recycle) as ex, \
+         open(checkpoint, "a", encoding="utf-8") as ck:
+        exhausted = False
+        while True:
+            limit = 1 if est is None else max(1, min(workers, int(mem_mb // est)))
+            while not exhausted and len(inflight) < limit:
+                job = next(pending, None)
+                if job is None: exhausted = True; break
+                inflight[ex.submit(run_job, job)] = (job, time.time())
+            if not inflight: break
+            finished, _ = wait(inflight, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                job, t0 = inflight.pop(fut)
+                rec = {"key":job["key"], "time":time.strftime("%Y-%m-%dT%H:%M:%S")}
+                try:
+                    _, out, secs, peak = fut.result()
+                    est = peak if est is None else max(est, peak)
+                    rec.update(status="done", out=out, seconds=secs, peak_mb=peak)
+                except Exception as e:
+                    rec.update(status="failed", error=f"{type(e).__name__}: {e}")
+                counts[rec["status"]] += 1
+                ck.write(json.dumps(rec) + "\n"); ck.flush()
+                print(f"[{rec['status']}] {job['key']} " + (f"{rec['seconds']}s peak {rec['peak_mb']}MB (x{limit} in flight)"
+                      if rec["status"] == "done" else rec["error"]), flush=True)
+    return counts
+
+def main(argv):
+    opt = lambda k, d=None: argv[argv.index(k)+1] if k in argv else d
+    only = tuple(opt("--only", ",".join(KINDS)).split(","))
+    checkpoint = Path(opt("--checkpoint", CHECKPOINT))
+    jobs = iter_jobs(only)
+    if "--dry-run" in argv:
+        done = load_checkpoint(checkpoint)
+        todo = [j["key"] for j in jobs if j["key"] not in done]
+        for k in todo: print(k)
+        print(f"{len(todo)} job(s) to run, {len(done)} already done"); return 0
+    if "--restart" in argv and checkpoint.exists(): checkpoint.unlink()
+    t0 = time.perf_counter()
+    counts = backfill(jobs, int(opt("--workers", 2)), float(opt("--mem-mb", 3000)), checkpoint, int(opt("--recycle", 8)))
+    print(f"Backfill: {counts['done']} done, {counts['failed']} failed, {counts['skipped']} skipped "
+          f"in {time.perf_counter()-t0:.0f}s")
+    return 3 if counts["failed"] else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""
+benchmarks.py
+Timing suite for the rendering, generation and fetch hot paths.
+- Fixed seeds and the bundled data/ fixtures; all outputs go to a temp dir
+- fetch_assets_v4_2 runs against a local stub of the Commons API
+- run writes a JSON results file; compare flags benchmarks whose median got
+  slower than the baseline by more than --threshold
+- Benchmarks that don't encode also record the PIL images allocated in one run
+  ("images", "mpix"); frame.* time a single composed frame without encode/save
+Usage:
+  python benchmarks.py run [--out bench_results.json] [--only gradient,wrap] [--skip-encode]
+  python benchmarks.py compare bench_baseline.json bench_results.json [--threshold 0.15]
+  python benchmarks.py imports      # import-time budget; exit 1 if over or a heavy module loads
+  python benchmarks.py list
+"""
+import sys, io, json, time, random, platform, tempfile, statistics, threading, subprocess
+import http.server, contextlib
+from pathlib import Path
+from unittest import mock
+
+BENCHES = {}  # name -> (fn, repeat, encodes)
+
+def bench(name, repeat=5, encodes=False):
+    def deco(fn):
+        BENCHES[name] = (fn, repeat, encodes)
+        return fn
+    return deco
+
+_TMPS = contextlib.ExitStack()  # temp dirs of the benchmark being timed; _time closes it
+
+def _tmp():
+    return Path(_TMPS.enter_context(tempfile.TemporaryDirectory(prefix="bench_")))
+
+def _layer_cache(rg):
+    """Points render_guess_team's static layer cache at a temp dir for this benchmark
+    (it otherwise writes into assets/_cache/layers)."""
+    _TMPS.enter_context(mock.patch.object(rg, "LAYER_CACHE", _tmp() / "layers"))
+
+def _question(i=0):
+    import generator
+    random.seed(1234)
+    leagues, _ = generator.load_teams()
+    return [generator.QUESTION_BANK[k % len(generator.QUESTION_BANK)](leagues) for k in range(i+1)][i]
+
+def _day_file(tmp):
+    import generator
+    with mock.patch.object(generator, "OUT_DIR", tmp):
+        return generator.generate_daily(n_questions=10, seed=1234)
+
+# --- generation -------------------------------------------------------------
+
+@bench("generate_daily", repeat=20)
+def b_generate_daily():
+    import generator
+    tmp = _tmp()
+    def run():
+        with mock.patch.object(generator, "OUT_DIR", tmp), mock.patch("builtins.print"):
+            generator.generate_daily(n_questions=10, seed=1234, force=True)
+    return run
+
+def _bank_bench(fn_name):
+    def setup():
+        import generator
+        leagues, _ = generator.load_teams()
+        fn = getattr(generator, fn_name)
+        def run():
+            random.seed(1234)
+            for _ in range(1000): fn(leagues)
+        return run
+    return setup
+
+for _fn in ["q_which_not_in_division", "q_pair_same_division", "q_city_cross_league", "q_fix_mismatch", "q_division_count"]:
+    bench(f"bank.{_fn}x1000", repeat=5)(_bank_bench(_fn))
+
+@bench("teamstore.where_2m_x1000", repeat=5)
+def b_teamstore_where():
+    import numpy as np, teamstore
+    rng = np.random.default_rng(1234)
+    n = 2_000_000
+    t = teamstore.Table.from_columns({"league": np.array(["MLB", "NBA", "NFL"])[rng.integers(3, size=n)],
+                                      "year": rng.integers(1950, 2025, size=n).astype(np.int32)})
+    t.group("league"); t.group("year")
+    def run():
+        for y in range(1000): t.where(league="NBA", year=1950 + y % 75)
+    return run
+
+@bench("question_service.x1000", repeat=5)
+def b_question_service():
+    from question_service import QuestionService
+    svc = QuestionService()
+    def run():
+        for i in range(1000):
+            svc.route("GET", f"/question?client=c{i % 10}&dedup=50" + ("&league=NBA" if i % 2 else ""))
+    return run
+
+@bench("records.load", repeat=20)
+def b_records_load():
+    import records
+    paths = records._paths()
+    return lambda: [records._kind(p)(p) for p in paths]
+
+# --- cards / shorts ---------------------------------------------------------
+
+@bench("gradient", repeat=5)
+def b_gradient():
+    import render_cards
+    return lambda: render_cards._gradient_bg((12,23,46), (8,10,14))
+
+@bench("wrap", repeat=20)
+def b_wrap():
+    import render_cards
+    from PIL import Image, ImageDraw
+    draw = ImageDraw.Draw(Image.new("RGB", (1,1)))
+    font = render_cards._pick_font(54)
+    text = "Which city has teams in BOTH the NFL and the MLB, and also hosted the most recent championship parade? " * 3
+    def run():
+        for _ in range(100): render_cards._wrap(draw, text, font, render_cards.W - 2*render_cards.PAD - 64)
+    return run
+
+def _text_bench(backend):
+    def setup():
+        import glyph_atlas
+        from PIL import Image, ImageDraw
+        strings, fonts = glyph_atlas.corpus(), glyph_atlas._fonts()
+        draw = ImageDraw.Draw(Image.new("RGB", (1080, 1920)))
+        def run():
+            for f in fonts:
+                for s in strings: glyph_atlas.text(draw, (20, 20), s, f, (255,255,255), backend=backend)
+        run()  # the atlas is measured warm, as it runs in the daemon and backfill
+        return run
+    return setup
+
+for _backend in ("pil", "atlas"):
+    bench(f"text.{_backend}", repeat=5)(_text_bench(_backend))
+
+@bench("draw_card", repeat=5)
+def b_draw_card():
+    import render_cards
+    q, out = _question(3), _tmp()
+    return lambda: render_cards.draw_card(q, 1, out)
+
+@bench("render_short", repeat=1, encodes=True)
+def b_render_short():
+    import render_short
+    tmp = _tmp(); day = _day_file(tmp)
+    return lambda: render_short.render_short(str(day), 1, str(tmp / "short.mp4"))
+
+def _guess_bench(sport, reveal):
+    def setup():
+        import render_guess_team
+        tmp = _tmp(); _layer_cache(render_guess_team)
+        d = json.load(open(f"data/lineup_{sport}.json", "r", encoding="utf-8"))
+        d.update(reveal_on_screen=reveal, answer="Bench Team" if reveal else "")
+        p = tmp / f"lineup_{sport}.json"
+        p.write_text(json.dumps(d), encoding="utf-8")
+        return lambda: render_guess_team.render_guess_team(str(p), str(tmp / "out.mp4"))
+    return setup
+
+@bench("frame.card", repeat=10)
+def b_frame_card():
+    import render_cards
+    q = _question(3)
+    base, fonts, items = render_cards.card_base(q)
+    return lambda: render_cards.finish_card(base, q, fonts, None, items)
+
+@bench("frame.short", repeat=5)
+def b_frame_short():
+    import render_short
+    q = _question(3)
+    return lambda: render_short.compose_short(q)
+
+def _logo_dir(d):
+    """A temp logo/flag folder with a framed, partly transparent image for every player
+    in lineup d, swapped in for the formation's image_dirs while the benchmark runs."""
+    from PIL import Image, ImageDraw
+    from formations import load_formation
+    from normalize_assets import normalize_logo
+    from records import as_lineup
+    lineup, tmp = as_lineup(d), _tmp()
+    tpl = load_formation(lineup.formation or lineup.sport)
+    for team in lineup.sides:
+        for p in team:
+            stem = tpl.label_for(p)[1]
+            if not stem: continue
+            im = Image.new("RGBA", (160, 120), (0,0,0,0))
+            ImageDraw.Draw(im).ellipse((4, 4, 156, 116), fill=(200, 30, 30, 200))
+            normalize_logo(im).save(tmp / f"{stem}.png")
+    _TMPS.enter_context(mock.patch.object(tpl, "image_dirs", [tmp]))
+
+def _frame_bench(sport, logos=False):
+    def setup():
+        import render_guess_team
+        _layer_cache(render_guess_team)
+        d = json.load(open(f"data/lineup_{sport}.json", "r", encoding="utf-8"))
+        if logos: _logo_dir(d)
+        render_guess_team.compose_guess_team(d)  # static layer into the cache
+        return lambda: render_guess_team.compose_guess_team(d)
+    return setup
+
+for _sport in ["basketball", "football", "soccer"]:
+    bench(f"frame.guess_team.{_sport}", repeat=10)(_frame_bench(_sport))
+    bench(f"frame.guess_team.{_sport}.logos", repeat=10)(_frame_bench(_sport, logos=True))
+    for _rev in (False, True):
+        bench(f"guess_team.{_sport}{'.reveal' if _rev else ''}", repeat=1, encodes=True)(_guess_bench(_sport, _rev))
+
+# --- asset fetch against a local stub ---------------------------------------
+
+def _stub_png():
+    from PIL import Image
+    buf = io.BytesIO(); Image.new("RGBA", (512, 512), (200, 30, 30, 255)).save(buf, "PNG")
+    return buf.getvalue()
+
+class _Stub(http.server.BaseHTTPRequestHandler):
+    png = b""
+    def log_message(self, *a): pass
+    def do_GET(self):
+        if self.path.startswith("/img"):
+            body, ctype = self.png, "image/png"
+        else:
+            url = f"http://127.0.0.1:{self.server.server_port}/img.png"
+            body = json.dumps({"query":{"pages":{"1":{"title":"File:Stub logo.png", "imageinfo":[{
+                "mime":"image/png", "url":url, "thumburl":url, "thumbwidth":512, "thumbheight":512,
+                "extmetadata":{"LicenseShortName":{"value":"CC0"}}, "descriptionshorturl":url}]}}}}).encode()
+            ctype = "application/json"
+        self.send_response(200); self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body))); self.end_headers(); self.wfile.write(body)
+
+@bench("fetch_assets_v4_2.stub", repeat=3)
+def b_fetch():
+    import fetch_assets_v4_2 as fa
+    _Stub.png = _stub_png()
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    names = [f"Bench College {i}" for i in range(10)]
+    def run():
+        tmp = _tmp()
+        with mock.patch.object(fa, "API", f"http://127.0.0.1:{srv.server_port}/w/api.php"), \
+             mock.patch.object(fa, "COL_DIR", tmp), mock.patch.object(fa, "FLG_DIR", tmp), \
+             mock.patch.object(fa, "MANIFEST", tmp / "_sources.csv"), mock.patch.object(fa.time, "sleep"):
+            for n in names: fa.fetch_logo(n)
+            for c in ["BRA", "FRA", "ENG"]: fa.fetch_flag(c)
+    return run
+
+# --- import-time budget ----------------------------------------------------
+
+# cumulative import time (ms) per entry point, about 2x what they measure on a dev box so
+# timing noise doesn't fail the check; NumPy/moviepy/google clients must stay lazy
+IMPORT_BUDGET = {"generator":120, "validate_questions":120, "render_cards":150, "layout_check":150, "daily_agent":250}
+HEAVY = ("numpy", "moviepy", "imageio", "googleapiclient", "google")
+
+def import_cost(module, runs=3):
+    """(best cumulative ms over runs, heavy top-level packages it pulled in) via -X importtime."""
+    best, heavy = None, set()
+    for _ in range(runs):
+        r = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                           capture_output=True, text=True, cwd=Path(__file__).parent)
+        for line in r.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) != 3 or not parts[1].strip().isdigit(): continue
+            name = parts[2].strip()
+            if name == module:
+                ms = int(parts[1]) / 1000
+                best = ms if best is None else min(best, ms)
+            elif name.split(".")[0] in HEAVY:
+                heavy.add(name.split(".")[0])
+    return best, sorted(heavy)
+
+def check_imports(budget=IMPORT_BUDGET):
+    failed = []
+    for module, limit in budget.items():
+        ms, heavy = import_cost(module)
+        bad = ms is None or ms > limit or heavy
+        if bad: failed.append(module)
+        print(f"{module:20s} {ms if ms is not None else float('nan'):8.1f} ms / {limit} ms"
+              + (f"  loads {', '.join(heavy)}" if heavy else "") + ("  OVER" if bad else ""))
+    return failed
+
+# --- runner -----------------------------------------------------------------
+
+def _allocs(run):
+    """(images, megapixels) PIL allocated during one run: every new, copy, crop,
+    filter and convert result goes through Image._new."""
+    from PIL import Image
+    count = [0, 0]
+    orig = Image.Image._new
+    def counted(self, im):
+        count[0] += 1; count[1] += im.size[0] * im.size[1]
+        return orig(self, im)
+    with mock.patch.object(Image.Image, "_new", counted):
+        run()
+    return count[0], round(count[1] / 1e6, 3)
+
+def _time(name, setup, repeat, allocs=True):
+    random.seed(1234)
+    samples, quiet = [], io.StringIO()
+    # renderers print progress and moviepy draws a bar on stderr
+    with contextlib.redirect_stdout(quiet), contextlib.redirect_stderr(quiet), _TMPS:
+        run = setup()
+        for _ in range(repeat):
+            t0 = time.perf_counter(); run(); samples.append(time.perf_counter() - t0)
+        counts = _allocs(run) if allocs else None
+    r = {"median_s":round(statistics.median(samples), 6), "min_s":round(min(samples), 6),
+         "mean_s":round(statistics.fmean(samples), 6), "repeat":repeat}
+    if counts: r["images"], r["mpix"] = counts
+    return r
+
+def _git_rev():
+    try: return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except Exception: return ""
+
+def run(out="bench_results.json", only=None, skip_encode=False):
+    results = {}
+    for name, (setup, repeat, encodes) in BENCHES.items():
+        if only and not any(name.startswith(o) for o in only): continue
+        if skip_encode and encodes: continue
+        try:
+            results[name] = _time(name, setup, repeat, not encodes)
+        except Exception as e:
+            results[name] = {"error":repr(e)}
+        r = results[name]
+        print(f"{name:40s} " + (f"{r['median_s']*1000:10.2f} ms" if "median_s" in r else r["error"])
+              + (f"  {r['images']:5d} images {r['mpix']:8.2f} Mpx" if "images" in r else ""), flush=True)
+    doc = {"meta":{"python":platform.python_version(), "platform":platform.platform(), "git":_git_rev(),
+                   "time":time.strftime("%Y-%m-%dT%H:%M:%S")}, "results":results}
+    Path(out).write_text(json.dumps(doc, indent=2), encoding="utf-8")
+    print("Wrote", out)
+    return doc
+
+def compare(base_path, new_path, threshold=0.15):
+    base = json.load(open(base_path))["results"]; new = json.load(open(new_path))["results"]
+    regressions = []
+    for name in sorted(set(base) & set(new)):
+        b, n = base[name].get("median_s"), new[name].get("median_s")
+        if not b or not n: continue
+        ratio = n / b
+        flag = "REGRESSION" if ratio > 1 + threshold else ("faster" if ratio < 1 - threshold else "")
+        if flag == "REGRESSION": regressions.append(name)
+        print(f"{name:40s} {b*1000:10.2f} -> {n*1000:10.2f} ms  x{ratio:5.2f} {flag}")
+    for name in sorted(set(new) - set(base)): print(f"{name:40s} (new)")
+    print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    return regressions
+
+def main(argv):
+    if not argv or argv[0] not in ("run", "compare", "list", "imports"):
+        print(__doc__.strip(), file=sys.stderr); return 1
+    cmd, rest = argv[0], argv[1:]
+    opt = lambda k, d=None: rest[rest.index(k)+1] if k in rest else d
+    if cmd == "list":
+        for name, (_, repeat, encodes) in BENCHES.items(): print(name, f"x{repeat}", "(encode)" if encodes else "")
+        return 0
+    if cmd == "imports":
+        return 1 if check_imports() else 0
+    if cmd == "run":
+        only = opt("--only"); only = only.split(",") if only else None
+        run(opt("--out", "bench_results.json"), only, "--skip-encode" in rest)
+        return 0
+    paths = [a for a in rest if not a.startswith("--") and a != opt("--threshold")]
+    return 1 if compare(paths[0], paths[1], float(opt("--threshold", 0.15))) else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,132 @@
+"""
+compositor.py
+Single-overlay compositing for the renderers.
+- Pills, badges, logos and text are drawn in place on one RGBA overlay that is
+  reused between frames (per thread), instead of one Image per element
+- Drop shadows are drawn into one coverage mask per blur radius, each blurred
+  within its own extent, then darken the background
+- apply() blends the shadow masks and then the overlay onto the frame, region
+  by region, and clears what was drawn, ready for the next frame
+- Anything that would land on pending drawings (a shape over another element,
+  a shadow over an element or another shadow) first composites what is pending,
+  so elements blend exactly as when each was pasted onto the frame in turn
+Frames stay RGB for the encoder, so the overlay goes on with masked pastes
+(the same blend alpha_composite would do, without converting the 1080x1920
+frame to RGBA and back).
+"""
+import threading
+from PIL import Image, ImageDraw, ImageFilter
+import glyph_atlas
+
+_LOCAL = threading.local()
+
+def _buffer(key, size):
+    """Reusable blank image for this thread; key is the mode, or "L:<radius>" for shadow masks."""
+    bufs = getattr(_LOCAL, "bufs", None)
+    if bufs is None: bufs = _LOCAL.bufs = {}
+    im = bufs.get((key, size))
+    if im is None: im = bufs[(key, size)] = Image.new(key.split(":")[0], size, 0)
+    return im
+
+def _union(a, b):
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+def _clip(box, size):
+    return (max(0, box[0]), max(0, box[1]), min(size[0], box[2]), min(size[1], box[3]))
+
+def _overlaps(a, b, slack=0):
+    return a[0] < b[2]+slack and b[0] < a[2]+slack and a[1] < b[3]+slack and b[1] < a[3]+slack
+
+def _add(regions, box, parts=None, slack=0):
+    """Adds box to a list of [region, parts] clusters, merging every cluster it
+    touches (within slack) so each region is processed once in apply()."""
+    parts = [box] if parts is None else parts
+    for c in [c for c in regions if _overlaps(c[0], box, slack)]:
+        regions.remove(c)
+        box, parts = _union(box, c[0]), c[1] + parts
+    regions.append([box, parts])
+
+class Compositor:
+    SLACK = 48  # nearby drawings share one composite; the gap in between is transparent
+
+    def __init__(self, bg):
+        self.bg, self.size = bg, bg.size
+        self.over = _buffer("RGBA", self.size)
+        self.draw = ImageDraw.Draw(self.over)
+        self.shadows = {}   # blur radius -> [(shadow extent, own mask or None), ...]
+        self.dirty = []     # [[region, [boxes drawn on the overlay]], ...]
+
+    def _touch(self, box):
+        box = _clip(box, self.size)
+        if box[0] < box[2] and box[1] < box[3]: _add(self.dirty, box, slack=self.SLACK)
+
+    def _pending(self, box):
+        """Whether box touches a drawing or shadow extent not yet composited."""
+        return (any(_overlaps(b, box) for _, boxes in self.dirty for b in boxes)
+                or any(_overlaps(e, box) for extents in self.shadows.values() for e, _ in extents))
+
+    def shadow(self, box, alpha, r, radius, expand):
+        """Rounded-rect drop shadow under box, blurred by radius in apply() within
+        expand px of box (the size the per-element shadow images had, which may
+        reach past the frame edge). A shadow reaching a pending element or shadow
+        would have been painted over it, so those are composited first (only
+        happens with colliding stacks)."""
+        extent = (box[0]-expand, box[1]-expand, box[2]+expand, box[3]+expand)
+        if self._pending(extent): self.apply()
+        own = None
+        if _clip(box, self.size) != tuple(box):  # the shape itself leaves the frame: the shared mask would cut it
+            own = Image.new("L", (extent[2]-extent[0], extent[3]-extent[1]), 0)
+            ImageDraw.Draw(own).rounded_rectangle((expand, expand, box[2]-extent[0], box[3]-extent[1]), radius=r, fill=alpha)
+        else:
+            ImageDraw.Draw(self._mask(radius)).rounded_rectangle(box, radius=r, fill=alpha)
+        self.shadows.setdefault(radius, []).append((extent, own))
+
+    def _mask(self, radius):
+        return _buffer(f"L:{radius}", self.size)
+
+    def rounded(self, box, radius, fill):
+        """rounded_rectangle(box) as the element images drew it: those were exactly
+        box-sized, which clipped the shape's last column and row, so they are cleared here.
+        Drawing writes pixels rather than blending them, so a shape over a pending
+        element or shadow composites those first."""
+        x0, y0, x1, y1 = box
+        if self._pending(box): self.apply()
+        self.draw.rounded_rectangle(box, radius=radius, fill=fill)
+        self.over.paste((0,0,0,0), _clip((x1, y0, x1+1, y1+1), self.size))
+        self.over.paste((0,0,0,0), _clip((x0, y1, x1+1, y1+1), self.size))
+        self._touch((x0, y0, x1, y1))
+
+    def text(self, xy, s, font, fill, inside=False):
+        """inside: s lies within a shape already drawn, so it needn't be measured."""
+        glyph_atlas.text(self.draw, xy, s, font, fill)
+        if inside: return
+        l, t, r, b = font.getbbox(s)
+        self._touch((xy[0]+l-1, xy[1]+t-1, xy[0]+r+1, xy[1]+b+1))
+
+    def paste(self, img, xy):
+        """img (RGBA) pasted onto the frame with its own alpha; pending drawings
+        or shadows under it are composited first, as for rounded()."""
+        x, y = xy
+        if self._pending((x, y, x+img.size[0], y+img.size[1])): self.apply()
+        self.over.alpha_composite(img, (max(0, x), max(0, y)), (max(0, -x), max(0, -y)))
+        self._touch((x, y, x+img.size[0], y+img.size[1]))
+
+    def apply(self):
+        """Composites everything drawn so far onto the frame; returns the frame."""
+        bg = self.bg
+        for radius, extents in self.shadows.items():
+            mask = self._mask(radius)
+            for e, own in extents:
+                # the full extent, past the frame edge too: crop pads with 0 like the shadow image had
+                blur = (own if own is not None else mask.crop(e)).filter(ImageFilter.GaussianBlur(radius))
+                region = _clip(e, self.size)
+                if region[0] >= region[2] or region[1] >= region[3]: continue
+                if region != e: blur = blur.crop((region[0]-e[0], region[1]-e[1], region[2]-e[0], region[3]-e[1]))
+                bg.paste((0,0,0), region, blur)
+                if own is None: mask.paste(0, region)
+        for region, _ in self.dirty:
+            layer = self.over.crop(region)
+            bg.paste(layer, region, layer)
+            self.over.paste((0,0,0,0), region)
+        self.shadows, self.dirty = {}, []
+        return bg
@@ -2,8 +2,9 @@
 import os, json
 from pathlib import Path
 from generator import generate_daily
+from tracing import span
 from render_cards import render_cards
-from render_short import render_short
+from records import load_json
 
 def ensure_public_index(today_json, out_cards_dir, short_path):
     public = Path(__file__).parent / "public"
@@ -45,11 +46,29 @@ img{{width:100%; border-radius:12px}}
     with open(index, "w", encoding="utf-8") as f:
         f.write(html)
 
+def _fresh(outputs, source):
+    """True when every output exists and is newer than the day file."""
+    src = os.path.getmtime(source)
+    return bool(outputs) and all(os.path.exists(p) and os.path.getmtime(p) >= src for p in outputs)
+
 def main():
-    json_path = generate_daily(n_questions=10)
-    cards_dir = render_cards(json_path)
-    short_path = render_short(json_path, index=1, out_path=None, music_path="assets/soft_loop.mp3")
-    ensure_public_index(json_path, cards_dir, short_path)
+    json_path = generate_daily(n_questions=10)  # same-day re-runs keep the existing file
+    n = len(load_json(json_path)["questions"])
+    cards_dir = Path(json_path).with_suffix("").as_posix() + "_cards"
+    short_path = Path(json_path).with_suffix("").as_posix() + "_q01.mp4"
+    if _fresh([f"{cards_dir}/q{i:02d}.png" for i in range(1, n+1)], json_path):
+        print("Cards up to date:", cards_dir)
+    else:
+        with span("cards"):
+            cards_dir = render_cards(json_path)
+    if _fresh([short_path], json_path):
+        print("Short up to date:", short_path)
+    else:
+        from render_short import render_short  # pulls in moviepy/NumPy
+        with span("short"):
+            short_path = render_short(json_path, index=1, out_path=None, music_path="assets/soft_loop.mp3")
+    with span("publish"):
+        ensure_public_index(json_path, cards_dir, short_path)
     print("Done.")
 
 if __name__ == "__main__":
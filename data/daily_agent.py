@@ -1,4 +1,3 @@
-
 #!/usr/bin/env python3
 """
 Selects 1 lineup per sport each day from pools, writes dated JSONs with
@@ -9,33 +8,54 @@ from pathlib import Path
 ROOT = Path(".")
 POOLS = ROOT/"data/pools"
 OUT = ROOT/"data/out"/datetime.date.today().isoformat()
-OUT.mkdir(parents=True, exist_ok=True)
+SPORTS = [("basketball","assets/backgrounds/basketball.png"),
+          ("football","assets/backgrounds/football.png"),
+          ("soccer","assets/backgrounds/soccer.png")]
 
 def choose(items, day):
     # deterministic by date: rotate through list
     return items[day % len(items)]
 
-def write_file(mode, bg, obj):
+def write_file(mode, bg, obj, out_dir=OUT):
     obj = dict(obj)  # shallow copy
     obj["mode"] = mode
     obj["background"] = bg
     obj["title"] = ""
     obj["handle"] = obj.get("handle","@CoachClicks • #Shorts")
     obj["reveal_on_screen"] = True
-    p = OUT/f"lineup_{mode}.json"
+    out_dir.mkdir(parents=True, exist_ok=True)
+    p = out_dir/f"lineup_{mode}.json"
     with p.open("w", encoding="utf-8") as f:
         json.dump(obj, f, indent=2)
-    print(p.as_posix())
+    return p
+
+def load_pool(mode):
+    return json.loads((POOLS/f"{mode}.json").read_text(encoding="utf-8"))
+
+def select_lineups(date=None, out_dir=None):
+    """Writes the day's lineup JSONs; returns their paths in SPORTS order."""
+    date = date or datetime.date.today()
+    out_dir = out_dir or ROOT/"data/out"/date.isoformat()
+    doy = int(date.strftime("%j"))  # 1..366
+    paths = []
+    for mode, bg in SPORTS:
+        paths.append(write_file(mode, bg, choose(load_pool(mode), doy), out_dir))
+    return paths
+
+def upcoming(days=7, date=None):
+    """(date, mode, lineup) for `days` days from `date`, same picks as select_lineups; writes nothing."""
+    date = date or datetime.date.today()
+    pools = {mode: load_pool(mode) for mode, _ in SPORTS}
+    out = []
+    for i in range(days):
+        d = date + datetime.timedelta(days=i)
+        doy = int(d.strftime("%j"))
+        out += [(d, mode, choose(pools[mode], doy)) for mode, _ in SPORTS]
+    return out
 
 def main():
-    today = datetime.date.today()
-    doy = int(today.strftime("%j"))  # 1..366
-    b = json.loads((POOLS/"basketball.json").read_text(encoding="utf-8"))
-    f = json.loads((POOLS/"football.json").read_text(encoding="utf-8"))
-    s = json.loads((POOLS/"soccer.json").read_text(encoding="utf-8"))
-    write_file("basketball","assets/backgrounds/basketball.png", choose(b, doy))
-    write_file("football","assets/backgrounds/football.png", choose(f, doy))
-    write_file("soccer","assets/backgrounds/soccer.png", choose(s, doy))
+    for p in select_lineups(out_dir=OUT):
+        print(p.as_posix())
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+encoder_profiles.py
+Named x264 settings for the Shorts renderers, and the sweep that picks them.
+- assets/encoder_profiles.json is a small name -> settings table; "default"
+  names the one render_short/render_guess_team use (ENCODER_PROFILE=<name>
+  overrides). It is read once per process (again if the file changes)
+- sweep renders representative frames (a render_short question and the
+  guess-team lineups), encodes each over a preset x CRF x tune x fps x threads
+  matrix, and records encode time, file size, PSNR and SSIM of a decoded frame
+  against the source frame
+- The quality floor defaults to the baseline's own scores less a small
+  tolerance (yuv420p chroma subsampling caps PSNR near 36 dB for any setting);
+  the fastest setting meeting it on every sample, within --max-size times the
+  baseline's bytes, is reported as the candidate
+- Results go to encoder_sweep.json (not committed; numbers are per machine).
+  --save NAME adds the candidate's settings to the profiles table; the default
+  only changes by editing "default", after a run on representative hardware
+Usage:
+  python encoder_profiles.py show
+  python encoder_profiles.py sweep [--quick] [--seconds 4] [--ssim 0.997] [--psnr 35.5] [--max-size 2.5]
+        [--preset ultrafast,veryfast,medium] [--crf 20,23,26] [--tune none,stillimage]
+        [--fps 30,24] [--threads 4] [--save NAME]
+"""
+import os, sys, json, time, tempfile, itertools
+from pathlib import Path
+from functools import lru_cache
+
+PROFILES = Path("assets/encoder_profiles.json")
+SWEEP_OUT = Path("encoder_sweep.json")
+# what every renderer hard-coded before profiles existed
+BASELINE = {"fps":30, "preset":"medium", "crf":23, "tune":None, "threads":4}
+MATRIX = {"preset":["ultrafast", "veryfast", "medium"], "crf":[20, 23, 26], "tune":[None, "stillimage"],
+          "fps":[30, 24], "threads":[4]}
+QUICK = {"preset":["ultrafast", "veryfast", "medium"], "crf":[23], "tune":[None, "stillimage"], "fps":[30], "threads":[4]}
+
+@lru_cache(maxsize=None)
+def _load(path, mtime):
+    try:
+        with open(path, "r", encoding="utf-8") as f: return json.load(f)
+    except Exception as e:
+        print("[warn] encoder profiles unreadable:", e)
+        return None
+
+def load_profiles(path=PROFILES):
+    """The profiles table; cached, so callers must not modify it (copy first)."""
+    p = Path(path)
+    doc = _load(str(p), p.stat().st_mtime_ns) if p.exists() else None
+    return doc or {"default":"baseline", "profiles":{"baseline":dict(BASELINE)}}
+
+def profile(name=None, path=PROFILES):
+    doc = load_profiles(path)
+    name = name or os.environ.get("ENCODER_PROFILE") or doc.get("default", "baseline")
+    p = doc.get("profiles", {}).get(name)
+    if p is None:
+        print(f"[warn] unknown encoder profile {name!r}, using baseline"); p = BASELINE
+    return {k: p.get(k, BASELINE[k]) for k in BASELINE}
+
+def write_kwargs(name_or_profile=None):
+    """write_videofile kwargs for a profile name (or dict); CRF/tune go through ffmpeg_params."""
+    p = name_or_profile if isinstance(name_or_profile, dict) else profile(name_or_profile)
+    extra = ["-crf", str(p["crf"])] + (["-tune", p["tune"]] if p.get("tune") else [])
+    return {"fps":p["fps"], "codec":"libx264", "audio_codec":"aac", "preset":p["preset"],
+            "threads":p["threads"], "ffmpeg_params":extra}
+
+# --- sweep ------------------------------------------------------------------
+
+def _samples(sports=("basketball", "football", "soccer")):
+    """[(name, source frame as HxWx3 uint8)] from both renderers."""
+    import numpy as np, generator, render_short, render_guess_team
+    out = []
+    leagues, _ = generator.load_teams()
+    q = generator.QUESTION_BANK[0](leagues, generator.random.Random(1234))
+    out.append(("short", np.array(render_short.compose_short(q))))
+    for sport in sports:
+        p = Path(f"data/lineup_{sport}.json")
+        if p.exists():
+            data = json.load(open(p, "r", encoding="utf-8"))
+            out.append((f"guess_team.{sport}", np.array(render_guess_team.compose_guess_team(data))))
+    return out
+
+def psnr(a, b):
+    import numpy as np
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return 99.0 if mse == 0 else float(10 * np.log10(255.0**2 / mse))
+
+def ssim(a, b, block=8):
+    """Mean SSIM of the luma over non-overlapping block x block windows."""
+    import numpy as np
+    def luma(x):
+        x = x.astype(np.float64); return 0.299*x[...,0] + 0.587*x[...,1] + 0.114*x[...,2]
+    h, w = (a.shape[0] // block) * block, (a.shape[1] // block) * block
+    x = luma(a)[:h, :w].reshape(h//block, block, w//block, block).swapaxes(1, 2).reshape(-1, block*block)
+    y = luma(b)[:h, :w].reshape(h//block, block, w//block, block).swapaxes(1, 2).reshape(-1, block*block)
+    mx, my = x.mean(1), y.mean(1)
+    vx, vy = x.var(1), y.var(1)
+    cov = ((x - mx[:, None]) * (y - my[:, None])).mean(1)
+    c1, c2 = (0.01*255)**2, (0.03*255)**2
+    s = ((2*mx*my + c1) * (2*cov + c2)) / ((mx**2 + my**2 + c1) * (vx + vy + c2))
+    return float(s.mean())
+
+def _encode(frame, cfg, seconds, out_path):
+    from moviepy.editor import ImageClip, VideoFileClip
+    clip = ImageClip(frame).set_duration(seconds)
+    t0 = time.perf_counter()
+    clip.write_videofile(out_path, audio=False, logger=None, **write_kwargs(cfg))
+    dt = time.perf_counter() - t0
+    clip.close()
+    v = VideoFileClip(out_path, audio=False)
+    decoded = v.get_frame(seconds / 2); v.close()
+    return dt, os.path.getsize(out_path), decoded
+
+SSIM_TOL, PSNR_TOL = 0.0005, 0.25
+
+def sweep(matrix=MATRIX, seconds=4.0, min_ssim=None, min_psnr=None, max_size=2.5, out=SWEEP_OUT, save=None,
+          path=PROFILES, samples=None):
+    """Measures every setting in matrix; writes the results to out and, with
+    save=NAME, the candidate's settings to the profiles table under NAME."""
+    samples = samples or _samples()
+    tmp = Path(tempfile.mkdtemp(prefix="encsweep_"))
+    keys = list(BASELINE)
+    configs = [dict(zip(keys, vals)) for vals in itertools.product(*(matrix.get(k, [BASELINE[k]]) for k in keys))]
+    if BASELINE in configs: configs.remove(BASELINE)
+    configs.insert(0, dict(BASELINE))  # measured first: the default floor comes from it
+    rows = []
+    for i, cfg in enumerate(configs):
+        per = []
+        for name, frame in samples:
+            dt, size, decoded = _encode(frame, cfg, seconds, str(tmp / f"{i}_{name}.mp4"))
+            per.append({"sample":name, "encode_s":round(dt, 3), "bytes":size,
+                        "psnr":round(psnr(frame, decoded), 2), "ssim":round(ssim(frame, decoded), 4)})
+        row = {"config":cfg, "encode_s":round(sum(p["encode_s"] for p in per), 3),
+               "bytes":sum(p["bytes"] for p in per), "min_psnr":min(p["psnr"] for p in per),
+               "min_ssim":min(p["ssim"] for p in per), "samples":per}
+        if i == 0:
+            min_ssim = row["min_ssim"] - SSIM_TOL if min_ssim is None else min_ssim
+            min_psnr = row["min_psnr"] - PSNR_TOL if min_psnr is None else min_psnr
+            max_bytes = row["bytes"] * max_size
+        row["ok"] = row["min_ssim"] >= min_ssim and row["min_psnr"] >= min_psnr and row["bytes"] <= max_bytes
+        rows.append(row)
+        print(f"{_label(cfg):44s} {row['encode_s']:7.2f}s {row['bytes']/1e6:7.2f}MB "
+              f"psnr>={row['min_psnr']:5.2f} ssim>={row['min_ssim']:.4f} {'ok' if row['ok'] else 'below floor'}", flush=True)
+    for f in tmp.glob("*.mp4"): f.unlink()
+    tmp.rmdir()
+    passing = sorted((r for r in rows if r["ok"]), key=lambda r: (r["encode_s"], r["bytes"]))
+    best = passing[0]["config"] if passing else None
+    report = {"time":time.strftime("%Y-%m-%dT%H:%M:%S"), "seconds":seconds, "cpu_count":os.cpu_count(),
+              "floor":{"ssim":round(min_ssim, 4), "psnr":round(min_psnr, 2), "max_bytes":int(max_bytes)},
+              "candidate":best, "results":rows}
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print("Wrote", out)
+    if best is None:
+        print("No setting met the quality floor"); return report
+    base = rows[0]
+    print(f"Candidate: {_label(best)} ({passing[0]['encode_s']/base['encode_s']:.2f}x the baseline's encode time, "
+          f"{passing[0]['bytes']/base['bytes']:.2f}x its bytes)")
+    if save:
+        doc = json.loads(json.dumps(load_profiles(path)))  # the loaded table is shared; edit a copy
+        doc.setdefault("profiles", {}).setdefault("baseline", dict(BASELINE))
+        doc["profiles"][save] = dict(best)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(doc, f, indent=2)
+        print(f"Saved as profile {save!r} in {path} (default is still {doc.get('default')!r})")
+    return report
+
+def _label(cfg):
+    return f"{cfg['preset']} crf{cfg['crf']} {cfg['tune'] or '-'} {cfg['fps']}fps t{cfg['threads']}"
+
+def _list(v, cast):
+    return [None if x in ("none", "-") else cast(x) for x in v.split(",")]
+
+def main(argv):
+    if not argv or argv[0] not in ("show", "sweep"):
+        print(__doc__.strip(), file=sys.stderr); return 1
+    if argv[0] == "show":
+        doc = load_profiles()
+        for name, p in doc.get("profiles", {}).items():
+            print(("* " if name == doc.get("default") else "  ") + f"{name:10s} {_label({**BASELINE, **p})}")
+        return 0
+    rest = argv[1:]
+    opt = lambda k, d=None: rest[rest.index(k)+1] if k in rest else d
+    matrix = dict(QUICK if "--quick" in rest else MATRIX)
+    for k, cast in (("preset", str), ("crf", int), ("tune", str), ("fps", int), ("threads", int)):
+        if opt(f"--{k}"): matrix[k] = _list(opt(f"--{k}"), cast)
+    num = lambda k: float(opt(k)) if opt(k) else None
+    sweep(matrix, float(opt("--seconds", 4)), num("--ssim"), num("--psnr"), float(opt("--max-size", 2.5)),
+          save=opt("--save"))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -7,16 +7,25 @@ fetch_assets_v4_2.py
 - Optional alias files to override names:
     assets/aliases.colleges.json  ({"Iowa":"Iowa Hawkeyes", ...})
     assets/aliases.flags.json     ({"BRA":"Brazil", "ENG":"England", ...})
+- Logos are normalized by normalize_assets (trimmed, scaled, framed) from a
+  thumbnail rendered at the width the badge needs
+- Names that fuzzy-match a file already on disk (asset_resolver) skip the network
 - Writes sources to assets/_sources.csv
+- --prefetch N fetches the assets of the next N days of pool picks ahead of
+  time and prints per-day coverage (exit 2 if anything is still missing)
 Usage:
   python fetch_assets_v4_2.py data/lineup_*.json ...
+  python fetch_assets_v4_2.py --prefetch 14 [--date YYYY-MM-DD] [--report-only]
 Requires: requests, pillow
 """
 import os, re, sys, csv, json, time, io
 from pathlib import Path
 from urllib.parse import urlencode
 import requests
-from PIL import Image, ImageOps, ImageFilter, ImageDraw
+from PIL import Image
+from tracing import span
+import asset_resolver
+from normalize_assets import normalize_logo, thumb_width
 
 HEADERS = {"User-Agent": "CoachClicks-AssetsFetcher/1.1"}
 API = "https://commons.wikimedia.org/w/api.php"
@@ -88,15 +97,16 @@ def write_manifest_row(kind, name, file, source, license_name, url):
             w.writerow(["kind","name","file","source","license","download_url"])
         w.writerow([kind, name, file, source, license_name, url])
 
-def search_commons(query:str, limit=10):
+def search_commons(query:str, limit=10, width=512):
     params = {
         "action":"query","format":"json","prop":"imageinfo",
         "generator":"search","gsrsearch": query + " filetype:(svg|png)",
         "gsrnamespace":"6","gsrlimit": str(limit),
         "iiprop":"url|size|mime|extmetadata|canonicaltitle",
-        "iiurlwidth":"512"
+        "iiurlwidth": str(width)  # Commons renders the thumbnail at the size we will use
     }
-    r = requests.get(API, params=params, headers=HEADERS, timeout=25)
+    with span("asset_http", kind="search", q=query):
+        r = requests.get(API, params=params, headers=HEADERS, timeout=25)
     r.raise_for_status()
     pages = r.json().get("query",{}).get("pages",{})
     out = []
@@ -128,41 +138,11 @@ def choose_best(cands):
     return cands[0] if cands else None
 
 def download_image(url):
-    r = requests.get(url, headers=HEADERS, timeout=30)
+    with span("asset_http", kind="download", url=url):
+        r = requests.get(url, headers=HEADERS, timeout=30)
     r.raise_for_status()
     return Image.open(io.BytesIO(r.content)).convert("RGBA")
 
-def average_color(img):
-    arr = img.getdata()
-    r=g=b=n=0
-    for px in arr:
-        if len(px)==4 and px[3]==0: continue
-        rr,gg,bb = px[:3]
-        r+=rr; g+=gg; b+=bb; n+=1
-    if n==0: return (200,200,200)
-    return (r//n, g//n, b//n)
-
-def frameify(img, pad=9, radius=14):
-    w,h = img.size
-    card = Image.new("RGBA",(w+pad*2, h+pad*2),(255,255,255,235))
-    # rounded corners
-    corner = Image.new('L', (radius, radius), 0)
-    ImageDraw.Draw(corner).pieslice((0, 0, radius*2, radius*2), 180, 270, fill=255)
-    alpha = Image.new('L', (card.size[0], card.size[1]), 255)
-    alpha.paste(corner, (0,0))
-    alpha.paste(corner.rotate(90), (0, card.size[1]-radius))
-    alpha.paste(corner.rotate(180), (card.size[0]-radius, card.size[1]-radius))
-    alpha.paste(corner.rotate(270), (card.size[0]-radius, 0))
-    card.putalpha(alpha)
-    card.paste(img, (pad,pad), img)
-    return card
-
-def normalize_logo(img, max_wh=110):
-    w,h=img.size
-    r = min(max_wh/w, max_wh/h, 1.0)
-    img = img.resize((int(w*r), int(h*r)), Image.LANCZOS)
-    return frameify(img)
-
 def college_query_variants(name:str):
     uni = name
     nick = COLLEGE_ALIASES.get(name, name)
@@ -189,9 +169,11 @@ def fetch_logo(school:str):
     slug = slugify(school)
     out = COL_DIR/f"{slug}.png"
     if out.exists() and out.stat().st_size>0: return out
+    hit = asset_resolver.resolve("college", school, [COL_DIR])  # "Pittsburgh" -> pitt.png, no network
+    if hit: return hit
     for q in college_query_variants(school):
         try:
-            best = choose_best(search_commons(q))
+            best = choose_best(search_commons(q, width=thumb_width(110)))
             if not best: continue
             img = download_image(best["url"])
             img = normalize_logo(img, max_wh=110)
@@ -209,9 +191,11 @@ def fetch_flag_by_name(name:str):
     slug = slugify(name)
     out = FLG_DIR/f"{slug.upper()}.png"
     if out.exists() and out.stat().st_size>0: return out
+    hit = asset_resolver.resolve("flag", name, [FLG_DIR])
+    if hit: return hit
     for q in [f"Flag of {name}", f"{name} flag emblem", f"{name} flag"]:
         try:
-            best = choose_best(search_commons(q))
+            best = choose_best(search_commons(q, width=thumb_width(130)))
             if not best: continue
             img = download_image(best["url"])
             img = normalize_logo(img, max_wh=130)
@@ -234,22 +218,75 @@ def fetch_flag(code_or_name:str):
     name = flag_name_from_code(code_or_name) or code_or_name
     return fetch_flag_by_name(name)
 
-def extract_targets(json_paths):
+def targets_from(lineups):
     colleges=set(); flags=set()
+    for d in lineups:
+        for pl in d.get("players",[]):
+            if pl.get("college"): colleges.add(pl["college"])
+            if pl.get("flag"): flags.add(pl["flag"])
+    return sorted(colleges), sorted(flags)
+
+def extract_targets(json_paths):
+    lineups=[]
     for p in json_paths:
         try:
-            d=json.load(open(p,"r",encoding="utf-8"))
-            for pl in d.get("players",[]):
-                if pl.get("college"): colleges.add(pl["college"])
-                if pl.get("flag"): flags.add(pl["flag"])
+            lineups.append(json.load(open(p,"r",encoding="utf-8")))
         except Exception as e:
             print("[warn] reading", p, e)
-    return sorted(colleges), sorted(flags)
+    return targets_from(lineups)
+
+def cached_asset(kind, name):
+    """Path of the normalized asset fetch_logo ("college") / fetch_flag ("flag")
+    would return from disk, else None."""
+    if kind not in ("college", "flag"): raise ValueError(f"unknown asset kind {kind!r}")
+    if kind == "college":
+        out, folder = COL_DIR/f"{slugify(name)}.png", COL_DIR
+    else:
+        name = flag_name_from_code(name) or name
+        out, folder = FLG_DIR/f"{slugify(name).upper()}.png", FLG_DIR
+    if out.exists() and out.stat().st_size>0: return out
+    return asset_resolver.resolve(kind, name, [folder])
+
+def prefetch(days=7, date=None, fetch=True):
+    """Warms the cache for the next `days` days of pool picks (data/daily_agent.py rotation).
+    Returns a coverage report: per-asset status and per-day missing names."""
+    from records import load_selector
+    picks = load_selector().upcoming(days, date)
+    cols, flgs = targets_from(obj for _,_,obj in picks)
+    status = {}
+    for kind, names, fetch_fn in (("college", cols, fetch_logo), ("flag", flgs, fetch_flag)):
+        for n in names:
+            if cached_asset(kind, n): status[(kind, n)] = "cached"
+            elif not fetch: status[(kind, n)] = "missing"
+            else: status[(kind, n)] = "fetched" if fetch_fn(n) else "missing"
+    by_day = {}
+    for d, _, obj in picks: by_day.setdefault(d.isoformat(), []).append(obj)
+    per_day = {}
+    for day, objs in by_day.items():
+        c, f = targets_from(objs)
+        miss = [n for n in c if status[("college", n)] == "missing"] + [n for n in f if status[("flag", n)] == "missing"]
+        per_day[day] = {"assets":len(c) + len(f), "missing":miss}
+    counts = {s: sum(1 for v in status.values() if v == s) for s in ("cached", "fetched", "missing")}
+    return {"days":days, "assets":len(status), **counts,
+            "coverage":round(1 - counts["missing"]/max(len(status),1), 4), "per_day":per_day}
+
+def _print_coverage(rep):
+    print(f"Prefetch {rep['days']} day(s): {rep['assets']} assets, {rep['cached']} cached, "
+          f"{rep['fetched']} fetched, {rep['missing']} missing ({rep['coverage']:.0%} coverage)")
+    for day, r in rep["per_day"].items():
+        print(f"  {day}: {r['assets']-len(r['missing'])}/{r['assets']}" + (f"  missing: {', '.join(r['missing'])}" if r["missing"] else ""))
 
 def main(argv):
     if not argv:
-        print("Pass JSON paths like data/lineup_basketball.json ..."); return 0
+        print("Pass JSON paths like data/lineup_basketball.json ... or --prefetch DAYS [--date YYYY-MM-DD] [--report-only]"); return 0
     load_aliases()
+    if "--prefetch" in argv:
+        import datetime
+        i = argv.index("--prefetch")
+        date = datetime.date.fromisoformat(argv[argv.index("--date")+1]) if "--date" in argv else None
+        rep = prefetch(int(argv[i+1]), date, fetch="--report-only" not in argv)
+        _print_coverage(rep)
+        return 0 if rep["missing"] == 0 else 2
     cols, flgs = extract_targets(argv)
     print(f"Colleges: {len(cols)} Flags: {len(flgs)}")
     for c in cols: fetch_logo(c)
@@ -0,0 +1,122 @@
+"""
+formations.py
+Formation templates for render_guess_team, loaded from assets/formations/*.json,
+and the badge placement engine.
+- A template gives pill/badge colors, the label kind ("college" or "flag"),
+  image folders and a center point per position code
+- Optional "sides" map the same positions into two regions for two-team lineups
+- place() resolves badge collisions on a spatial grid and is memoized per
+  (template, label sizes), so repeat layouts cost a dict lookup
+"""
+import json, re
+from pathlib import Path
+from functools import lru_cache
+from collections import defaultdict
+from asset_resolver import resolve
+
+W, H = 1080, 1920
+SAFE = 48
+FORMATIONS = Path("assets/formations")
+
+def _slug(s):
+    s = (s or "").strip().lower()
+    s = re.sub(r"[^a-z0-9]+", "-", s)
+    return re.sub(r"-+", "-", s).strip("-") or "x"
+
+class Formation:
+    def __init__(self, cfg):
+        self.name = cfg["name"]
+        self.label = cfg.get("label", "college")
+        self.pill_color = tuple(cfg.get("pill_color", (10,35,70)))
+        self.badge_color = tuple(cfg.get("badge_color", (20,40,85)))
+        self.pill_max_w = cfg.get("pill_max_w", 360)
+        self.image_dirs = [Path(p) for p in cfg.get("image_dirs", [])]
+        self.positions = {k.upper(): tuple(v) for k, v in cfg["positions"].items()}
+        self.default = tuple(cfg.get("default", (W//2, H//2)))
+        self.sides = cfg.get("sides") or [{}]
+
+    def center(self, pos, side=0):
+        x, y = self.positions.get(pos, self.default)
+        s = self.sides[min(side, len(self.sides)-1)]
+        (ox, oy), (kx, ky) = s.get("offset", (0, 0)), s.get("scale", (1, 1))
+        return (int(ox + kx*x), int(oy + ky*y))
+
+    def colors(self, side=0):
+        s = self.sides[min(side, len(self.sides)-1)]
+        return tuple(s.get("pill_color", self.pill_color)), tuple(s.get("badge_color", self.badge_color))
+
+    def label_for(self, player):
+        """(pill text, image file stem) for a Player (or player dict)."""
+        from records import as_player
+        player = as_player(player)
+        if self.label == "flag":
+            iso = (player.flag or "").upper()
+            return iso or player.country or "—", iso
+        college = player.college or ""
+        return college, (_slug(college) if college else "")
+
+    def image_path(self, stem):
+        if not stem: return None
+        for folder in self.image_dirs:
+            cand = folder / f"{stem}.png"
+            if cand.exists(): return cand
+        # "ohio-st" -> ohio-state.png, "BRA" -> BRAZIL.png (as saved by fetch_assets_v4_2)
+        return resolve(self.label, stem, self.image_dirs)
+
+@lru_cache(maxsize=None)
+def _load(path, mtime):
+    with open(path, "r", encoding="utf-8") as f:
+        return Formation(json.load(f))
+
+def load_formation(name, fallback="soccer"):
+    p = FORMATIONS / f"{name}.json"
+    if not p.exists(): p = FORMATIONS / f"{fallback}.json"
+    return _load(str(p), p.stat().st_mtime_ns)
+
+def available():
+    return sorted(p.stem for p in FORMATIONS.glob("*.json"))
+
+class SpatialGrid:
+    """Uniform grid of placed rects; a hit test only scans the cells it covers."""
+    def __init__(self, cell=96):
+        self.cell = cell
+        self.cells = defaultdict(list)
+
+    def _keys(self, rect):
+        x, y, w, h = rect; c = self.cell
+        return [(i, j) for i in range(x//c, (x+w-1)//c + 1) for j in range(y//c, (y+h-1)//c + 1)]
+
+    def hits(self, rect):
+        ax, ay, aw, ah = rect
+        for k in self._keys(rect):
+            for bx, by, bw, bh in self.cells.get(k, ()):
+                if not (ax+aw <= bx or bx+bw <= ax or ay+ah <= by or by+bh <= ay):
+                    return True
+        return False
+
+    def add(self, rect):
+        for k in self._keys(rect): self.cells[k].append(rect)
+
+def _avoid(grid, xy, size, step=18, top=SAFE, bottom=H-SAFE):
+    # same walk as the old _avoid_overlap: up while there is room, then down
+    x, y = xy; w, h = size
+    for _ in range(100):
+        if not grid.hits((x, y, w, h)): break
+        ny = y - step if y - step >= top else min(bottom-h, y + step)
+        if ny == y: break
+        y = ny
+    grid.add((x, y, w, h))
+    return (x, y)
+
+@lru_cache(maxsize=512)
+def place(items, gap=10):
+    """items: ((center, stack_size, badge_size), ...) in paint order.
+    Returns ((stack_xy, badge_xy), ...); badges sit above their stack unless
+    that collides with an earlier stack or badge."""
+    grid, out = SpatialGrid(), []
+    for (cx, cy), (sw, sh), (bw, bh) in items:
+        sx, sy = cx - sw//2, cy - sh//2
+        grid.add((sx, sy, sw, sh))
+        b = _avoid(grid, (sx + (sw - bw)//2, sy - bh - gap), (bw, bh))
+        out.append(((sx, sy), b))
+    return tuple(out)
@@ -1,17 +1,17 @@
-import csv, random, json, datetime as dt
+import random, json, hashlib, datetime as dt
 from pathlib import Path
 from collections import defaultdict
+from tracing import span, traced
+from records import read_teams, load_json
 
 DATA_DIR = Path(__file__).parent / "data"
 OUT_DIR = Path(__file__).parent / "out"
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 
+@traced("csv_load")
 def load_teams():
-    leagues = defaultdict(list)
-    for fname in ["nfl.csv", "nba.csv", "mlb.csv"]:
-        with open(DATA_DIR / fname, newline="", encoding="utf-8") as f:
-            for r in csv.DictReader(f):
-                leagues[r["league"]].append(r)
+    """({league: [records.Team]}, flat list of the same teams)."""
+    leagues = read_teams(data_dir=DATA_DIR)
     flat = [t for v in leagues.values() for t in v]
     return leagues, flat
 
@@ -19,42 +19,42 @@ def city_to_leagues(leagues):
     m = defaultdict(set)
     for L, lst in leagues.items():
         for t in lst:
-            m[t["city"]].add(L)
+            m[t.city].add(L)
     return m
 
-def q_which_not_in_division(leagues):
-    L = random.choice(list(leagues.keys()))
+def q_which_not_in_division(leagues, rng=random):
+    L = rng.choice(list(leagues.keys()))
     by_div = defaultdict(list)
-    for t in leagues[L]: by_div[t["division"]].append(t)
-    good_div = random.choice([d for d,v in by_div.items() if len(v) >= 3])
-    corrects = random.sample(by_div[good_div], 3)
-    other_div = random.choice([d for d in by_div if d != good_div])
-    wrong = random.choice(by_div[other_div])
-    options = [f'{t["city"]} {t["team"]}' for t in corrects] + [f'{wrong["city"]} {wrong["team"]}']
-    random.shuffle(options)
+    for t in leagues[L]: by_div[t.division].append(t)
+    good_div = rng.choice([d for d,v in by_div.items() if len(v) >= 3])
+    corrects = rng.sample(by_div[good_div], 3)
+    other_div = rng.choice([d for d in by_div if d != good_div])
+    wrong = rng.choice(by_div[other_div])
+    options = [t.label for t in corrects] + [wrong.label]
+    rng.shuffle(options)
     return {
         "type":"not_in_division",
         "question":f"Which team is NOT in the {good_div} ({L})?",
         "options":options,
-        "answer":f'{wrong["city"]} {wrong["team"]}',
+        "answer":wrong.label,
         "meta":{"league":L,"division":good_div}
     }
 
-def q_pair_same_division(leagues):
-    L = random.choice(list(leagues.keys()))
+def q_pair_same_division(leagues, rng=random):
+    L = rng.choice(list(leagues.keys()))
     by_div = defaultdict(list)
-    for t in leagues[L]: by_div[t["division"]].append(t)
-    target_div = random.choice([d for d,v in by_div.items() if len(v) >= 2])
-    a,b = random.sample(by_div[target_div], 2)
-    correct = f'{a["team"]} & {b["team"]}'
+    for t in leagues[L]: by_div[t.division].append(t)
+    target_div = rng.choice([d for d,v in by_div.items() if len(v) >= 2])
+    a,b = rng.sample(by_div[target_div], 2)
+    correct = f'{a.team} & {b.team}'
     teams = leagues[L]
     distractors = set()
     while len(distractors) < 3:
-        x,y = random.sample(teams, 2)
-        if x["division"] != y["division"]:
-            distractors.add(f'{x["team"]} & {y["team"]}')
-    options = list(distractors) + [correct]
-    random.shuffle(options)
+        x,y = rng.sample(teams, 2)
+        if x.division != y.division:
+            distractors.add(f'{x.team} & {y.team}')
+    options = sorted(distractors) + [correct]
+    rng.shuffle(options)
     return {
         "type":"pair_same_division",
         "question":f"Which pair plays in the SAME division ({L})?",
@@ -63,15 +63,15 @@ def q_pair_same_division(leagues):
         "meta":{"league":L,"division":target_div}
     }
 
-def q_city_cross_league(leagues):
+def q_city_cross_league(leagues, rng=random):
     c2L = city_to_leagues(leagues)
-    city, Ls = random.choice([(c, Ls) for c, Ls in c2L.items() if len(Ls) >= 2])
-    L1, L2 = random.sample(list(Ls), 2)
+    city, Ls = rng.choice([(c, Ls) for c, Ls in sorted(c2L.items()) if len(Ls) >= 2])
+    L1, L2 = rng.sample(sorted(Ls), 2)
     correct = city
-    all_cities = {t["city"] for v in leagues.values() for t in v}
+    all_cities = sorted({t.city for v in leagues.values() for t in v})
     distractors = [c for c in all_cities if not ({L1, L2} <= c2L.get(c, set()))]
-    options = random.sample(distractors, 3) + [correct]
-    random.shuffle(options)
+    options = rng.sample(distractors, 3) + [correct]
+    rng.shuffle(options)
     return {
         "type":"city_cross_league",
         "question":f"Which city has teams in BOTH the {L1} and the {L2}?",
@@ -80,19 +80,19 @@ def q_city_cross_league(leagues):
         "meta":{"leagues":[L1, L2]}
     }
 
-def q_fix_mismatch(leagues):
-    L = random.choice(list(leagues.keys()))
-    true = random.choice(leagues[L])
-    correct = f'{true["city"]} {true["team"]}'
-    cities = [t["city"] for t in leagues[L] if t["city"] != true["city"]]
-    teams  = [t["team"] for t in leagues[L] if t["team"] != true["team"]]
+def q_fix_mismatch(leagues, rng=random):
+    L = rng.choice(list(leagues.keys()))
+    true = rng.choice(leagues[L])
+    correct = true.label
+    cities = [t.city for t in leagues[L] if t.city != true.city]
+    teams  = [t.team for t in leagues[L] if t.team != true.team]
     mismatches = set()
     while len(mismatches) < 3 and cities and teams:
-        c = random.choice(cities); tm = random.choice(teams)
-        if not (c == true["city"] and tm == true["team"]):
+        c = rng.choice(cities); tm = rng.choice(teams)
+        if not (c == true.city and tm == true.team):
             mismatches.add(f"{c} {tm}")
-    options = list(mismatches) + [correct]
-    random.shuffle(options)
+    options = sorted(mismatches) + [correct]
+    rng.shuffle(options)
     return {
         "type":"fix_mismatch",
         "question":f"Which city–team pairing is CORRECT in the {L}?",
@@ -101,16 +101,16 @@ def q_fix_mismatch(leagues):
         "meta":{"league":L}
     }
 
-def q_division_count(leagues):
-    L = random.choice(list(leagues.keys()))
+def q_division_count(leagues, rng=random):
+    L = rng.choice(list(leagues.keys()))
     by_div = defaultdict(list)
-    for t in leagues[L]: by_div[t["division"]].append(t)
-    div = random.choice(list(by_div))
+    for t in leagues[L]: by_div[t.division].append(t)
+    div = rng.choice(list(by_div))
     n = len(by_div[div])
     options = {n}
     while len(options) < 4:
-        options.add(max(2, n + random.choice([-2,-1,1,2,3])))
-    options = list(options); random.shuffle(options)
+        options.add(max(2, n + rng.choice([-2,-1,1,2,3])))
+    options = sorted(options); rng.shuffle(options)
     return {
         "type":"division_count",
         "question":f"How many teams are in the {div} ({L})?",
@@ -121,13 +121,44 @@ def q_division_count(leagues):
 
 QUESTION_BANK = [q_which_not_in_division, q_pair_same_division, q_city_cross_league, q_fix_mismatch, q_division_count]
 
-def generate_daily(n_questions=10, seed=None):
-    if seed is not None: random.seed(seed)
-    leagues, _ = load_teams()
-    qlist = [random.choice(QUESTION_BANK)(leagues) for _ in range(n_questions)]
-    date_str = dt.datetime.utcnow().strftime("%Y-%m-%d")
-    out = {"date": date_str, "questions": qlist}
+def _draw_checked(leagues, index, rng, tries=20):
+    # re-draw until the validator finds no errors (keeps the last draw otherwise)
+    from validate_questions import check_question
+    for _ in range(tries):
+        q = rng.choice(QUESTION_BANK)(leagues, rng)
+        if not any(level == "error" for level, _ in check_question(q, index)):
+            return q
+    return q
+
+def day_seed(date_str):
+    """Seed for a day's questions: same date, same set, in any process."""
+    return int.from_bytes(hashlib.sha256(f"trivia:{date_str}".encode()).digest()[:8], "big")
+
+def _reusable(path, seed, n_questions):
+    """An existing day file that was generated with this seed (or predates seeds) and validates."""
+    from validate_questions import is_valid_day
+    try: day = load_json(path)
+    except (OSError, ValueError): return False
+    if day.get("seed", seed) != seed or len(day.get("questions", [])) != n_questions: return False
+    return is_valid_day(path)
+
+def generate_daily(n_questions=10, seed=None, validate=True, date=None, force=False):
+    date_str = date or dt.datetime.utcnow().strftime("%Y-%m-%d")
+    seed = day_seed(date_str) if seed is None else seed
     path = OUT_DIR / f"trivia_{date_str}.json"
+    if not force and path.exists() and _reusable(path, seed, n_questions):
+        print("Kept", path)
+        return path
+    rng = random.Random(seed)
+    leagues, _ = load_teams()
+    with span("generate", n=n_questions, validate=validate):
+        if validate:
+            from validate_questions import TeamIndex
+            index = TeamIndex(leagues)
+            qlist = [_draw_checked(leagues, index, rng) for _ in range(n_questions)]
+        else:
+            qlist = [rng.choice(QUESTION_BANK)(leagues, rng) for _ in range(n_questions)]
+    out = {"date": date_str, "seed": seed, "questions": qlist}
     with open(path, "w", encoding="utf-8") as f:
         json.dump(out, f, ensure_ascii=False, indent=2)
     print("Wrote", path)
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+generator_batch.py
+Vectorized question sampling for bank-scale analysis.
+- Encodes leagues, divisions, cities and teams as integer arrays once
+- Samples whole batches of a QUESTION_BANK type with NumPy (100k+/call)
+- Keeps batches as integer arrays; decode() builds today's question dicts
+  only for the rows you actually need
+Usage:
+  python generator_batch.py [n_per_type] [seed]
+Requires: numpy
+"""
+import sys, time
+import numpy as np
+from generator import load_teams
+
+class Encoded:
+    """Integer encoding of the team tables plus padded lookup matrices."""
+    def __init__(self, leagues):
+        self.league_names = sorted(leagues)
+        rows = [t for L in self.league_names for t in leagues[L]]
+        self.div_names  = sorted({(t.league, t.division) for t in rows})
+        self.city_names = sorted({t.city for t in rows})
+        self.team_names = sorted({t.team for t in rows})
+        L_id = {L:i for i,L in enumerate(self.league_names)}
+        D_id = {d:i for i,d in enumerate(self.div_names)}
+        C_id = {c:i for i,c in enumerate(self.city_names)}
+        T_id = {t:i for i,t in enumerate(self.team_names)}
+
+        self.t_league = np.array([L_id[t.league] for t in rows], dtype=np.int32)
+        self.t_div    = np.array([D_id[(t.league, t.division)] for t in rows], dtype=np.int32)
+        self.t_city   = np.array([C_id[t.city] for t in rows], dtype=np.int32)
+        self.t_team   = np.array([T_id[t.team] for t in rows], dtype=np.int32)
+        self.labels   = [t.label for t in rows]
+        self.n_teams  = len(rows)
+
+        nL, nD, nC = len(self.league_names), len(self.div_names), len(self.city_names)
+        self.div_league = np.array([L_id[L] for L,_ in self.div_names], dtype=np.int32)
+        self.div_teams, self.div_size = _padded([np.flatnonzero(self.t_div == d) for d in range(nD)])
+        self.league_teams, self.league_size = _padded([np.flatnonzero(self.t_league == L) for L in range(nL)])
+        self.league_divs, self.league_ndiv = _padded([np.flatnonzero(self.div_league == L) for L in range(nL)])
+        # per-league divisions big enough to draw 3 (resp. 2) distinct teams from
+        self.divs_ge3, self.ndivs_ge3 = self._divs_with(3)
+        self.divs_ge2, self.ndivs_ge2 = self._divs_with(2)
+
+        self.city_league = np.zeros((nC, nL), dtype=bool)
+        self.city_league[self.t_city, self.t_league] = True
+        # (city, team-name) pairs that exist in any league
+        self.real_pairs = np.zeros((nC, len(self.team_names)), dtype=bool)
+        self.real_pairs[self.t_city, self.t_team] = True
+
+    def _divs_with(self, k):
+        return _padded([d[:c][self.div_size[d[:c]] >= k] for d,c in zip(self.league_divs, self.league_ndiv)])
+
+def _padded(groups, fill=-1):
+    m = max((len(g) for g in groups), default=0)
+    out = np.full((len(groups), max(m, 1)), fill, dtype=np.int32)
+    for i,g in enumerate(groups): out[i, :len(g)] = g
+    return out, np.array([len(g) for g in groups], dtype=np.int32)
+
+def _pick(rng, table, size, rows):
+    """Uniform pick of one column per row from a padded (table, size) pair."""
+    return table[rows, (rng.random(len(rows)) * size[rows]).astype(np.int32)]
+
+def _distinct(rng, cands, valid, k):
+    """k distinct valid values per row, uniformly; ok marks rows that had enough."""
+    n, m = cands.shape
+    dup = (cands[:, :, None] == cands[:, None, :]) & np.tri(m, k=-1, dtype=bool)
+    valid = valid & ~dup.any(axis=2)
+    keys = rng.random((n, m)); keys[~valid] = np.inf
+    order = np.argsort(keys, axis=1)[:, :k]
+    ok = np.isfinite(np.take_along_axis(keys, order, axis=1)).all(axis=1)
+    return np.take_along_axis(cands, order, axis=1), ok
+
+def _shuffle(rng, options):
+    """Shuffle 4 options per row; the correct one enters in column 3."""
+    perm = np.argsort(rng.random(options.shape), axis=1)
+    return np.take_along_axis(options, perm, axis=1), np.argmax(perm == 3, axis=1)
+
+def _retry(sample, rng, enc, n):
+    """Run a row sampler and re-draw only the rows it could not fill."""
+    out, ok = sample(rng, enc, n)
+    while not ok.all():
+        bad = np.flatnonzero(~ok)
+        fix, ok_fix = sample(rng, enc, len(bad))
+        for k in out: out[k][bad] = fix[k]
+        ok[bad] = ok_fix
+    return out
+
+def _sample_not_in_division(rng, enc, n):
+    L = rng.integers(len(enc.league_names), size=n)
+    good = _pick(rng, enc.divs_ge3, enc.ndivs_ge3, L)
+    members = enc.div_teams[good]
+    corrects, ok = _distinct(rng, members, members >= 0, 3)
+    other = _pick(rng, enc.league_divs, enc.league_ndiv, L)
+    ok &= other != good
+    wrong = _pick(rng, enc.div_teams, enc.div_size, other)
+    return {"league":L, "div":good, "options":np.column_stack([corrects, wrong])}, ok
+
+def _sample_pair_same_division(rng, enc, n, m=12):
+    L = rng.integers(len(enc.league_names), size=n)
+    div = _pick(rng, enc.divs_ge2, enc.ndivs_ge2, L)
+    members = enc.div_teams[div]
+    ab, ok = _distinct(rng, members, members >= 0, 2)
+    N = enc.n_teams
+    Lm = np.repeat(L, m)
+    x = _pick(rng, enc.league_teams, enc.league_size, Lm).reshape(n, m)
+    y = _pick(rng, enc.league_teams, enc.league_size, Lm).reshape(n, m)
+    wrong, ok2 = _distinct(rng, x*N + y, (x != y) & (enc.t_div[x] != enc.t_div[y]), 3)
+    correct = ab[:, 0]*N + ab[:, 1]
+    return {"league":L, "div":div, "options":np.column_stack([wrong, correct])}, ok & ok2
+
+def _sample_city_cross_league(rng, enc, n, m=16):
+    multi = np.flatnonzero(enc.city_league.sum(axis=1) >= 2)
+    city = multi[rng.integers(len(multi), size=n)]
+    keys = rng.random((n, len(enc.league_names)))
+    keys[~enc.city_league[city]] = np.inf
+    L12 = np.argsort(keys, axis=1)[:, :2]
+    cands = rng.integers(len(enc.city_names), size=(n, m))
+    both = enc.city_league[cands, L12[:, :1]] & enc.city_league[cands, L12[:, 1:]]
+    wrong, ok = _distinct(rng, cands, ~both, 3)
+    return {"leagues":L12, "options":np.column_stack([wrong, city])}, ok
+
+def _sample_fix_mismatch(rng, enc, n, m=12):
+    L = rng.integers(len(enc.league_names), size=n)
+    true = _pick(rng, enc.league_teams, enc.league_size, L)
+    Lm = np.repeat(L, m)
+    c  = enc.t_city[_pick(rng, enc.league_teams, enc.league_size, Lm)].reshape(n, m)
+    tm = enc.t_team[_pick(rng, enc.league_teams, enc.league_size, Lm)].reshape(n, m)
+    # unlike q_fix_mismatch, never offer a pairing that is real in some league
+    valid = (c != enc.t_city[true][:, None]) & (tm != enc.t_team[true][:, None]) & ~enc.real_pairs[c, tm]
+    NT = len(enc.team_names)
+    wrong, ok = _distinct(rng, c*NT + tm, valid, 3)
+    correct = enc.t_city[true]*NT + enc.t_team[true]
+    return {"league":L, "options":np.column_stack([wrong, correct])}, ok
+
+DELTAS = np.array([-2, -1, 1, 2, 3], dtype=np.int32)
+
+def _sample_division_count(rng, enc, n):
+    L = rng.integers(len(enc.league_names), size=n)
+    div = _pick(rng, enc.league_divs, enc.league_ndiv, L)
+    size = enc.div_size[div]
+    cands = np.maximum(2, size[:, None] + DELTAS[None, :])
+    wrong, ok = _distinct(rng, cands, cands != size[:, None], 3)
+    return {"league":L, "div":div, "options":np.column_stack([wrong, size])}, ok
+
+SAMPLERS = {
+    "not_in_division": _sample_not_in_division,
+    "pair_same_division": _sample_pair_same_division,
+    "city_cross_league": _sample_city_cross_league,
+    "fix_mismatch": _sample_fix_mismatch,
+    "division_count": _sample_division_count,
+}
+
+def sample_batch(enc, qtype, n, rng=None):
+    """n questions of one type as integer arrays; options[i, answer[i]] is correct."""
+    rng = rng if rng is not None else np.random.default_rng()
+    out = _retry(SAMPLERS[qtype], rng, enc, n)
+    out["options"], out["answer"] = _shuffle(rng, out["options"])
+    out["type"] = qtype; out["n"] = n
+    return out
+
+def _option_text(enc, qtype, v):
+    if qtype == "not_in_division": return enc.labels[v]
+    if qtype == "pair_same_division":
+        x, y = divmod(int(v), enc.n_teams)
+        return f"{enc.team_names[enc.t_team[x]]} & {enc.team_names[enc.t_team[y]]}"
+    if qtype == "city_cross_league": return enc.city_names[v]
+    if qtype == "fix_mismatch":
+        c, tm = divmod(int(v), len(enc.team_names))
+        return f"{enc.city_names[c]} {enc.team_names[tm]}"
+    return str(int(v))
+
+def decode(enc, batch, i):
+    """Row i of a batch as the dict the QUESTION_BANK functions return."""
+    t = batch["type"]
+    opts = [_option_text(enc, t, v) for v in batch["options"][i]]
+    ans = opts[batch["answer"][i]]
+    if t == "city_cross_league":
+        L1, L2 = (enc.league_names[j] for j in batch["leagues"][i])
+        return {"type":t, "question":f"Which city has teams in BOTH the {L1} and the {L2}?",
+                "options":opts, "answer":ans, "meta":{"leagues":[L1, L2]}}
+    L = enc.league_names[batch["league"][i]]
+    if t == "fix_mismatch":
+        return {"type":t, "question":f"Which city–team pairing is CORRECT in the {L}?",
+                "options":opts, "answer":ans, "meta":{"league":L}}
+    div = enc.div_names[batch["div"][i]][1]
+    if t == "not_in_division":
+        q = f"Which team is NOT in the {div} ({L})?"; meta = {"league":L, "division":div}
+    elif t == "pair_same_division":
+        q = f"Which pair plays in the SAME division ({L})?"; meta = {"league":L, "division":div}
+    else:
+        q = f"How many teams are in the {div} ({L})?"; meta = {"league":L, "division":div, "true_count":int(ans)}
+    return {"type":t, "question":q, "options":opts, "answer":ans, "meta":meta}
+
+def iter_questions(enc, batch):
+    for i in range(batch["n"]):
+        yield decode(enc, batch, i)
+
+def main(argv):
+    n = int(argv[0]) if argv else 100_000
+    rng = np.random.default_rng(int(argv[1]) if len(argv) > 1 else None)
+    leagues, _ = load_teams()
+    enc = Encoded(leagues)
+    for qtype in SAMPLERS:
+        t0 = time.perf_counter()
+        b = sample_batch(enc, qtype, n, rng)
+        dt = time.perf_counter() - t0
+        print(f"{qtype:20s} {n} in {dt*1000:.0f} ms ({n/dt:,.0f}/s)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+glyph_atlas.py
+Optional text backend: glyphs are rasterized once per (font file, size) and
+lines are composed from them instead of going through FreeType on every
+draw.text call. Whole-line masks are kept too, since most labels repeat
+(position codes, colleges, ISO codes, the handle).
+- Pen positions come from the font's own metrics: getlength(prev + ch) -
+  getlength(ch) is the advance of prev including kerning; each glyph lands on
+  the rounded pen position and overlapping glyphs take the max coverage, which
+  is how PIL composes a line
+- text(draw, xy, s, font, fill) is a drop-in for draw.text(xy, s, font=font,
+  fill=fill); it uses the atlas only with TEXT_BACKEND=atlas and falls back to
+  PIL for anything it doesn't model (multiline, non-integer xy, bitmap fonts)
+- check compares both paths over the fonts/sizes and strings the renderers use
+Usage:
+  python glyph_atlas.py check [--tolerance 0]
+  python glyph_atlas.py bench [--repeat 5]
+  TEXT_BACKEND=atlas python render_cards.py out/trivia_X.json
+Requires: pillow, numpy
+"""
+import os, sys, math, json, time
+from pathlib import Path
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+BACKEND = os.environ.get("TEXT_BACKEND", "pil")
+SIZES = (72, 60, 54, 48, 46, 44, 32)
+MAX_LINES = 4096  # cached line masks per atlas
+
+class GlyphAtlas:
+    def __init__(self, font, max_lines=MAX_LINES):
+        self.font = font
+        self.glyphs = {}            # ch -> (coverage array, left, top)
+        self.advances = {}          # (prev, ch) -> advance of prev incl. kerning
+        self.lines = OrderedDict()  # text -> (L mask image, (dx, dy)) or None
+        self.max_lines = max_lines
+
+    def glyph(self, ch):
+        g = self.glyphs.get(ch)
+        if g is None:
+            import numpy as np
+            l, t, r, b = self.font.getbbox(ch)
+            if r <= l or b <= t:
+                g = (None, l, t)
+            else:
+                im = Image.new("L", (r - l, b - t))
+                ImageDraw.Draw(im).text((-l, -t), ch, font=self.font, fill=255)
+                g = (np.asarray(im), l, t)
+            self.glyphs[ch] = g
+        return g
+
+    def advance(self, prev, ch):
+        a = self.advances.get((prev, ch))
+        if a is None:
+            a = self.advances[(prev, ch)] = self.font.getlength(prev + ch) - self.font.getlength(ch)
+        return a
+
+    def _compose(self, s):
+        import numpy as np
+        parts, pen, prev = [], 0.0, None
+        for ch in s:
+            if prev is not None: pen += self.advance(prev, ch)
+            a, l, t = self.glyph(ch)
+            if a is not None: parts.append((a, math.floor(pen + 0.5) + l, t))
+            prev = ch
+        if not parts: return None
+        x0 = min(x for _, x, _ in parts); y0 = min(y for _, _, y in parts)
+        x1 = max(x + a.shape[1] for a, x, _ in parts); y1 = max(y + a.shape[0] for a, _, y in parts)
+        out = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        for a, x, y in parts:
+            view = out[y - y0:y - y0 + a.shape[0], x - x0:x - x0 + a.shape[1]]
+            np.maximum(view, a, out=view)
+        return Image.fromarray(out, "L"), (x0, y0)
+
+    def mask(self, s):
+        """(L coverage image, offset from xy) for a line, None when nothing is inked."""
+        if s in self.lines:
+            self.lines.move_to_end(s)
+            return self.lines[s]
+        m = self.lines[s] = self._compose(s)
+        if len(self.lines) > self.max_lines: self.lines.popitem(last=False)
+        return m
+
+    def draw(self, draw, xy, s, fill):
+        m = self.mask(s)
+        if m is not None:
+            draw.bitmap((xy[0] + m[1][0], xy[1] + m[1][1]), m[0], fill=fill)
+
+_ATLASES = {}
+
+def atlas(font):
+    key = (font.path, font.size, font.index)
+    a = _ATLASES.get(key)
+    if a is None: a = _ATLASES[key] = GlyphAtlas(font)
+    return a
+
+def _supported(draw, xy, s, font):
+    return (isinstance(font, ImageFont.FreeTypeFont) and isinstance(font.path, str) and draw.fontmode == "L"
+            and "\n" not in s and "\r" not in s and all(isinstance(v, int) for v in xy))
+
+def text(draw, xy, s, font, fill=None, backend=None):
+    """draw.text(xy, s, font=font, fill=fill), through the atlas when TEXT_BACKEND=atlas."""
+    if (backend or BACKEND) == "atlas" and _supported(draw, xy, s, font):
+        atlas(font).draw(draw, xy, s, fill)
+    else:
+        draw.text(xy, s, font=font, fill=fill)
+
+# --- check / bench ----------------------------------------------------------
+
+def corpus():
+    """Strings the renderers draw: labels from the pools and CSVs, handles, titles."""
+    out = ["@trivia • #Shorts", "@YourHandle • #Shorts", "@CoachClicks • #Shorts", "Daily Sports Trivia • NFL",
+           "Which team is NOT in the AFC East (NFL)?", "Which city–team pairing is CORRECT in the MLB?",
+           "1. New York Jets", "2. Los Angeles Dodgers", "GUESS THE TEAM", "AVAWAY To Ty Vo Wa"]
+    for p in sorted(Path("data/pools").glob("*.json")):
+        for lineup in json.loads(p.read_text(encoding="utf-8")):
+            out.append(f"{lineup.get('answer', '')} ({lineup.get('year', '')})")
+            for pl in lineup.get("players", []):
+                out += [v for k, v in pl.items() if k in ("pos", "college", "flag") and v]
+    for p in sorted(Path("data").glob("*.csv")):
+        for line in p.read_text(encoding="utf-8").splitlines()[1:]:
+            league, division, city, team = line.split(",")[:4]
+            out += [f"{city} {team}", division]
+    return list(dict.fromkeys(out))
+
+def _fonts(sizes=SIZES):
+    from render_cards import _pick_font
+    return [_pick_font(s) for s in sizes]
+
+def check(tolerance=0, strings=None, fonts=None):
+    """Renders every string both ways on RGB and RGBA; returns (cases, mismatches)."""
+    import numpy as np
+    strings, fonts = strings or corpus(), fonts or _fonts()
+    bad, n = [], 0
+    for font in fonts:
+        a = atlas(font)
+        for s in strings:
+            w = int(font.getlength(s)) + font.size + 20
+            for mode, bg, fill in (("RGB", (20, 30, 40), (240, 240, 240)), ("RGBA", (0, 0, 0, 0), (16, 18, 20))):
+                ref, got = Image.new(mode, (w, font.size * 2), bg), Image.new(mode, (w, font.size * 2), bg)
+                ImageDraw.Draw(ref).text((10, 5), s, font=font, fill=fill)
+                a.draw(ImageDraw.Draw(got), (10, 5), s, fill)
+                diff = int(np.abs(np.asarray(ref, dtype=np.int16) - np.asarray(got, dtype=np.int16)).max())
+                n += 1
+                if diff > tolerance: bad.append((font.size, s, mode, diff))
+    return n, bad
+
+def bench(repeat=5, strings=None, fonts=None):
+    """Seconds to draw the corpus once per font, PIL path vs warm atlas (best of repeat)."""
+    strings, fonts = strings or corpus(), fonts or _fonts()
+    img = Image.new("RGB", (1080, 1920))
+    draw = ImageDraw.Draw(img)
+    for f in fonts:
+        for s in strings: atlas(f).mask(s)
+    out = {}
+    for backend in ("pil", "atlas"):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            for f in fonts:
+                for s in strings: text(draw, (20, 20), s, f, (255, 255, 255), backend=backend)
+            best = min(best, time.perf_counter() - t0)
+        out[backend] = best
+    return out, len(strings) * len(fonts)
+
+def main(argv):
+    if not argv or argv[0] not in ("check", "bench"):
+        print(__doc__.strip(), file=sys.stderr); return 1
+    opt = lambda k, d: argv[argv.index(k)+1] if k in argv else d
+    if argv[0] == "check":
+        n, bad = check(int(opt("--tolerance", 0)))
+        for size, s, mode, diff in bad[:20]: print(f"  {size:3d}px {mode:4s} max diff {diff:3d}  {s!r}")
+        print(f"{n - len(bad)}/{n} cases within tolerance")
+        return 1 if bad else 0
+    res, calls = bench(int(opt("--repeat", 5)))
+    for k, v in res.items(): print(f"{k:6s} {v*1000:8.1f} ms for {calls} lines ({v/calls*1e6:.1f} us/line)")
+    print(f"speedup x{res['pil']/res['atlas']:.1f}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
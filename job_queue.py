@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+job_queue.py
+Shared render queue in one SQLite file, for several worker processes or hosts
+(put the file on the shared filesystem next to out/ and assets/).
+- A job spec is the render daemon's job JSON plus optional "assets":
+    {"kind":"card", "json":"out/trivia_X.json", "index":3, "out_dir":...}
+    {"kind":"short", "json":"out/trivia_X.json", "index":1, "out":..., "music":..., "encoder":...}
+    {"kind":"guess_team", "json":"data/lineup_soccer.json", "out":..., "music":...}
+    "assets":["assets/flags/BRAZIL.png", ...] are files the job needs besides its
+    json / music; a job whose inputs are missing fails (and retries) without rendering
+- Adding the same spec twice returns the existing job (the key is a hash of the spec)
+- Workers claim the oldest runnable job in one transaction and hold a lease that a
+  heartbeat thread renews; a job whose lease ran out (worker killed, host gone) is
+  claimed again by whichever worker is free next
+- Failures retry with exponential backoff up to --attempts, then stay "failed"
+- A worker that lost its lease drops its result; the job belongs to whoever claimed it
+Usage:
+  python job_queue.py add '{"kind":"guess_team","json":"data/lineup_soccer.json"}' [--attempts 3] [--priority 0]
+  python job_queue.py add --file specs.jsonl
+  python job_queue.py day out/trivia_X.json        # a card job per question + the Short
+  python job_queue.py worker [--lease 120] [--exit-when-empty] [--max-jobs N] [--name host-1]
+  python job_queue.py local 3                      # 3 worker processes on this machine until the queue drains
+  python job_queue.py status
+  python job_queue.py requeue [--all]               # failed jobs (--all: done ones too) back to queued
+  python job_queue.py purge [--all]                 # forget done jobs (--all: failed ones too)
+  (every command takes --db out/jobs.sqlite; JOB_QUEUE_DB sets the default)
+"""
+import os, sys, json, time, socket, sqlite3, hashlib, threading, traceback, subprocess
+from pathlib import Path
+from tracing import span
+
+DB = Path(os.environ.get("JOB_QUEUE_DB", "out/jobs.sqlite"))
+LEASE = 120.0          # seconds a claim lasts without a heartbeat
+ATTEMPTS = 3
+BACKOFF = 10.0         # first retry delay; doubles per attempt
+POLL = 2.0             # idle worker sleep between claims
+SPEC_KEYS = {"card": ("json", "question"), "short": ("json",), "guess_team": ("json",)}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+  id INTEGER PRIMARY KEY,
+  key TEXT UNIQUE NOT NULL,
+  kind TEXT NOT NULL,
+  spec TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued',   -- queued | running | done | failed
+  priority INTEGER NOT NULL DEFAULT 0,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  max_attempts INTEGER NOT NULL DEFAULT 3,
+  not_before REAL NOT NULL DEFAULT 0,
+  worker TEXT, lease_until REAL, heartbeat REAL,
+  created REAL NOT NULL, started REAL, finished REAL,
+  result TEXT, error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, priority, id);
+"""
+
+def validate(spec):
+    """Raises ValueError for a spec no worker could run."""
+    kind = spec.get("kind")
+    if kind not in SPEC_KEYS: raise ValueError(f"unknown kind {kind!r}; expected one of {sorted(SPEC_KEYS)}")
+    if not any(k in spec for k in SPEC_KEYS[kind]):
+        raise ValueError(f"{kind} job needs one of {', '.join(SPEC_KEYS[kind])}")
+    if not isinstance(spec.get("assets", []), list): raise ValueError("assets must be a list of paths")
+
+def spec_key(spec):
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, ensure_ascii=False).encode()).hexdigest()[:16]
+
+def inputs(spec):
+    """Files the job reads: its json, music and listed assets."""
+    return [p for p in [spec.get("json"), spec.get("music")] + list(spec.get("assets", [])) if p]
+
+def day_specs(json_path, music="assets/soft_loop.mp3"):
+    """A card job per question and the Short for one trivia day."""
+    data = json.load(open(json_path, "r", encoding="utf-8"))
+    specs = [{"kind":"card", "json":str(json_path), "index":i} for i in range(1, len(data["questions"]) + 1)]
+    return specs + [{"kind":"short", "json":str(json_path), "index":1, "music":music}]
+
+class JobQueue:
+    def __init__(self, path=DB, lease=LEASE, clock=time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease, self.clock = lease, clock
+        # the default rollback journal: WAL needs shared memory, which network filesystems don't give
+        self.db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.lock = threading.Lock()  # the heartbeat thread shares the connection
+        self.db.executescript(SCHEMA)
+
+    def _tx(self, fn):
+        """Runs fn(cursor) in one write transaction (BEGIN IMMEDIATE takes the write lock up front)."""
+        with self.lock:
+            cur = self.db.cursor()
+            cur.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(cur)
+                cur.execute("COMMIT")
+                return out
+            except BaseException:
+                cur.execute("ROLLBACK"); raise
+
+    def add(self, spec, priority=0, max_attempts=ATTEMPTS):
+        """(job id, created?) for spec; an identical spec already queued or finished is returned as is."""
+        validate(spec)
+        key = spec_key(spec)
+        def fn(cur):
+            row = cur.execute("SELECT id FROM jobs WHERE key=?", (key,)).fetchone()
+            if row: return row["id"], False
+            cur.execute("INSERT INTO jobs (key, kind, spec, priority, max_attempts, created) VALUES (?,?,?,?,?,?)",
+                        (key, spec["kind"], json.dumps(spec, ensure_ascii=False), priority, max_attempts, self.clock()))
+            return cur.lastrowid, True
+        return self._tx(fn)
+
+    def claim(self, worker):
+        """Leases the next runnable job to worker; returns its row as a dict, or None."""
+        def fn(cur):
+            now = self.clock()
+            # leases that ran out on their last attempt won't be retried
+            cur.execute("""UPDATE jobs SET status='failed', finished=?, error='lease expired'
+                           WHERE status='running' AND lease_until<? AND attempts>=max_attempts""", (now, now))
+            row = cur.execute("""SELECT * FROM jobs
+                                 WHERE ((status='queued' AND not_before<=?) OR (status='running' AND lease_until<?))
+                                 ORDER BY priority DESC, id LIMIT 1""", (now, now)).fetchone()
+            if row is None: return None
+            cur.execute("""UPDATE jobs SET status='running', worker=?, lease_until=?, heartbeat=?, started=?,
+                           attempts=attempts+1 WHERE id=?""", (worker, now + self.lease, now, now, row["id"]))
+            return {**dict(row), "worker":worker, "attempts":row["attempts"] + 1}
+        return self._tx(fn)
+
+    def heartbeat(self, job_id, worker):
+        """Extends the lease; False once the job is no longer this worker's."""
+        def fn(cur):
+            now = self.clock()
+            cur.execute("""UPDATE jobs SET lease_until=?, heartbeat=? WHERE id=? AND worker=? AND status='running'""",
+                        (now + self.lease, now, job_id, worker))
+            return cur.rowcount == 1
+        return self._tx(fn)
+
+    def complete(self, job_id, worker, result):
+        def fn(cur):
+            cur.execute("""UPDATE jobs SET status='done', finished=?, result=?, error=NULL, lease_until=NULL
+                           WHERE id=? AND worker=? AND status='running'""",
+                        (self.clock(), json.dumps(result), job_id, worker))
+            return cur.rowcount == 1
+        return self._tx(fn)
+
+    def fail(self, job_id, worker, error):
+        """Back to the queue after a backoff, or failed for good on the last attempt."""
+        def fn(cur):
+            row = cur.execute("SELECT attempts, max_attempts FROM jobs WHERE id=? AND worker=? AND status='running'",
+                              (job_id, worker)).fetchone()
+            if row is None: return False
+            now = self.clock()
+            if row["attempts"] >= row["max_attempts"]:
+                cur.execute("UPDATE jobs SET status='failed', finished=?, error=?, lease_until=NULL WHERE id=?",
+                            (now, error, job_id))
+            else:
+                cur.execute("""UPDATE jobs SET status='queued', not_before=?, error=?, worker=NULL, lease_until=NULL
+                               WHERE id=?""", (now + BACKOFF * 2 ** (row["attempts"] - 1), error, job_id))
+            return True
+        return self._tx(fn)
+
+    def requeue(self, statuses=("failed",)):
+        """Failed (or other) jobs back to queued with fresh attempts; returns how many."""
+        marks = ",".join("?" * len(statuses))
+        return self._tx(lambda cur: cur.execute(
+            f"UPDATE jobs SET status='queued', attempts=0, not_before=0, worker=NULL WHERE status IN ({marks})",
+            tuple(statuses)).rowcount)
+
+    def purge(self, statuses=("done",)):
+        marks = ",".join("?" * len(statuses))
+        return self._tx(lambda cur: cur.execute(f"DELETE FROM jobs WHERE status IN ({marks})", tuple(statuses)).rowcount)
+
+    def counts(self):
+        with self.lock:
+            rows = self.db.execute("SELECT status, count(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {r["status"]: r["n"] for r in rows}
+
+    def jobs(self):
+        with self.lock:
+            return [dict(r) for r in self.db.execute("SELECT * FROM jobs ORDER BY id").fetchall()]
+
+    def pending(self):
+        """Jobs a worker could still pick up (queued, waiting out a backoff, or running)."""
+        c = self.counts()
+        return c.get("queued", 0) + c.get("running", 0)
+
+    def close(self):
+        self.db.close()
+
+# --- worker -----------------------------------------------------------------
+
+class _Heartbeat(threading.Thread):
+    """Renews the lease every third of it while the job runs; notes when it was lost."""
+    def __init__(self, q, job_id, worker):
+        super().__init__(daemon=True)
+        self.q, self.job_id, self.worker = q, job_id, worker
+        self.stop, self.lost = threading.Event(), False
+
+    def run(self):
+        while not self.stop.wait(self.q.lease / 3):
+            try:
+                if not self.q.heartbeat(self.job_id, self.worker): self.lost = True; return
+            except sqlite3.OperationalError as e:  # locked past the timeout; the next beat may get through
+                print(f"  heartbeat #{self.job_id}: {e}", flush=True)
+
+def run_spec(spec):
+    """Renders one spec in this process; returns the output path."""
+    from render_daemon import KINDS
+    missing = [p for p in inputs(spec) if not os.path.exists(p)]
+    if missing: raise FileNotFoundError(f"missing inputs: {', '.join(missing)}")
+    return str(KINDS[spec["kind"]](spec))
+
+def default_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def work(q, name=None, exit_when_empty=False, max_jobs=None, poll=POLL, warm=True):
+    """Claims and runs jobs until told to stop; returns {"done":n, "failed":n, "lost":n}."""
+    name = name or default_name()
+    if warm:
+        from render_daemon import install_caches
+        install_caches()  # fonts, gradients, logos stay loaded between this worker's jobs
+    counts = {"done":0, "failed":0, "lost":0}
+    while max_jobs is None or sum(counts.values()) < max_jobs:
+        job = q.claim(name)
+        if job is None:
+            if exit_when_empty and not q.pending(): break
+            time.sleep(poll); continue
+        spec = json.loads(job["spec"])
+        beat = _Heartbeat(q, job["id"], name); beat.start()
+        t0 = time.perf_counter()
+        try:
+            with span(f"queue.{job['kind']}", id=job["id"], attempt=job["attempts"], worker=name):
+                out = run_spec(spec)
+            ok, err = True, None
+        except Exception as e:
+            ok, err = False, f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+        finally:
+            beat.stop.set(); beat.join()
+        secs = time.perf_counter() - t0
+        kept = q.complete(job["id"], name, {"out":out, "seconds":round(secs, 3)}) if ok else q.fail(job["id"], name, err)
+        status = "lost" if not kept else ("done" if ok else "failed")
+        counts[status] += 1
+        print(f"[{status}] #{job['id']} {job['kind']} attempt {job['attempts']}/{job['max_attempts']} "
+              f"{secs:.1f}s " + (out if ok else err), flush=True)
+    return counts
+
+def local(n, db=DB, extra=()):
+    """n worker processes on this machine until the queue is drained; returns the exit codes."""
+    procs = [subprocess.Popen([sys.executable, __file__, "worker", "--db", str(db), "--exit-when-empty",
+                               "--name", f"{socket.gethostname()}:local-{i}", *extra]) for i in range(n)]
+    return [p.wait() for p in procs]
+
+def _print_status(q):
+    for j in q.jobs():
+        spec = json.loads(j["spec"])
+        where = spec.get("json") or "(inline question)"
+        if j["status"] == "done": extra = json.loads(j["result"] or "{}").get("out", "")
+        elif j["status"] == "running": extra = j["worker"]
+        else: extra = (j["error"] or "")[:80]
+        print(f"#{j['id']:<5d} {j['status']:8s} {j['kind']:10s} {j['attempts']}/{j['max_attempts']} {where} {extra}")
+    print(", ".join(f"{n} {s}" for s, n in sorted(q.counts().items())) or "empty")
+
+def main(argv):
+    cmds = ("add", "day", "worker", "local", "status", "requeue", "purge")
+    if not argv or argv[0] not in cmds:
+        print(__doc__.strip(), file=sys.stderr); return 1
+    opt = lambda k, d=None: argv[argv.index(k)+1] if k in argv else d
+    cmd = argv[0]
+    if cmd == "local":
+        db = opt("--db", DB); lease = opt("--lease")
+        JobQueue(db).close()  # create the schema before the workers race for it
+        codes = local(int(argv[1]), db, ("--lease", lease) if lease else ())
+        q = JobQueue(db); _print_status(q)
+        return 3 if any(codes) or q.counts().get("failed") else 0
+    q = JobQueue(opt("--db", DB), float(opt("--lease", LEASE)))
+    if cmd in ("add", "day"):
+        if cmd == "day": specs = day_specs(argv[1])
+        elif opt("--file"):
+            src = sys.stdin if opt("--file") == "-" else open(opt("--file"), "r", encoding="utf-8")
+            specs = [json.loads(line) for line in src if line.strip()]
+        else: specs = [json.loads(argv[1])]
+        for spec in specs:
+            try: jid, new = q.add(spec, int(opt("--priority", 0)), int(opt("--attempts", ATTEMPTS)))
+            except ValueError as e: print(f"rejected {json.dumps(spec)}: {e}", file=sys.stderr); return 2
+            print(f"#{jid} {'queued' if new else 'exists'} {spec['kind']} {spec.get('json', '')}")
+        return 0
+    if cmd == "worker":
+        max_jobs = opt("--max-jobs")
+        counts = work(q, opt("--name"), "--exit-when-empty" in argv, int(max_jobs) if max_jobs else None,
+                      warm="--no-warm" not in argv)
+        print(f"Worker: {counts['done']} done, {counts['failed']} failed, {counts['lost']} lost lease")
+        return 0
+    if cmd == "requeue":
+        print("Requeued", q.requeue(("failed", "done") if "--all" in argv else ("failed",))); return 0
+    if cmd == "purge":
+        print("Purged", q.purge(("done", "failed") if "--all" in argv else ("done",))); return 0
+    _print_status(q)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+layout_check.py
+Dry-run layout checks: every box comes from font metrics, nothing is
+rasterized or encoded.
+- Cards and the Short layout for every question in out/trivia_*.json
+- render_guess_team layout for every lineup JSON and every pool entry
+- Prints overflows (box past the allowed area) and collisions (boxes that
+  intersect); --json prints the structured reports instead
+Usage:
+  python layout_check.py                       # archive + data/pools
+  python layout_check.py out/trivia_2025-09-05.json data/lineup_soccer.json
+  python layout_check.py --json ...
+"""
+import sys, json, glob
+from pathlib import Path
+
+def _inter(a, b):
+    return not (a[2] <= b[0] or b[2] <= a[0] or a[3] <= b[1] or b[3] <= a[1])
+
+def check_boxes(boxes, bounds, source="", item=""):
+    """boxes: [(name, (x0,y0,x1,y1))]; bounds: allowed (x0,y0,x1,y1).
+    Boxes sharing a name prefix before ':' belong together and never collide."""
+    bx0, by0, bx1, by1 = bounds
+    overflows, collisions = [], []
+    for name, (x0, y0, x1, y1) in boxes:
+        over = {k:v for k,v in (("left", bx0-x0), ("top", by0-y0), ("right", x1-bx1), ("bottom", y1-by1)) if v > 0}
+        if over: overflows.append({"element":name, "box":[x0,y0,x1,y1], "by_px":over})
+    for i, (na, a) in enumerate(boxes):
+        for nb, b in boxes[i+1:]:
+            if na.split(":")[0] != nb.split(":")[0] and _inter(a, b):
+                collisions.append({"a":na, "b":nb, "box_a":list(a), "box_b":list(b)})
+    return {"source":source, "item":item, "ok":not (overflows or collisions),
+            "overflows":overflows, "collisions":collisions, "boxes":[[n, list(b)] for n,b in boxes]}
+
+def check_day(path):
+    from render_cards import render_cards
+    from render_short import layout_short
+    yield from render_cards(path, dry_run=True)
+    day = json.load(open(path, "r", encoding="utf-8"))
+    for i, q in enumerate(day.get("questions", []), start=1):
+        yield layout_short(q, i, source=str(path))
+
+def check_pool(path):
+    from render_guess_team import layout_guess_team
+    mode = Path(path).stem
+    for i, entry in enumerate(json.load(open(path, "r", encoding="utf-8"))):
+        data = dict(entry, mode=entry.get("mode", mode))
+        yield layout_guess_team(data, source=f"{path}#{i}")
+
+def check_paths(paths):
+    from render_guess_team import render_guess_team
+    for p in paths:
+        if Path(p).name.startswith("trivia_"): yield from check_day(p)
+        elif Path(p).parent.name == "pools": yield from check_pool(p)
+        else: yield render_guess_team(p, dry_run=True)
+
+def main(argv):
+    as_json = "--json" in argv
+    paths = [a for a in argv if a != "--json"]
+    paths = paths or sorted(glob.glob("out/trivia_*.json")) + sorted(glob.glob("data/pools/*.json"))
+    n = bad = 0
+    for rep in check_paths(paths):
+        n += 1; bad += not rep["ok"]
+        if as_json:
+            print(json.dumps({k:v for k,v in rep.items() if k != "boxes"}, ensure_ascii=False)); continue
+        for o in rep["overflows"]:
+            print(f'overflow  {rep["source"]} {rep["item"]} {o["element"]} {o["by_px"]}')
+        for c in rep["collisions"]:
+            print(f'collision {rep["source"]} {rep["item"]} {c["a"]} x {c["b"]}')
+    if not as_json:
+        print(f"Checked {n} layout(s): {bad} with problems")
+    return 1 if bad else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
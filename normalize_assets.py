@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+normalize_assets.py
+Normalization stage for downloaded college logos and flags.
+- NumPy alpha trimming (transparent margins are cropped before scaling, so
+  the logo itself fills the badge box)
+- The rounded card's alpha mask is built once per (card size, radius)
+- thumb_width() is the Commons thumbnail width actually needed for a box,
+  instead of always decoding a 512px render
+- Offline: re-normalizes every file already in assets/college_logos and
+  assets/flags in parallel, unframing the existing card first
+Usage:
+  python normalize_assets.py [--workers N] [--dry-run] [assets/college_logos assets/flags]
+Requires: pillow, numpy
+"""
+import os, sys
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageDraw
+
+PAD, RADIUS = 9, 14
+CARD = (255, 255, 255, 235)  # the rounded mask then replaces the alpha, so saved cards are opaque white
+WHITE = (255, 255, 255, 255)
+MAX_WH = {"college_logos": 110, "flags": 130}
+THUMB_SCALE = 2  # download at twice the badge size, then LANCZOS down
+
+def thumb_width(max_wh):
+    return int(max_wh * THUMB_SCALE)
+
+def trim_alpha(img, threshold=8):
+    """Crops fully (or nearly) transparent margins."""
+    a = np.asarray(img.getchannel("A")) > threshold
+    rows, cols = np.flatnonzero(a.any(1)), np.flatnonzero(a.any(0))
+    if not len(rows): return img
+    box = (int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1)
+    return img if box == (0, 0) + img.size else img.crop(box)
+
+@lru_cache(maxsize=64)
+def card_mask(size, radius=RADIUS):
+    corner = Image.new('L', (radius, radius), 0)
+    ImageDraw.Draw(corner).pieslice((0, 0, radius*2, radius*2), 180, 270, fill=255)
+    alpha = Image.new('L', size, 255)
+    alpha.paste(corner, (0,0))
+    alpha.paste(corner.rotate(90), (0, size[1]-radius))
+    alpha.paste(corner.rotate(180), (size[0]-radius, size[1]-radius))
+    alpha.paste(corner.rotate(270), (size[0]-radius, 0))
+    return alpha
+
+def frameify(img, pad=PAD, radius=RADIUS):
+    w,h = img.size
+    card = Image.new("RGBA", (w+pad*2, h+pad*2), CARD)
+    card.putalpha(card_mask(card.size, radius))
+    card.paste(img, (pad,pad), img)
+    return card
+
+def is_framed(img, pad=PAD):
+    w, h = img.size
+    return (w > 2*pad and h > 2*pad and img.getpixel((0, 0))[3] == 0
+            and img.getpixel((pad//2, h//2)) == WHITE and img.getpixel((w//2, pad//2)) == WHITE)
+
+def unframe(img, pad=PAD):
+    """Inverse of frameify for files saved before: crop the card and clear the white
+    that is connected to its edge (white inside the logo stays)."""
+    w, h = img.size
+    inner = img.crop((pad, pad, w-pad, h-pad))
+    canvas = Image.new("RGBA", (inner.width + 2, inner.height + 2), WHITE)
+    canvas.paste(inner, (1, 1))
+    ImageDraw.floodfill(canvas, (0, 0), (0, 0, 0, 0), thresh=0)
+    return canvas.crop((1, 1, inner.width + 1, inner.height + 1))
+
+def normalize_logo(img, max_wh=110, trim=True):
+    img = img.convert("RGBA")
+    if trim: img = trim_alpha(img)
+    w,h=img.size
+    r = min(max_wh/w, max_wh/h, 1.0)
+    if r < 1.0: img = img.resize((max(1, int(w*r)), max(1, int(h*r))), Image.LANCZOS)
+    return frameify(img)
+
+def renormalize_file(path, max_wh, dry_run=False):
+    """Re-normalizes one saved asset in place; returns (path, old size, new size).
+    A framed file is only rewritten when trimming or scaling changes its size: unframing
+    can't recover the soft edge alpha exactly, so rewriting it unchanged would drift."""
+    img = Image.open(path).convert("RGBA")
+    framed = is_framed(img)
+    out = normalize_logo(unframe(img) if framed else img, max_wh)
+    if not dry_run and not (framed and out.size == img.size):
+        out.save(path, "PNG")
+    return str(path), img.size, out.size
+
+def renormalize(dirs, workers=None, dry_run=False):
+    jobs = []
+    for d in dirs:
+        d = Path(d)
+        jobs += [(p, MAX_WH.get(d.name, 110)) for p in sorted(d.glob("*.png")) if p.stat().st_size > 0]
+    if not jobs: return []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as ex:
+        futs = [ex.submit(renormalize_file, p, m, dry_run) for p, m in jobs]
+        return [f.result() for f in futs]
+
+def main(argv):
+    workers, dirs, dry = None, [], "--dry-run" in argv
+    it = iter(argv)
+    for a in it:
+        if a == "--workers": workers = int(next(it))
+        elif not a.startswith("--"): dirs.append(a)
+    results = renormalize(dirs or ["assets/college_logos", "assets/flags"], workers, dry)
+    changed = [r for r in results if r[1] != r[2]]
+    for p, old, new in changed: print(f"{p}: {old[0]}x{old[1]} -> {new[0]}x{new[1]}")
+    print(f"{'Checked' if dry else 'Normalized'} {len(results)} file(s); {len(changed)} changed size")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+pipeline.py
+Runs the daily guess-team job in one process:
+  select -> fetch assets -> render -> upload
+Each stage is a thread joined to the next by a bounded queue, so fetching
+the next sport's logos overlaps rendering the current one, and rendering
+overlaps uploads. Imports (PIL, NumPy, moviepy, google-auth) are paid once.
+A failed item is reported and dropped; the other sports keep going.
+Usage:
+  python pipeline.py [--no-fetch] [--no-upload] [--stagger 180-420] [--date YYYY-MM-DD]
+"""
+import sys, time, queue, random, datetime, threading, traceback
+from tracing import span
+from records import load_selector
+
+DONE = object()
+
+class Pipeline:
+    def __init__(self, fetch=True, upload=True, stagger=(180, 420), depth=1):
+        self.fetch, self.upload, self.stagger = fetch, upload, stagger
+        self.depth = depth
+        self.failures = []
+        self.results = {}
+        self.lock = threading.Lock()
+
+    def _fail(self, stage, item, e):
+        with self.lock: self.failures.append((stage, str(item), repr(e)))
+        print(f"[fail] {stage} {item}: {e}", file=sys.stderr, flush=True)
+        traceback.print_exc()
+
+    def _stage(self, name, fn, inbox, outbox):
+        def loop():
+            while True:
+                item = inbox.get()
+                if item is DONE: break
+                t0 = time.perf_counter()
+                try:
+                    with span(f"stage.{name}", item=item):
+                        out = fn(item)
+                except Exception as e:
+                    self._fail(name, item, e); continue
+                print(f"[{name}] {item} ({time.perf_counter()-t0:.1f}s)", flush=True)
+                if outbox is not None: outbox.put(out)
+            if outbox is not None: outbox.put(DONE)
+        t = threading.Thread(target=loop, name=name, daemon=True); t.start()
+        return t
+
+    def _fetch(self, json_path):
+        import fetch_assets_v4_2 as fa
+        cols, flgs = fa.extract_targets([json_path])
+        for c in cols: fa.fetch_logo(c)
+        for f in flgs: fa.fetch_flag(f)
+        return json_path
+
+    def _render(self, json_path):
+        from render_guess_team import render_guess_team
+        render_guess_team(str(json_path))
+        return json_path
+
+    def _uploader(self):
+        """Upload stage. The authorized session is made on the first upload, not
+        at startup, so a run without a token still selects, fetches and renders;
+        its uploads are skipped with a note instead."""
+        import upload_batch as ub
+        from upload_queue import UploadQueue
+        from upload_youtube import TOKEN_ENV, has_credentials, get_authorized_session, upload
+        state = {"queue":None, "first":True}
+        def do_upload(json_path):
+            import json
+            if not has_credentials():
+                print(f"[upload] skipped {json_path}: {TOKEN_ENV} not set", flush=True)
+                with self.lock: self.results[str(json_path)] = None
+                return json_path
+            if state["queue"] is None:
+                state["queue"] = UploadQueue(session=get_authorized_session())
+            if not state["first"] and self.stagger and self.stagger[1] > 0:
+                s = random.randint(*self.stagger)
+                print(f"Sleeping {s} seconds before next upload…", flush=True); time.sleep(s)
+            state["first"] = False
+            with open(json_path, "r", encoding="utf-8") as f: d = json.load(f)
+            vid = upload(ub.mp4_for(json_path), ub.title_for(d), ub.description_for(d), ub.TAGS,
+                         queue=state["queue"], chunksize=None, exit_on_error=False)
+            with self.lock: self.results[str(json_path)] = vid
+            return json_path
+        return do_upload
+
+    def run(self, date=None):
+        if self.fetch:
+            import fetch_assets_v4_2 as fa
+            fa.load_aliases()
+        paths = load_selector().select_lineups(date)
+        q_fetch, q_render, q_upload = (queue.Queue(maxsize=self.depth) for _ in range(3))
+        threads = []
+        if self.fetch:
+            threads.append(self._stage("fetch", self._fetch, q_fetch, q_render))
+        else:
+            q_render = q_fetch
+        threads.append(self._stage("render", self._render, q_render, q_upload if self.upload else None))
+        if self.upload:
+            threads.append(self._stage("upload", self._uploader(), q_upload, None))
+        for p in paths: q_fetch.put(p)
+        q_fetch.put(DONE)
+        for t in threads: t.join()
+        return not self.failures
+
+def main(argv):
+    opts = {"fetch": "--no-fetch" not in argv, "upload": "--no-upload" not in argv}
+    date = None
+    for i, a in enumerate(argv):
+        if a == "--stagger":
+            lo, _, hi = argv[i+1].partition("-"); opts["stagger"] = (int(lo), int(hi or lo))
+        elif a == "--date":
+            date = datetime.date.fromisoformat(argv[i+1])
+    t0 = time.perf_counter()
+    p = Pipeline(**opts)
+    ok = p.run(date)
+    print(f"Pipeline done in {time.perf_counter()-t0:.1f}s; {len(p.failures)} failure(s)")
+    for stage, item, err in p.failures: print(f"  {stage}: {item}: {err}")
+    return 0 if ok else 3
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
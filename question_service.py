@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+question_service.py
+On-demand trivia questions over HTTP, for stream overlays and the chat bot.
+- The team CSVs are read once; per-league views, the validator index and the
+  type -> QUESTION_BANK function map are built at startup, so a request only
+  draws (and validates) one question in memory
+- asyncio server on 127.0.0.1, HTTP/1.1 keep-alive, JSON responses
+    GET /question?type=fix_mismatch&league=NBA&seed=42&client=bot-7&dedup=50
+        type, league: optional filters (league = a question about that league)
+        seed: same seed + type + league -> same question (otherwise random)
+        client + dedup: don't repeat any of this client's last <dedup> questions
+    GET /types        question types and leagues
+    GET /stats        per-route latency histogram (ms buckets), p50/p90/p99/max
+    GET /health
+Usage:
+  python question_service.py [--port 8766]
+  python question_service.py bench [--requests 5000] [--concurrency 8]
+  curl -s 'localhost:8766/question?league=NFL&client=overlay&dedup=20'
+"""
+import sys, json, time, random, asyncio, bisect
+from urllib.parse import urlsplit, parse_qs
+from collections import OrderedDict, deque, defaultdict
+import generator
+from validate_questions import TeamIndex, check_question
+
+PORT = 8766
+MAX_DEDUP = 1000       # per-client window cap
+MAX_CLIENTS = 10000    # dedup windows kept (least recently seen dropped)
+TRIES = 50             # draws per request before giving up on filters / dedup / validation
+BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000)
+KEEP_LATENCIES = 10000
+
+class BadRequest(ValueError):
+    pass
+
+def _leagues_of(q):
+    m = q.get("meta") or {}
+    return [m["league"]] if m.get("league") else list(m.get("leagues") or [])
+
+class QuestionIndex:
+    """Team data and everything derived from it, built once."""
+    def __init__(self, leagues=None):
+        self.leagues = leagues or generator.load_teams()[0]
+        self.index = TeamIndex(self.leagues)
+        self.views = {L: {L: teams} for L, teams in self.leagues.items()}  # draws confined to one league
+        # names as the questions report them, so the map follows QUESTION_BANK
+        self.types = {fn(self.leagues, random.Random(0))["type"]: fn for fn in generator.QUESTION_BANK}
+        self.cross = {t for t, fn in self.types.items()
+                      if len(_leagues_of(fn(self.leagues, random.Random(0)))) > 1}  # need several leagues
+        self.names = sorted(self.types)
+
+    def draw(self, rng, qtype=None, league=None, reject=None):
+        """One validated question; reject(q) -> True asks for another draw."""
+        if qtype is not None and qtype not in self.types:
+            raise BadRequest(f"unknown type {qtype!r}; expected one of {sorted(self.types)}")
+        if league is not None and league not in self.leagues:
+            raise BadRequest(f"unknown league {league!r}; expected one of {sorted(self.leagues)}")
+        q = None
+        for _ in range(TRIES):
+            t = qtype or rng.choice(self.names)
+            if league is not None and t in self.cross:
+                q = self.types[t](self.leagues, rng)
+                if league not in _leagues_of(q): continue
+            else:
+                q = self.types[t](self.views[league] if league else self.leagues, rng)
+            if any(level == "error" for level, _ in check_question(q, self.index)): continue
+            if reject and reject(q): continue
+            return q
+        raise BadRequest("no question matches (filters too narrow or dedup window exhausted)")
+
+class Histogram:
+    def __init__(self, bounds=BUCKETS_MS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.recent = deque(maxlen=KEEP_LATENCIES)
+        self.n, self.total, self.max = 0, 0.0, 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.recent.append(ms)
+        self.n += 1; self.total += ms; self.max = max(self.max, ms)
+
+    def view(self):
+        s = sorted(self.recent)
+        pct = lambda p: round(s[min(len(s) - 1, int(len(s) * p))], 3) if s else None
+        edges = [f"<={b}" for b in self.bounds] + [f">{self.bounds[-1]}"]
+        return {"n":self.n, "mean_ms":round(self.total / self.n, 3) if self.n else None, "max_ms":round(self.max, 3),
+                "p50_ms":pct(0.5), "p90_ms":pct(0.9), "p99_ms":pct(0.99),
+                "buckets_ms":{e: c for e, c in zip(edges, self.counts) if c}}
+
+class QuestionService:
+    def __init__(self, index=None):
+        t0 = time.perf_counter()
+        self.index = index or QuestionIndex()
+        self.load_s = time.perf_counter() - t0
+        self.rng = random.Random()
+        self.seen = OrderedDict()  # client -> (deque of recent keys, set of the same keys)
+        self.latency = defaultdict(Histogram)
+        self.status = defaultdict(int)
+        self.started = time.time()
+
+    def _window(self, client, size):
+        w = self.seen.get(client)
+        if w is None or w[0].maxlen != size:  # new client, or it asked for a different window
+            recent = deque(w[0] if w else (), maxlen=size)
+            w = self.seen[client] = (recent, set(recent))
+        self.seen.move_to_end(client)
+        while len(self.seen) > MAX_CLIENTS: self.seen.popitem(last=False)
+        return w
+
+    def question(self, params, peer=None):
+        """params: query dict (single values); returns the question dict."""
+        seed = params.get("seed")
+        try:
+            rng = random.Random(int(seed)) if seed is not None else self.rng
+            size = min(MAX_DEDUP, max(0, int(params.get("dedup", 0))))
+        except ValueError:
+            raise BadRequest("seed and dedup must be integers")
+        client = params.get("client") or peer
+        if not (size and client):
+            q = self.index.draw(rng, params.get("type"), params.get("league"))
+        else:
+            recent, keys = self._window(client, size)
+            q = self.index.draw(rng, params.get("type"), params.get("league"),
+                                reject=lambda q: (q["question"], q["answer"]) in keys)
+            if len(recent) == recent.maxlen: keys.discard(recent[0])
+            recent.append((q["question"], q["answer"])); keys.add(recent[-1])
+        return {**q, "seed":int(seed)} if seed is not None else q
+
+    def route(self, method, target, peer=None):
+        """(status, body dict) for one request."""
+        url = urlsplit(target)
+        if method != "GET": return 405, {"error":"GET only"}
+        if url.path == "/question":
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            try: return 200, self.question(params, peer)
+            except BadRequest as e: return 400, {"error":str(e)}
+        if url.path == "/types":
+            return 200, {"types":sorted(self.index.types), "leagues":sorted(self.index.leagues)}
+        if url.path == "/stats":
+            return 200, {"uptime_s":round(time.time() - self.started, 1), "load_s":round(self.load_s, 3),
+                         "clients":len(self.seen), "status":dict(self.status),
+                         "latency":{r: h.view() for r, h in self.latency.items()}}
+        if url.path == "/health": return 200, {"ok":True}
+        return 404, {"error":"not found"}
+
+    async def handle(self, reader, writer):
+        peer = (writer.get_extra_info("peername") or ("?",))[0]
+        try:
+            while True:
+                line = await reader.readline()
+                if not line: break
+                t0 = time.perf_counter()
+                try: method, target, version = line.decode("latin-1").split()
+                except ValueError: break
+                headers = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""): break
+                    k, _, v = h.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                if int(headers.get("content-length") or 0):
+                    await reader.readexactly(int(headers["content-length"]))
+                code, obj = self.route(method, target, headers.get("x-client-id") or peer)
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                body = json.dumps(obj, ensure_ascii=False).encode()
+                writer.write(f"HTTP/1.1 {code} {'OK' if code == 200 else 'Error'}\r\n"
+                             f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                             f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode() + body)
+                self.status[code] += 1
+                self.latency[urlsplit(target).path if code != 404 else "other"].add((time.perf_counter() - t0) * 1000)
+                await writer.drain()
+                if close: break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def serve(port=PORT, service=None):
+    service = service or QuestionService()
+    srv = await asyncio.start_server(service.handle, "127.0.0.1", port)
+    print(f"Question service on http://127.0.0.1:{srv.sockets[0].getsockname()[1]} "
+          f"({len(service.index.types)} types, loaded in {service.load_s*1000:.0f} ms)", flush=True)
+    async with srv: await srv.serve_forever()
+
+# --- load test ---------------------------------------------------------------
+
+async def _client(port, n, lat, rng, leagues, types):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    name = f"bench-{id(writer)}"
+    for _ in range(n):
+        q = {"client":name, "dedup":"20"}
+        if rng.random() < 0.5: q["league"] = rng.choice(leagues)
+        if rng.random() < 0.5: q["type"] = rng.choice(types)
+        if rng.random() < 0.2: q["seed"] = str(rng.randrange(1 << 30))
+        target = "/question?" + "&".join(f"{k}={v}" for k, v in q.items())
+        t0 = time.perf_counter()
+        writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+        await writer.drain()
+        length = 0
+        while True:
+            h = await reader.readline()
+            if h in (b"\r\n", b""): break
+            if h.lower().startswith(b"content-length:"): length = int(h.split(b":")[1])
+        await reader.readexactly(length)
+        lat.append((time.perf_counter() - t0) * 1000)
+    writer.close()
+
+async def bench(requests=5000, concurrency=8):
+    """Round-trip latencies (ms) from concurrency keep-alive clients, plus the server's own /stats."""
+    service = QuestionService()
+    srv = await asyncio.start_server(service.handle, "127.0.0.1", 0)
+    port = srv.sockets[0].getsockname()[1]
+    lat, rng = [], random.Random(1234)
+    leagues, types = sorted(service.index.leagues), sorted(service.index.types)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(_client(port, requests // concurrency, lat, rng, leagues, types) for _ in range(concurrency)))
+    wall = time.perf_counter() - t0
+    srv.close(); await srv.wait_closed()
+    return lat, wall, service.route("GET", "/stats")[1]
+
+def main(argv):
+    opt = lambda k, d: argv[argv.index(k)+1] if k in argv else d
+    if argv and argv[0] == "bench":
+        lat, wall, stats = asyncio.run(bench(int(opt("--requests", 5000)), int(opt("--concurrency", 8))))
+        s = sorted(lat)
+        print(f"{len(s)} requests in {wall:.2f}s ({len(s)/wall:.0f}/s); round trip "
+              f"p50 {s[len(s)//2]:.2f} ms, p99 {s[int(len(s)*0.99)]:.2f} ms, max {s[-1]:.2f} ms")
+        print(json.dumps(stats["latency"], indent=2))
+        return 0
+    try: asyncio.run(serve(int(opt("--port", PORT))))
+    except KeyboardInterrupt: pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+records.py
+Typed, slotted records for what moves through the pipeline, and the loader /
+serializer for them.
+- Team (a CSV row), Question, Player, Lineup (single or two-team) and Day
+- Derived values the renderers kept recomputing are filled in once on load:
+  Question.league (meta league, else first of meta leagues, else "DEFAULT"),
+  Player.code (upper-cased position), Lineup.sport (lower-cased mode), Team.label
+- from_dict validates the shape and raises RecordError naming the file and
+  field; keys a record doesn't model are kept in .extra, so to_dict returns what
+  was loaded and existing JSON loads unchanged
+- as_question / as_lineup / as_player accept a record or the plain dict, so
+  callers that still pass dicts (render daemon, job specs) keep working
+- JSON goes through orjson when it is installed, the json module otherwise
+- load_selector: the pool rotation in data/daily_agent.py, for the pipeline,
+  backfill and the asset prefetch
+Usage:
+  python records.py check [files...]   # load + round-trip every day, lineup and pool file; memory and timing
+"""
+import sys, csv, json, time, glob
+from pathlib import Path
+from dataclasses import dataclass, field
+from collections import defaultdict
+try:
+    import orjson
+except ImportError:  # optional; the json module does the same, slower
+    orjson = None
+
+DATA_DIR = Path(__file__).parent / "data"
+TEAM_FILES = ("nfl.csv", "nba.csv", "mlb.csv")
+
+class RecordError(ValueError):
+    pass
+
+def loads(data):
+    return orjson.loads(data) if orjson else json.loads(data)
+
+def dumps(obj, indent=True):
+    """UTF-8 JSON bytes (non-ASCII kept as is), indented two spaces like the files in out/."""
+    if orjson: return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if indent else None).encode("utf-8")
+
+def load_json(path):
+    with open(path, "rb") as f: return loads(f.read())
+
+def save_json(obj, path):
+    Path(path).write_bytes(dumps(obj))
+
+def _need(d, key, types, where):
+    v = d.get(key)
+    if not isinstance(v, types):
+        raise RecordError(f"{where}.{key}: expected {getattr(types, '__name__', types)}, got {type(v).__name__}")
+    return v
+
+def _extra(d, known):
+    """Keys the record doesn't model, or None (most records have none; no empty dict each)."""
+    return {k: v for k, v in d.items() if k not in known} or None
+
+_intern = lambda v: sys.intern(v) if isinstance(v, str) else v  # positions, colleges, leagues repeat a lot
+
+# --- teams ------------------------------------------------------------------
+
+@dataclass(slots=True)
+class Team:
+    league: str
+    division: str
+    city: str
+    team: str
+    label: str = field(init=False, repr=False, compare=False)  # "City Team", as options print it
+
+    def __post_init__(self):
+        self.label = f"{self.city} {self.team}"
+
+    def to_dict(self):
+        return {"league":self.league, "division":self.division, "city":self.city, "team":self.team}
+
+def read_teams(files=TEAM_FILES, data_dir=DATA_DIR):
+    """{league: [Team]} in CSV order."""
+    leagues = defaultdict(list)
+    for fname in files:
+        with open(Path(data_dir) / fname, newline="", encoding="utf-8") as f:
+            for i, r in enumerate(csv.DictReader(f), start=2):
+                try: leagues[r["league"]].append(Team(*(sys.intern(r[k]) for k in ("league", "division", "city", "team"))))
+                except KeyError as e: raise RecordError(f"{fname}:{i}: missing column {e}")
+    return leagues
+
+# --- questions --------------------------------------------------------------
+
+@dataclass(slots=True)
+class Question:
+    type: str
+    question: str
+    options: list
+    answer: str
+    meta: dict = field(default_factory=dict)   # per-type: league / leagues / division / team / city ...
+    extra: dict = None
+    league: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        m = self.meta
+        self.league = m.get("league") or (m.get("leagues") or [""])[0] or "DEFAULT"
+
+    KNOWN = ("type", "question", "options", "answer", "meta")
+
+    @classmethod
+    def from_dict(cls, d, where="question"):
+        if not isinstance(d, dict): raise RecordError(f"{where}: expected an object, got {type(d).__name__}")
+        opts = _need(d, "options", list, where)
+        if not all(isinstance(o, str) for o in opts): raise RecordError(f"{where}.options: expected strings")
+        return cls(_intern(d.get("type") or ""), _need(d, "question", str, where), opts, _need(d, "answer", str, where),
+                   d.get("meta") or {}, _extra(d, cls.KNOWN))
+
+    def to_dict(self):
+        return {"type":self.type, "question":self.question, "options":list(self.options),
+                "answer":self.answer, "meta":self.meta, **(self.extra or {})}
+
+@dataclass(slots=True)
+class Day:
+    date: str
+    questions: list
+    seed: object = None
+    extra: dict = None
+
+    @classmethod
+    def from_dict(cls, d, where="day"):
+        qs = _need(d, "questions", list, where)
+        return cls(d.get("date") or "", [Question.from_dict(q, f"{where}.questions[{i}]") for i, q in enumerate(qs)],
+                   d.get("seed"), _extra(d, ("date", "questions", "seed")))
+
+    def to_dict(self):
+        out = {"date":self.date}
+        if self.seed is not None: out["seed"] = self.seed
+        return {**out, "questions":[q.to_dict() for q in self.questions], **(self.extra or {})}
+
+# --- lineups ----------------------------------------------------------------
+
+@dataclass(slots=True)
+class Player:
+    pos: str = ""
+    college: str = None
+    flag: str = None
+    country: str = None
+    extra: dict = None
+    code: str = field(init=False, repr=False, compare=False)  # position code as templates key it
+
+    def __post_init__(self):
+        code = (self.pos or "").upper()
+        self.code = self.pos if code == self.pos else _intern(code)
+
+    KNOWN = ("pos", "college", "flag", "country")
+
+    @classmethod
+    def from_dict(cls, d, where="player"):
+        if not isinstance(d, dict): raise RecordError(f"{where}: expected an object, got {type(d).__name__}")
+        return cls(_intern(d.get("pos") or ""), _intern(d.get("college")), _intern(d.get("flag")),
+                   _intern(d.get("country")), _extra(d, cls.KNOWN))
+
+    def to_dict(self):
+        out = {"pos":self.pos}
+        for k in ("college", "flag", "country"):
+            v = getattr(self, k)
+            if v is not None: out[k] = v
+        return {**out, **(self.extra or {})}
+
+_LINEUP_KEYS = ("mode", "formation", "background", "title", "year", "handle", "answer", "accent", "music",
+                "reveal_on_screen", "reveal_seconds")
+
+@dataclass(slots=True)
+class Lineup:
+    mode: str = None
+    formation: str = None
+    background: str = None
+    title: str = None
+    year: object = None            # int in the pools, str in hand-written lineups
+    handle: str = None
+    answer: str = None
+    accent: list = None
+    music: str = None
+    reveal_on_screen: object = None
+    reveal_seconds: object = None
+    sides: list = field(default_factory=list)       # [[Player]]: one list, or one per team
+    side_extra: list = field(default_factory=list)  # other keys of each "teams" entry
+    two_sided: bool = False                         # loaded from "teams" rather than "players"
+    extra: dict = None
+    sport: str = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.sport = (self.mode or "basketball").lower()
+
+    @classmethod
+    def from_dict(cls, d, where="lineup"):
+        if not isinstance(d, dict): raise RecordError(f"{where}: expected an object, got {type(d).__name__}")
+        if d.get("teams"):
+            teams = _need(d, "teams", list, where)
+            sides = [[Player.from_dict(p, f"{where}.teams[{i}].players[{j}]")
+                      for j, p in enumerate(_need(t, "players", list, f"{where}.teams[{i}]"))] for i, t in enumerate(teams)]
+            side_extra, two = [_extra(t, ("players",)) or {} for t in teams], True
+        else:
+            players = d.get("players", [])
+            if not isinstance(players, list): raise RecordError(f"{where}.players: expected list")
+            sides, side_extra, two = [[Player.from_dict(p, f"{where}.players[{j}]") for j, p in enumerate(players)]], [{}], False
+        known = {k: d.get(k) for k in _LINEUP_KEYS}
+        return cls(**known, sides=sides, side_extra=side_extra, two_sided=two,
+                   extra=_extra(d, _LINEUP_KEYS + ("players", "teams")))
+
+    def to_dict(self):
+        out = {k: getattr(self, k) for k in _LINEUP_KEYS if getattr(self, k) is not None}
+        if self.two_sided:
+            out["teams"] = [{**x, "players":[p.to_dict() for p in side]} for side, x in zip(self.sides, self.side_extra)]
+        else:
+            out["players"] = [p.to_dict() for p in (self.sides[0] if self.sides else [])]
+        return {**out, **(self.extra or {})}
+
+# --- loading ----------------------------------------------------------------
+
+def as_question(q):
+    return q if isinstance(q, Question) else Question.from_dict(q)
+
+def as_lineup(d):
+    return d if isinstance(d, Lineup) else Lineup.from_dict(d)
+
+def as_player(p):
+    return p if isinstance(p, Player) else Player.from_dict(p)
+
+def load_day(path):
+    return Day.from_dict(load_json(path), str(path))
+
+def load_lineup(path):
+    return Lineup.from_dict(load_json(path), str(path))
+
+def load_pool(path):
+    data = load_json(path)
+    if not isinstance(data, list): raise RecordError(f"{path}: expected a list of lineups")
+    return [Lineup.from_dict(d, f"{path}[{i}]") for i, d in enumerate(data)]
+
+def load_selector():
+    """data/daily_agent.py as a module (it is a script, not a package module)."""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location("lineup_agent", DATA_DIR / "daily_agent.py")
+    mod = importlib.util.module_from_spec(spec); spec.loader.exec_module(mod)
+    return mod
+
+def _kind(path):
+    p = Path(path)
+    if p.parent.name == "pools": return load_pool
+    return load_day if p.name.startswith("trivia_") else load_lineup
+
+def _paths():
+    return sorted(glob.glob("out/trivia_*.json") + glob.glob("data/lineup_*.json") + glob.glob("data/pools/*.json")
+                  + glob.glob("data/out/**/*.json", recursive=True))
+
+def check(paths=None):
+    """Loads every file and checks to_dict() gives back what json.load does; returns (loaded, errors)."""
+    loaded, errors = [], []
+    for p in paths or _paths():
+        try:
+            recs = _kind(p)(p)
+            back = [r.to_dict() for r in recs] if isinstance(recs, list) else recs.to_dict()
+            if back != json.load(open(p, "r", encoding="utf-8")): errors.append((p, "to_dict() differs from the file"))
+            else: loaded.append(p)
+        except (RecordError, OSError, ValueError) as e:
+            errors.append((p, str(e)))
+    return loaded, errors
+
+def memory(paths, copies=1000):
+    """Traced MB holding copies x every file as dicts (json.load) and as records."""
+    import tracemalloc
+    blobs = [(Path(p).read_bytes(), p) for p in paths]
+    def held(load):
+        tracemalloc.start()
+        keep = [load(b, p) for _ in range(copies) for b, p in blobs]
+        mb = tracemalloc.get_traced_memory()[0] / 1e6
+        tracemalloc.stop(); del keep
+        return mb
+    def as_records(b, p):
+        d = loads(b)
+        if Path(p).parent.name == "pools": return [Lineup.from_dict(x) for x in d]
+        return Day.from_dict(d) if Path(p).name.startswith("trivia_") else Lineup.from_dict(d)
+    return held(lambda b, p: json.loads(b)), held(as_records)
+
+def main(argv):
+    if not argv or argv[0] != "check":
+        print(__doc__.strip(), file=sys.stderr); return 1
+    loaded, errors = check(argv[1:] or None)
+    for p, e in errors: print(f"ERROR {p}: {e}")
+    t0 = time.perf_counter()
+    for p in loaded: _kind(p)(p)
+    dt = time.perf_counter() - t0
+    print(f"{len(loaded)} file(s) round-trip, {len(errors)} error(s); all loaded in {dt*1000:.1f} ms "
+          f"({'orjson' if orjson else 'json'})")
+    if loaded:
+        dm, rm = memory(loaded)
+        print(f"1000 copies held: dicts {dm:.1f} MB, records {rm:.1f} MB")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
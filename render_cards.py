@@ -1,10 +1,18 @@
 import json, os
 from pathlib import Path
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
+from tracing import span, traced
+import glyph_atlas
+from compositor import Compositor
+from records import as_question, load_day
 
 W, H = 1080, 1920
 PAD = 72
+RIBBON_H = 120
+HANDLE = "@trivia • #Shorts"
+TITLE = "Daily Sports Trivia • {league}"
 ASSETS = Path(__file__).parent / "assets"
+_MEASURE = ImageDraw.Draw(Image.new("RGB", (1,1)))
 
 def _theme(league):
     cfg = {"bg_accent":[22,24,28],"ribbon":[80,80,80],"accent2":[140,140,140]}
@@ -31,6 +39,7 @@ def _line_height(draw, font):
         bbox = draw.textbbox((0,0), "Ag", font=font)
         return max(48, bbox[3]-bbox[1])
 
+@traced("gradient")
 def _gradient_bg(top, bottom):
     img = Image.new("RGB", (W, H), top)
     tr,tg,tb = top; br,bg,bb = bottom
@@ -49,53 +58,97 @@ def _wrap(draw, text, font, max_width):
     if line: lines.append(line)
     return lines
 
-def draw_card(question, idx, out_dir):
-    league = (question.get("meta") or {}).get("league") or ((question.get("meta") or {}).get("leagues") or [""])[0] or "DEFAULT"
-    T = _theme(league)
-
-    bg = _gradient_bg(tuple(T["bg_accent"]), (8,10,14))
-    draw = ImageDraw.Draw(bg)
-
-    ribbon_h = 120
-    draw.rectangle([0,0,W,ribbon_h], fill=tuple(T["ribbon"]))
-
-    f_title = _pick_font(72)
-    f_body  = _pick_font(54)
-    f_small = _pick_font(44)
-
-    draw.text((PAD, 32), f"Daily Sports Trivia • {league}", font=f_title, fill=(240,240,240))
-
-    x, y = PAD+32, ribbon_h + 40
+@traced("layout")
+def _layout(draw, question, league, f_title, f_body, f_small, title=None, handle=HANDLE):
+    """Every text line and pill as (name, box, text); drawing and dry runs share it."""
+    title = (title or TITLE).format(league=league)
+    items = [("title", (PAD, 32, PAD + int(draw.textlength(title, font=f_title)), 32 + _line_height(draw, f_title)), title)]
+    x, y = PAD+32, RIBBON_H + 40
     maxw = W - 2*PAD - 64
-
-    for line in _wrap(draw, question["question"], f_body, maxw):
-        draw.text((x,y), line, font=f_body, fill=(255,255,255))
-        y += _line_height(draw, f_body) + 6
+    lh = _line_height(draw, f_body)
+    for line in _wrap(draw, question.question, f_body, maxw):
+        items.append(("question", (x, y, x + int(draw.textlength(line, font=f_body)), y + lh), line))
+        y += lh + 6
     y += 10
-
-    for i,opt in enumerate(question["options"], start=1):
+    for i,opt in enumerate(question.options, start=1):
+        text = f"{i}. {opt}"
         pill_h = _line_height(draw, f_small) + 28
-        pill_w = max(320, int(draw.textlength(f"{i}. {opt}", font=f_small) + 48))
-        pill = Image.new("RGBA", (pill_w, pill_h), (0,0,0,0))
-        pd = ImageDraw.Draw(pill)
-        pd.rounded_rectangle((0,0,pill_w,pill_h), radius=22, fill=(T["accent2"][0], T["accent2"][1], T["accent2"][2], 230))
-        pd.text((20, 14), f"{i}. {opt}", font=f_small, fill=(16,18,20))
-        bg.paste(pill, (x, y), pill)
+        pill_w = max(320, int(draw.textlength(text, font=f_small) + 48))
+        items.append((f"option {i}", (x, y, x + pill_w, y + pill_h), text))
         y += pill_h + 14
-
-    draw.text((PAD+32, H - PAD - 40), "@trivia • #Shorts", font=f_small, fill=(210,210,210))
-
-    out_path = Path(out_dir) / f"q{idx:02d}.png"
-    bg.save(out_path, format="PNG", optimize=True)
-    return out_path
-
-def render_cards(json_path):
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+    hx, hy = PAD+32, H - PAD - 40
+    items.append(("handle", (hx, hy, hx + int(draw.textlength(handle, font=f_small)), hy + _line_height(draw, f_small)), handle))
+    return items
+
+def layout_card(question, idx, source=""):
+    """Dry run of draw_card: font metrics only, returns the layout_check report."""
+    from layout_check import check_boxes
+    draw = ImageDraw.Draw(Image.new("RGB", (1,1)))
+    question = as_question(question)
+    items = _layout(draw, question, question.league, _pick_font(72), _pick_font(54), _pick_font(44))
+    return check_boxes([(n, b) for n,b,_ in items], (PAD, 0, W - PAD, H), source, f"card q{idx:02d}")
+
+def _brand_theme(league, brand=None):
+    return {**_theme(league), **((brand or {}).get("theme") or {})}
+
+def card_items(question, fonts, brand=None):
+    brand, question = brand or {}, as_question(question)
+    return _layout(_MEASURE, question, question.league, *fonts,
+                   title=brand.get("card_title"), handle=brand.get("handle", HANDLE))
+
+def card_base(question, brand=None):
+    """Gradient plus question text: the part of a card that only changes with the
+    theme's bg_accent. Returns (image, fonts, layout items for this brand)."""
+    question = as_question(question)
+    T = _brand_theme(question.league, brand)
+    bg = _gradient_bg(tuple(T["bg_accent"]), (8,10,14))
+    draw = ImageDraw.Draw(bg)
+    fonts = (_pick_font(72), _pick_font(54), _pick_font(44))
+    items = card_items(question, fonts, brand)
+    for name, (x0, y0, _, _), text in items:
+        if name == "question":
+            glyph_atlas.text(draw, (x0, y0), text, fonts[1], (255,255,255))
+    return bg, fonts, items
+
+def finish_card(base, question, fonts, brand=None, items=None):
+    """Copy of base with the ribbon, title, option pills and handle (the brand-specific part)."""
+    question = as_question(question)
+    T = _brand_theme(question.league, brand)
+    items = items or card_items(question, fonts, brand)
+    bg = base.copy()
+    draw = ImageDraw.Draw(bg)
+    # the ribbon sits above the first question line, so drawing it after the question is equivalent
+    draw.rectangle([0,0,W,RIBBON_H], fill=tuple(T["ribbon"]))
+    f_title, _, f_small = fonts
+    comp = Compositor(bg)
+    for name, (x0, y0, x1, y1), text in items:
+        if name == "title":
+            glyph_atlas.text(draw, (x0, y0), text, f_title, (240,240,240))
+        elif name == "handle":
+            glyph_atlas.text(draw, (x0, y0), text, f_small, (210,210,210))
+        elif name.startswith("option"):
+            comp.rounded((x0, y0, x1, y1), 22, (T["accent2"][0], T["accent2"][1], T["accent2"][2], 230))
+            comp.text((x0 + 20, y0 + 14), text, f_small, (16,18,20), inside=True)
+    return comp.apply()
+
+def save_card(img, path):
+    with span("png_save", file=path):
+        img.save(path, format="PNG", optimize=True)
+    return path
+
+def draw_card(question, idx, out_dir, brand=None):
+    question = as_question(question)
+    base, fonts, items = card_base(question, brand)
+    return save_card(finish_card(base, question, fonts, brand, items), Path(out_dir) / f"q{idx:02d}.png")
+
+def render_cards(json_path, dry_run=False):
+    day = load_day(json_path)
+    if dry_run:
+        return [layout_card(q, i, str(json_path)) for i, q in enumerate(day.questions, start=1)]
     out_dir = Path(json_path).with_suffix("").as_posix() + "_cards"
     Path(out_dir).mkdir(parents=True, exist_ok=True)
     paths = []
-    for i, q in enumerate(data["questions"], start=1):
+    for i, q in enumerate(day.questions, start=1):
         p = draw_card(q, i, out_dir); paths.append(str(p))
     print("Wrote", len(paths), "cards to", out_dir)
     return out_dir
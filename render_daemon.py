@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+render_daemon.py
+Long-running render service for on-demand renders (fixed typos, lineup previews).
+- Imports moviepy/NumPy once and keeps fonts, themes, gradients, static
+  backgrounds, the audio bed (decoded) and logos warm in memory
+- Local HTTP job API on 127.0.0.1; jobs run on a worker thread in order
+    POST /jobs        {"kind":"card", "json":"out/trivia_X.json", "index":3}
+                      {"kind":"card", "question":{...}, "index":1, "out_dir":"out/preview"}
+                      {"kind":"short", "json":..., "index":1, "out":..., "music":...}
+                      {"kind":"guess_team", "json":"data/lineup_soccer.json", "out":..., "music":...}
+                      add "wait":true to block until the job finishes
+    GET  /jobs/<id>   status, result, error, wait/run/total seconds
+    GET  /stats       queue depth, counts, per-kind latency (p50/p95/max), cache sizes
+    GET  /health
+Usage:
+  python render_daemon.py [--port 8765] [--workers 1] [--no-warm]
+  curl -s -XPOST localhost:8765/jobs -d '{"kind":"guess_team","json":"data/lineup_soccer.json","wait":true}'
+"""
+import os, sys, json, time, queue, itertools, threading, traceback
+import http.server
+from pathlib import Path
+from functools import lru_cache, wraps
+from collections import deque, defaultdict
+from tracing import span
+
+PORT = 8765
+KEEP_JOBS = 500
+KEEP_LATENCIES = 200
+AUDIO_FPS = 44100
+
+# --- warm caches --------------------------------------------------------------
+
+def _copying(fn):
+    """Cache wrapper for functions returning images the caller draws on."""
+    @wraps(fn)
+    def wrapper(*a):
+        return fn(*a).copy()
+    wrapper.cache_info = fn.cache_info
+    return wrapper
+
+def _mtime(path):
+    try: return os.stat(path).st_mtime_ns
+    except OSError: return 0
+
+@lru_cache(maxsize=256)
+def _logo_cached(path, mtime):
+    return _ORIG["logo"](path)
+
+@lru_cache(maxsize=8)
+def _audio_array(path, mtime):
+    import numpy as np
+    from moviepy.editor import AudioFileClip
+    clip = AudioFileClip(path)
+    # to_soundarray hands np.vstack a generator, which current NumPy rejects
+    try: return np.vstack(list(clip.iter_chunks(fps=AUDIO_FPS, chunksize=50000)))
+    finally: clip.close()
+
+def _warm_music(path):
+    from moviepy.audio.AudioClip import AudioArrayClip
+    return AudioArrayClip(_audio_array(str(path), _mtime(path)), fps=AUDIO_FPS).volumex(0.12)
+
+_ORIG = {}
+_CACHED = {}
+
+def install_caches():
+    """Swaps the renderers' loaders for memoized versions (this process only)."""
+    import render_cards as rc, render_short as rs, render_guess_team as rg
+    if _ORIG: return
+    _ORIG["logo"] = rg._logo
+    for name, mod in (("cards", rc), ("short", rs)):
+        mod._pick_font = _CACHED[f"{name}.font"] = lru_cache(maxsize=None)(mod._pick_font)
+        theme = lru_cache(maxsize=None)(lambda league, mtime, f=mod._theme: f(league))
+        mod._theme = lambda league, f=theme, m=mod: f(league, _mtime(m.ASSETS / "themes.json"))
+        _CACHED[f"{name}.theme"] = theme
+        mod._gradient_bg = _CACHED[f"{name}.gradient"] = _copying(lru_cache(maxsize=32)(mod._gradient_bg))
+    rs._music_clip = rg._music_clip = _warm_music
+    _CACHED["audio"] = _audio_array
+    rg._font = _CACHED["guess.font"] = lru_cache(maxsize=None)(rg._font)
+    rg._logo = lambda path: _logo_cached(str(path), _mtime(path)).copy()
+    _CACHED["logos"] = _logo_cached
+
+def warm(music="assets/soft_loop.mp3"):
+    """Preloads what the first jobs would otherwise pay for."""
+    t0 = time.perf_counter()
+    import numpy, moviepy.editor  # noqa: F401  (import cost paid once, here)
+    import render_cards as rc, render_short as rs, render_guess_team as rg
+    for size in (44, 48, 54, 60, 72): rc._pick_font(size); rs._pick_font(size)
+    for size in (32, 34, 38, 42, 46, 64, 72): rg._font(size)
+    for p in sorted(Path("data").glob("lineup_*.json")):
+        d = json.load(open(p, "r", encoding="utf-8"))
+        bg = d.get("background")
+        if bg and os.path.exists(bg):
+            rg._static_layer(bg, (d.get("title") or "").strip(), d.get("handle","@YourHandle • #Shorts"))
+    if music and os.path.exists(music) and os.path.getsize(music) > 0:
+        _audio_array(music, _mtime(music))
+    print(f"Warm in {time.perf_counter()-t0:.1f}s", flush=True)
+
+def cache_sizes():
+    return {k: f.cache_info().currsize for k, f in _CACHED.items()}
+
+# --- jobs -------------------------------------------------------------------
+
+def _card(job):
+    from render_cards import draw_card
+    idx = int(job.get("index", 1))
+    if "question" in job:
+        q = job["question"]
+        out_dir = job.get("out_dir", "out/preview")
+    else:
+        data = json.load(open(job["json"], "r", encoding="utf-8"))
+        q = data["questions"][idx-1]
+        out_dir = job.get("out_dir") or Path(job["json"]).with_suffix("").as_posix() + "_cards"
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    return str(draw_card(q, idx, out_dir))
+
+def _short(job):
+    from render_short import render_short
+    return render_short(job["json"], int(job.get("index", 1)), job.get("out"), job.get("music", "assets/soft_loop.mp3"),
+                        encoder=job.get("encoder"))
+
+def _guess_team(job):
+    from render_guess_team import render_guess_team
+    return render_guess_team(job["json"], job.get("out"), job.get("music"), encoder=job.get("encoder"))
+
+KINDS = {"card": _card, "short": _short, "guess_team": _guess_team}
+
+class Daemon:
+    def __init__(self, workers=1):
+        self.q = queue.Queue()
+        self.jobs = {}
+        self.order = deque()
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.latency = defaultdict(lambda: deque(maxlen=KEEP_LATENCIES))
+        self.counts = defaultdict(int)
+        self.running = 0
+        self.started = time.time()
+        self.threads = [threading.Thread(target=self._work, name=f"render-{i}", daemon=True) for i in range(workers)]
+        for t in self.threads: t.start()
+
+    def submit(self, spec):
+        if not isinstance(spec, dict): raise ValueError(f"job spec must be a JSON object, got {type(spec).__name__}")
+        kind = spec.get("kind")
+        if kind not in KINDS: raise ValueError(f"unknown kind {kind!r}; expected one of {sorted(KINDS)}")
+        job = {"id":str(next(self.ids)), "kind":kind, "spec":spec, "status":"queued",
+               "submitted":time.time(), "done":threading.Event()}
+        with self.lock:
+            self.jobs[job["id"]] = job; self.order.append(job["id"])
+            while len(self.order) > KEEP_JOBS:
+                old = self.jobs.get(self.order[0])
+                if old and old["status"] in ("queued", "running"): break
+                self.jobs.pop(self.order.popleft(), None)
+        self.q.put(job)
+        return job
+
+    def _work(self):
+        while True:
+            job = self.q.get()
+            t0 = time.time()
+            with self.lock: self.running += 1; job["status"] = "running"; job["started"] = t0
+            try:
+                with span(f"job.{job['kind']}", id=job["id"]):
+                    job["result"] = KINDS[job["kind"]](job["spec"])
+                job["status"] = "done"
+            except Exception as e:
+                job.update(status="failed", error=f"{type(e).__name__}: {e}")
+                traceback.print_exc()
+            t1 = time.time()
+            job.update(finished=t1, wait_s=round(t0 - job["submitted"], 3), run_s=round(t1 - t0, 3),
+                       total_s=round(t1 - job["submitted"], 3))
+            with self.lock:
+                self.running -= 1; self.counts[job["status"]] += 1
+                self.latency[job["kind"]].append(job["total_s"])
+            print(f"[{job['status']}] #{job['id']} {job['kind']} wait {job['wait_s']:.2f}s run {job['run_s']:.2f}s", flush=True)
+            job["done"].set()
+
+    def view(self, job):
+        return {k: v for k, v in job.items() if k != "done"}
+
+    def stats(self):
+        with self.lock:
+            lat = {}
+            for kind, xs in self.latency.items():
+                s = sorted(xs)
+                lat[kind] = {"n":len(s), "p50_s":s[len(s)//2], "p95_s":s[min(len(s)-1, int(len(s)*0.95))], "max_s":s[-1]}
+            return {"queue_depth":self.q.qsize(), "running":self.running, "done":self.counts["done"],
+                    "failed":self.counts["failed"], "uptime_s":round(time.time() - self.started, 1),
+                    "latency":lat, "caches":cache_sizes()}
+
+def make_handler(daemon):
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *a): pass
+
+        def _send(self, code, obj):
+            body = json.dumps(obj, default=str).encode()
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers(); self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health": return self._send(200, {"ok":True})
+            if self.path == "/stats": return self._send(200, daemon.stats())
+            if self.path.startswith("/jobs/"):
+                job = daemon.jobs.get(self.path.rsplit("/", 1)[1])
+                return self._send(200, daemon.view(job)) if job else self._send(404, {"error":"no such job"})
+            self._send(404, {"error":"not found"})
+
+        def do_POST(self):
+            if self.path != "/jobs": return self._send(404, {"error":"not found"})
+            try:
+                spec = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+                job = daemon.submit(spec)
+            except (ValueError, json.JSONDecodeError) as e:
+                return self._send(400, {"error":str(e)})
+            if spec.get("wait"):
+                job["done"].wait()
+                return self._send(200 if job["status"] == "done" else 500, daemon.view(job))
+            self._send(202, {"id":job["id"], "queue_depth":daemon.q.qsize()})
+    return Handler
+
+def serve(port=PORT, workers=1, do_warm=True):
+    install_caches()
+    if do_warm: warm()
+    daemon = Daemon(workers)
+    srv = http.server.ThreadingHTTPServer(("127.0.0.1", port), make_handler(daemon))
+    print(f"Render daemon on http://127.0.0.1:{srv.server_port}", flush=True)
+    try: srv.serve_forever()
+    except KeyboardInterrupt: pass
+    finally: srv.server_close()
+
+def main(argv):
+    opt = lambda k, d: argv[argv.index(k)+1] if k in argv else d
+    serve(int(opt("--port", PORT)), int(opt("--workers", 1)), "--no-warm" not in argv)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,13 +1,25 @@
-
-import os, json, re
+import os, re, hashlib
 from pathlib import Path
-import numpy as np
+from collections import OrderedDict
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
-from moviepy.editor import ImageClip, AudioFileClip, CompositeVideoClip
+from formations import load_formation, place
+from tracing import span, traced
+import glyph_atlas
+from compositor import Compositor
+from records import as_lineup, load_lineup
+from encoder_profiles import write_kwargs
 
 W, H = 1080, 1920
 SAFE = 48
 DURATION = 18.0  # seconds
+LAYER_CACHE = Path("assets/_cache/layers")
+LAYER_VERSION = 1  # bump when _compose_static changes
+LAYER_MEMORY = 8   # static layers kept decoded in memory (~6 MB each)
+LAYER_FILES = 32   # .rgb files kept in LAYER_CACHE; least recently used removed beyond that
+_LAYERS = OrderedDict()
+ACCENT = (0,160,255)  # year and reveal pills; a lineup's "accent" overrides it
+HANDLE = "@YourHandle • #Shorts"
+BACKGROUND = "assets/backgrounds/basketball.png"
 
 def _font(size):
     for cand in [
@@ -46,79 +58,88 @@ def _wrap_lines(text, draw, font, max_w):
     if cur: lines.append(cur)
     return lines or [""]
 
-def _pill(text, font, color=(10,35,70), txt=(255,255,255), max_w=None, line_gap=6):
-    dmy = Image.new("RGBA",(10,10)); draw = ImageDraw.Draw(dmy)
+_MEASURE = ImageDraw.Draw(Image.new("RGBA", (1,1)))
+
+def _pill_metrics(text, font, max_w=None, line_gap=6):
     inner_max = None if max_w is None else max(100, max_w - 38)
-    lines = _wrap_lines(text, draw, font, inner_max)
-    tw = max(int(draw.textlength(line, font=font)) for line in lines) if lines else 0
+    lines = _wrap_lines(text, _MEASURE, font, inner_max)
+    tw = max(int(_MEASURE.textlength(line, font=font)) for line in lines) if lines else 0
     lh = int(font.size*1.05)
     h  = lh*len(lines) + 26 + (max(0, len(lines)-1))*line_gap
     w  = max(160, tw + 38)
+    return lines, w, h, lh
+
+def _pill(text, font, color=(10,35,70), txt=(255,255,255), max_w=None, line_gap=6):
+    lines, w, h, lh = _pill_metrics(text, font, max_w, line_gap)
     pill = Image.new("RGBA", (w,h), (0,0,0,0))
     pd = ImageDraw.Draw(pill)
     pd.rounded_rectangle((0,0,w,h), radius=16, fill=(color[0],color[1],color[2],235))
     y = (h - (lh*len(lines) + (len(lines)-1)*line_gap))//2
     for line in lines:
         lx = (w - int(pd.textlength(line, font=font)))//2
-        pd.text((lx, y), line, font=font, fill=txt)
+        glyph_atlas.text(pd, (lx, y), line, font, txt)
         y += lh + line_gap
     return pill
 
-def _pos_badge(text, bg=(0,0,0), fg=(255,255,255), *, font_size=32, max_w=200):
-    f = _font(font_size)
-    dmy = Image.new("RGBA",(10,10)); dr = ImageDraw.Draw(dmy)
+def _badge_metrics(text, f, max_w=200):
     t = (text or "").upper()
-    while int(dr.textlength(t, font=f)) > max_w - 26 and len(t) > 3:
+    while int(_MEASURE.textlength(t, font=f)) > max_w - 26 and len(t) > 3:
         t = t[:-2] + "…"
-    tw = int(dr.textlength(t, font=f))
+    tw = int(_MEASURE.textlength(t, font=f))
     h  = int(f.size*1.05) + 16
     w  = max(56, min(max_w, tw + 26))
-    badge = Image.new("RGBA",(w,h),(0,0,0,0))
-    bd = ImageDraw.Draw(badge)
-    bd.rounded_rectangle((0,0,w,h), radius=12, fill=(bg[0],bg[1],bg[2],220))
-    bd.text(((w - tw)//2, (h - int(f.size*1.05))//2 + 4), t, font=f, fill=fg)
-    return badge
+    return t, tw, w, h
+
+def _draw_pill(comp, xy, text, font, color=(10,35,70), txt=(255,255,255), max_w=None, line_gap=6):
+    """_pill drawn in place on the frame overlay; returns its size."""
+    lines, w, h, lh = _pill_metrics(text, font, max_w, line_gap)
+    x, y = xy
+    comp.rounded((x, y, x+w, y+h), 16, (color[0],color[1],color[2],235))
+    ty = y + (h - (lh*len(lines) + (len(lines)-1)*line_gap))//2
+    for line in lines:
+        comp.text((x + (w - int(_MEASURE.textlength(line, font=font)))//2, ty), line, font, txt, inside=True)
+        ty += lh + line_gap
+    return w, h
+
+def _draw_badge(comp, xy, text, bg=(0,0,0), fg=(255,255,255), font_size=32, max_w=200):
+    """Position badge drawn in place on the frame overlay."""
+    f = _font(font_size)
+    t, tw, w, h = _badge_metrics(text, f, max_w)
+    x, y = xy
+    comp.rounded((x, y, x+w, y+h), 12, (bg[0],bg[1],bg[2],220))
+    comp.text((x + (w - tw)//2, y + (h - int(f.size*1.05))//2 + 4), t, f, fg, inside=True)
 
 def _slug(s):
     s = (s or "").strip().lower()
     s = re.sub(r"[^a-z0-9]+", "-", s)
     return re.sub(r"-+", "-", s).strip("-") or "x"
 
-def _stack_with_logo(center_xy, label_img, logo_img=None, gap=10):
-    if logo_img is None:
-        return label_img, (center_xy[0] - label_img.size[0]//2,
-                           center_xy[1] - label_img.size[1]//2)
-    w = max(label_img.size[0], logo_img.size[0])
-    h = logo_img.size[1] + gap + label_img.size[1]
-    comp = Image.new("RGBA", (w, h), (0,0,0,0))
-    comp.paste(logo_img, ((w - logo_img.size[0])//2, 0), logo_img)
-    comp.paste(label_img, ((w - label_img.size[0])//2, logo_img.size[1]+gap), label_img)
-    return comp, (center_xy[0] - w//2, center_xy[1] - h//2)
-
-def _avoid_overlap(xy, size, placed, step=18, top=SAFE, bottom=H-SAFE):
-    x, y = xy; w, h = size
-    def inter(a, b):
-        ax, ay, aw, ah = a; bx, by, bw, bh = b
-        return not (ax+aw <= bx or bx+bw <= ax or ay+ah <= by or by+bh <= ay)
-    rect = [x,y,w,h]
-    for _ in range(100):
-        if any(inter(rect, r) for r in placed):
-            ny = y - step if y - step >= top else min(bottom-h, y + step)
-            if ny == y: break
-            y = ny; rect[1] = y
-        else:
-            break
-    placed.append(tuple(rect))
-    return (x,y)
-
-def _reveal_overlay(text, w=W, h=H):
+def _logo(path):
+    return Image.open(path).convert("RGBA")
+
+def _logo_stack(logo, label, font, color, max_w, gap=8):
+    """Logo above its label pill as one tile. Both go onto the transparent tile with
+    their own alpha as the mask, which squares that alpha (the 235 pill ends up ~216)
+    and darkens the colours with it; the stacks have always looked like that."""
+    pill = _pill(label, font, color=color, max_w=max_w)
+    w = max(pill.size[0], logo.size[0])
+    tile = Image.new("RGBA", (w, logo.size[1] + gap + pill.size[1]), (0,0,0,0))
+    tile.paste(logo, ((w - logo.size[0])//2, 0), logo)
+    tile.paste(pill, ((w - pill.size[0])//2, logo.size[1] + gap), pill)
+    return tile
+
+def _music_clip(path):
+    from moviepy.editor import AudioFileClip
+    return AudioFileClip(path).volumex(0.12)
+
+def _reveal_overlay(text, w=W, h=H, accent=ACCENT):
     # Build a transparent overlay with centered reveal pill
     ov = Image.new("RGBA", (w,h), (0,0,0,0))
     draw = ImageDraw.Draw(ov)
     # subtle dim behind
     draw.rectangle((0,0,w,h), fill=(0,0,0,110))
     f = _font(64)
-    pill = _pill(text, f, color=(0,160,255), txt=(16,18,24))
+    pill = _pill(text, f, color=accent, txt=(16,18,24))
     sh = _shadow(pill, expand=12, radius=12, alpha=130, r=22)
     x = (w - pill.size[0])//2
     y = int(h*0.78)  # near bottom-center
@@ -126,14 +147,13 @@ def _reveal_overlay(text, w=W, h=H):
     ov.paste(pill, (x, y), pill)
     return ov
 
-def render_guess_team(json_path, out_path=None, music_path=None):
-    data = json.load(open(json_path, "r", encoding="utf-8"))
-    mode = data.get("mode","basketball").lower()
-    bg_path = data.get("background", "assets/backgrounds/basketball.png")
-    bg = Image.open(bg_path).convert("RGB").resize((W,H))
-    draw = ImageDraw.Draw(bg)
+def _background(bg_path):
+    return Image.open(bg_path).convert("RGB").resize((W,H))
 
-    title = (data.get("title") or "").strip()
+def _compose_static(bg_path, title, handle, base=None):
+    # background + title badge + handle: identical for every lineup of a sport
+    bg = base.copy() if base is not None else _background(bg_path)
+    draw = ImageDraw.Draw(bg)
     if title:
         f_title = _font(46)
         tw = int(draw.textlength(title, font=f_title))
@@ -142,164 +162,219 @@ def render_guess_team(json_path, out_path=None, music_path=None):
         badge = Image.new("RGBA", (w, h), (0,0,0,0))
         bd = ImageDraw.Draw(badge)
         bd.rounded_rectangle((0,0,w,h), radius=14, fill=(0,0,0,140))
-        bd.text((16, 8), title, font=f_title, fill=(255,255,255))
+        glyph_atlas.text(bd, (16, 8), title, f_title, (255,255,255))
         bg.paste(badge, (SAFE, SAFE), badge)
-
-    f_lab = _font(46)
-    max_y = 0
-    placed_rects = []
-
-    if mode == "basketball":
-        pos_map = {
-            "PG": (W//2, 520),
-            "SG": (W//2 + 260, 660),
-            "SF": (W//2 - 260, 660),
-            "PF": (W//2 - 200, 900),
-            "C" : (W//2 + 200, 900),
-        }
-        color = (10,35,70)
-        logo_root = Path("assets/college_logos")
-        for p in data["players"]:
-            college = p.get("college","")
-            pos = pos_map.get((p.get("pos","")).upper(), (W//2, H//2))
-            pill = _pill(college, f_lab, color=color, max_w=360)
-            logo_img = None
-            if college:
-                slug = re.sub(r"[^a-z0-9]+","-",college.lower()).strip("-")
-                for folder in [logo_root, Path("assets/logos/colleges")]:
-                    cand = folder / f"{slug}.png"
-                    if cand.exists():
-                        logo_img = Image.open(cand).convert("RGBA"); break
-
-            stack, (sx, sy) = _stack_with_logo(pos, pill, logo_img, gap=8)
-            sh = _shadow(stack, alpha=110, r=24)
-            bg.paste(sh, (sx-18, sy-18), sh)
-            bg.paste(stack, (sx, sy), stack)
-            placed_rects.append((sx, sy, stack.size[0], stack.size[1]))
-
-            name = (p.get("pos","")).upper()
-            pb = _pos_badge(name, bg=(20,40,85), font_size=32, max_w=200)
-            bx = sx + (stack.size[0] - pb.size[0]) // 2
-            by = sy - pb.size[1] - 10
-            bx, by = _avoid_overlap((bx, by), pb.size, placed_rects, top=SAFE)
-            bg.paste(pb, (bx, by), pb)
-            max_y = max(max_y, sy + stack.size[1])
-
-    elif mode == "football":
-        pos_map = {
-            "LT": (220, 620), "LG": (360, 620), "C": (540, 620),
-            "RG": (720, 620), "RT": (860, 620),
-            "QB": (540, 760), "RB": (540, 900),
-            "TE": (860, 760),
-            "WR1": (140, 780), "WR2": (940, 780), "WR3": (220, 980),
-        }
-        color = (15,45,18)
-        logo_root = Path("assets/college_logos")
-        for p in data["players"]:
-            college = p.get("college","")
-            pos = pos_map.get((p.get("pos","")).upper(), (W//2, H//2))
-            pill = _pill(college, f_lab, color=color, max_w=360)
-            logo_img = None
-            if college:
-                slug = re.sub(r"[^a-z0-9]+","-",college.lower()).strip("-")
-                for folder in [logo_root, Path("assets/logos/colleges")]:
-                    cand = folder / f"{slug}.png"
-                    if cand.exists():
-                        logo_img = Image.open(cand).convert("RGBA"); break
-
-            stack, (sx, sy) = _stack_with_logo(pos, pill, logo_img, gap=8)
-            sh = _shadow(stack, alpha=110, r=24)
-            bg.paste(sh, (sx-18, sy-18), sh)
-            bg.paste(stack, (sx, sy), stack)
-            placed_rects.append((sx, sy, stack.size[0], stack.size[1]))
-
-            name = (p.get("pos","")).upper()
-            pb = _pos_badge(name, bg=(25,80,30), font_size=32, max_w=200)
-            bx = sx + (stack.size[0] - pb.size[0]) // 2
-            by = sy - pb.size[1] - 10
-            bx, by = _avoid_overlap((bx, by), pb.size, placed_rects, top=SAFE)
-            bg.paste(pb, (bx, by), pb)
-            max_y = max(max_y, sy + stack.size[1])
-
-    else:  # soccer
-        pos_map = {
-            "GK": (W//2, 1560),
-            "LB": (200, 1320), "LCB": (420, 1320), "RCB": (660, 1320), "RB": (880, 1320),
-            "DM": (W//2, 1120), "LCM": (340, 1080), "RCM": (740, 1080),
-            "LW": (260, 840), "ST": (W//2, 780), "RW": (820, 840),
-        }
-        color = (18,80,24)
-        for p in data["players"]:
-            iso = (p.get("flag") or "").upper()
-            country = p.get("country","")
-            pos = pos_map.get((p.get("pos","")).upper(), (W//2, H//2))
-            label = iso or country or "—"
-            pill = _pill(label, f_lab, color=color, max_w=320)
-
-            flag_img = None
-            if iso:
-                for folder in [Path("assets/flags"), Path("assets/logos/flags")]:
-                    cand = folder / f"{iso}.png"
-                    if cand.exists():
-                        flag_img = Image.open(cand).convert("RGBA"); break
-
-            stack, (sx, sy) = _stack_with_logo(pos, pill, flag_img, gap=8)
-            sh = _shadow(stack, alpha=110, r=24)
-            bg.paste(sh, (sx-18, sy-18), sh)
-            bg.paste(stack, (sx, sy), stack)
-            placed_rects.append((sx, sy, stack.size[0], stack.size[1]))
-
-            name = (p.get("pos","")).upper()
-            pb = _pos_badge(name, bg=(25,95,35), font_size=32, max_w=200)
-            bx = sx + (stack.size[0] - pb.size[0]) // 2
-            by = sy - pb.size[1] - 10
-            bx, by = _avoid_overlap((bx, by), pb.size, placed_rects, top=SAFE)
-            bg.paste(pb, (bx, by), pb)
-            max_y = max(max_y, sy + stack.size[1])
-
-    year = str(data.get("year","")).strip()
+    f_meta = _font(42)
+    glyph_atlas.text(draw, (SAFE, H - SAFE - _lh(draw, f_meta)), handle, f_meta, (245,245,245))
+    return bg
+
+def _layer_key(bg_path, title, handle):
+    st = os.stat(bg_path)
+    raw = f"{LAYER_VERSION}|{os.path.abspath(bg_path)}|{st.st_mtime_ns}|{st.st_size}|{W}x{H}|{title}|{handle}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+@traced("bg_layer")
+def _static_layer(bg_path, title, handle, base=None):
+    """Copy of the cached static layer; rebuilt when the background file changes.
+    base is the already decoded background, when the caller has it."""
+    key = _layer_key(bg_path, title, handle)
+    img = _LAYERS.get(key)
+    if img is None:
+        cached = LAYER_CACHE / f"{key}.rgb"
+        if cached.exists() and cached.stat().st_size == W*H*3:
+            img = Image.frombytes("RGB", (W,H), cached.read_bytes())
+            try: os.utime(cached)  # recency for _trim_layer_files
+            except OSError: pass
+        else:
+            img = _compose_static(bg_path, title, handle, base)
+            try:
+                LAYER_CACHE.mkdir(parents=True, exist_ok=True)
+                tmp = cached.with_suffix(".tmp")
+                tmp.write_bytes(img.tobytes()); tmp.replace(cached)
+                _trim_layer_files()
+            except OSError as e:
+                print("[warn] layer cache:", e)
+        _LAYERS[key] = img
+        while len(_LAYERS) > LAYER_MEMORY: _LAYERS.popitem(last=False)
+    _LAYERS.move_to_end(key)
+    return img.copy()
+
+def _trim_layer_files(keep=LAYER_FILES):
+    """Removes all but the keep most recently used layer files."""
+    files = sorted(LAYER_CACHE.glob("*.rgb"), key=lambda p: p.stat().st_mtime_ns, reverse=True)
+    for p in files[keep:]:
+        try: p.unlink()
+        except OSError: pass
+
+def _year(lineup):
+    return "" if lineup.year is None else str(lineup.year).strip()
+
+def _handle(lineup):
+    return HANDLE if lineup.handle is None else lineup.handle
+
+def layout_guess_team(data, source=""):
+    """Dry run of render_guess_team: sizes from font metrics and image headers
+    only; returns the layout_check report (overflows and collisions)."""
+    from layout_check import check_boxes
+    lineup = as_lineup(data)
+    tpl = load_formation(lineup.formation or lineup.sport)
+    f_lab, f_badge = _font(46), _font(32)
+    items, names = [], []
+    teams = lineup.sides
+    for side, team in enumerate(teams):
+        for i, p in enumerate(team, start=1):
+            pos = p.code
+            label, stem = tpl.label_for(p)
+            _, w, h, _ = _pill_metrics(label, f_lab, tpl.pill_max_w)
+            img_path = tpl.image_path(stem)
+            if img_path:
+                with Image.open(img_path) as im: lw, lh = im.size
+                w, h = max(w, lw), lh + 8 + h
+            _, _, bw, bh = _badge_metrics(pos, f_badge, 200)
+            items.append((tpl.center(pos, side), (w, h), (bw, bh)))
+            names.append(f"{'ab'[side] if len(teams) > 1 else ''}{i} {pos or '?'} {label}")
+
+    boxes, max_y = [], 0
+    for name, ((cx, cy), (w, h), (bw, bh)), ((sx, sy), (bx, by)) in zip(names, items, place(tuple(items))):
+        boxes.append((f"{name}:stack", (sx, sy, sx+w, sy+h)))
+        boxes.append((f"{name}:badge", (bx, by, bx+bw, by+bh)))
+        max_y = max(max_y, sy + h)
+
+    title = (lineup.title or "").strip()
+    title_over = 0
+    if title:
+        f_title = _font(46)
+        tw = int(_MEASURE.textlength(title, font=f_title))
+        title_box = (SAFE, SAFE, SAFE + min(tw + 32, 520), SAFE + int(f_title.size*1.1) + 18)
+        boxes.append(("title", title_box))
+        title_over = tw + 32 - 520
+    year = _year(lineup)
     if year:
-        f_year = _font(64)
-        yr = _pill(year, f_year, color=(0,160,255), txt=(16,18,24))
-        y_candidate = min(max_y + 40, H - SAFE - yr.size[1])
-        x = (W - yr.size[0]) // 2
-        sh = _shadow(yr, expand=12, radius=12, alpha=120, r=20)
-        bg.paste(sh, (x-12, y_candidate-12), sh)
-        bg.paste(yr, (x, y_candidate), yr)
-
-    handle = data.get("handle","@YourHandle • #Shorts")
+        _, w, h, _ = _pill_metrics(year, _font(64))
+        y = min(max_y + 40, H - SAFE - h); x = (W - w)//2
+        boxes.append(("year", (x, y, x+w, y+h)))
+    handle = _handle(lineup)
     f_meta = _font(42)
-    draw.text((SAFE, H - SAFE - _lh(draw, f_meta)), handle, font=f_meta, fill=(245,245,245))
-
-    # Base clip
+    hy = H - SAFE - _lh(_MEASURE, f_meta)
+    boxes.append(("handle", (SAFE, hy, SAFE + int(_MEASURE.textlength(handle, font=f_meta)), H - SAFE)))
+
+    rep = check_boxes(boxes, (0, 0, W, H), source, f"guess_team {tpl.name}")
+    if title_over > 0:
+        rep["overflows"].append({"element":"title text", "box":list(title_box), "by_px":{"right":title_over}})
+    answer = (lineup.answer or "").strip()
+    if answer:
+        _, w, h, _ = _pill_metrics(answer, _font(64))
+        x, y = (W - w)//2, int(H*0.78)
+        rep["overflows"] += check_boxes([("reveal", (x, y, x+w, y+h))], (0, 0, W, H))["overflows"]
+    rep["ok"] = not (rep["overflows"] or rep["collisions"])
+    return rep
+
+def _lineup_ops(data, mode):
+    """Shadows, logos, label pills and position badges as (fn, args) drawing ops
+    on a Compositor, in paint order, plus the lowest stack edge. Logos are loaded
+    and everything is measured and placed here; nothing depends on handle, title or accent."""
+    lineup = as_lineup(data)
+    tpl = load_formation(lineup.formation or mode)
+    f_lab = _font(46)
+    f_badge = _font(32)
+    max_y = 0
+    items = []
+    for side, team in enumerate(lineup.sides):
+        pill_color, badge_color = tpl.colors(side)
+        for p in team:
+            pos = p.code
+            label, stem = tpl.label_for(p)
+            _, pw, ph, _ = _pill_metrics(label, f_lab, tpl.pill_max_w)
+            img_path = tpl.image_path(stem)
+            img = _logo(img_path) if img_path else None
+            size = (max(pw, img.size[0]), img.size[1] + 8 + ph) if img else (pw, ph)
+            _, _, bw, bh = _badge_metrics(pos, f_badge, 200)
+            items.append((tpl.center(pos, side), size, (bw, bh), label, pill_color, img, pos, badge_color))
+
+    ops = []
+    spots = place(tuple((c, size, bsize) for c, size, bsize, *_ in items))
+    for (_, (w, h), _, label, pill_color, img, pos, badge_color), ((sx, sy), (bx, by)) in zip(items, spots):
+        # the stack's shadow sat 6px down-right of it (expand 24, pasted at -18)
+        ops.append((Compositor.shadow, ((sx+6, sy+6, sx+6+w, sy+6+h), 110, 24, 22, 24)))
+        if img is not None:
+            ops.append((Compositor.paste, (_logo_stack(img, label, f_lab, pill_color, tpl.pill_max_w), (sx, sy))))
+        else:
+            ops.append((_draw_pill, ((sx, sy), label, f_lab, pill_color, (255,255,255), tpl.pill_max_w)))
+        ops.append((_draw_badge, ((bx, by), pos, badge_color, (255,255,255), 32, 200)))
+        max_y = max(max_y, sy + h)
+    return ops, max_y
+
+def _year_ops(data, max_y):
+    lineup = as_lineup(data)
+    year = _year(lineup)
+    if not year: return []
+    f_year = _font(64)
+    _, w, h, _ = _pill_metrics(year, f_year)
+    y_candidate = min(max_y + 40, H - SAFE - h)
+    x = (W - w) // 2
+    return [(Compositor.shadow, ((x, y_candidate, x+w, y_candidate+h), 120, 20, 12, 12)),
+            (_draw_pill, ((x, y_candidate), year, f_year, tuple(lineup.accent or ACCENT), (16,18,24)))]
+
+def _paint(bg, ops):
+    """Runs drawing ops on one overlay and composites it onto bg."""
+    comp = Compositor(bg)
+    for fn, args in ops: fn(comp, *args)
+    return comp.apply()
+
+@traced("layout")
+def _draw_lineup(bg, data, mode):
+    """Player stacks, position badges and the year pill, painted onto bg."""
+    ops, max_y = _lineup_ops(data, mode)
+    _paint(bg, ops + _year_ops(data, max_y))
+
+def compose_guess_team(data):
+    """The static frame (background, title, lineup) before the reveal overlay."""
+    lineup = as_lineup(data)
+    bg = _static_layer(lineup.background or BACKGROUND, (lineup.title or "").strip(), _handle(lineup))
+    _draw_lineup(bg, lineup, lineup.sport)
+    return bg
+
+def render_guess_team(json_path, out_path=None, music_path=None, dry_run=False, encoder=None):
+    data = load_lineup(json_path)
+    if dry_run:
+        return layout_guess_team(data, str(json_path))
+    bg = compose_guess_team(data)
+    if not out_path:
+        stem = Path(json_path).with_suffix("")
+        out_path = str(stem) + "_guess_team.mp4"
+    return write_guess_team(bg, data, out_path, music_path, encoder)
+
+def write_guess_team(bg, data, out_path, music_path=None, encoder=None):
+    """Encodes a composed frame: music bed plus the optional reveal overlay."""
+    lineup = as_lineup(data)
+    # Base clip (NumPy/moviepy load here, not at import, so dry runs stay light)
+    import numpy as np
+    from moviepy.editor import ImageClip, CompositeVideoClip
     arr = np.array(bg)
     base = ImageClip(arr).set_duration(DURATION)
 
     # Optional music
-    music_path = music_path or data.get("music")
+    music_path = music_path or lineup.music
     if music_path and os.path.exists(music_path) and os.path.getsize(music_path) > 0:
         try:
-            music = AudioFileClip(music_path).volumex(0.12)
-            base = base.set_audio(music)
+            base = base.set_audio(_music_clip(music_path))
         except Exception:
             pass
 
     # On-screen reveal
-    reveal = (data.get("reveal_on_screen") in [True, "true", "yes", "1"])
-    answer = (data.get("answer") or "").strip()
+    reveal = (lineup.reveal_on_screen in [True, "true", "yes", "1"])
+    answer = (lineup.answer or "").strip()
     if reveal and answer:
-        ov = _reveal_overlay(answer)
+        ov = _reveal_overlay(answer, accent=tuple(lineup.accent or ACCENT))
         ov_arr = np.array(ov)
-        overlay = ImageClip(ov_arr).set_duration(max(1.8, float(data.get("reveal_seconds", 2.2))))
+        overlay = ImageClip(ov_arr).set_duration(max(1.8, float(2.2 if lineup.reveal_seconds is None else lineup.reveal_seconds)))
         overlay = overlay.set_start(DURATION - overlay.duration).crossfadein(0.35)
         clip = CompositeVideoClip([base, overlay])
     else:
         clip = base
 
-    if not out_path:
-        stem = Path(json_path).with_suffix("")
-        out_path = str(stem) + "_guess_team.mp4"
-    clip.write_videofile(out_path, fps=30, codec="libx264", audio_codec="aac", preset="medium", threads=4)
+    with span("encode", file=out_path):
+        clip.write_videofile(out_path, **write_kwargs(encoder))
     clip.close()
     print("Wrote", out_path)
     return out_path
@@ -1,11 +1,15 @@
 import json, os
 from pathlib import Path
-import numpy as np
 from PIL import Image, ImageDraw, ImageFont, ImageFilter
-from moviepy.editor import ImageClip, CompositeVideoClip, AudioFileClip
+from tracing import span, traced
+import glyph_atlas
+from compositor import Compositor
+from records import as_question, load_day
+from encoder_profiles import write_kwargs
 
 W, H = 1080, 1920
 PAD = 72
+RIBBON_H = 120
 ASSETS = Path(__file__).parent / "assets"
 
 def _theme(league):
@@ -27,6 +31,10 @@ def _pick_font(size):
         if os.path.exists(cand): return ImageFont.truetype(cand, size)
     return ImageFont.load_default()
 
+def _music_clip(path):
+    from moviepy.editor import AudioFileClip
+    return AudioFileClip(path).volumex(0.12)
+
 def _line_height(draw, font):
     try: a,d = font.getmetrics(); return a+d
     except Exception:
@@ -42,6 +50,7 @@ def _wrap(draw, text, font, max_width):
     if line: lines.append(line)
     return lines
 
+@traced("gradient")
 def _gradient_bg(top, bottom):
     img = Image.new("RGB", (W, H), top)
     tr,tg,tb = top; br,bg,bb = bottom
@@ -51,63 +60,88 @@ def _gradient_bg(top, bottom):
         img.putpixel((W//2, y), (r,g,b))
     return img.filter(ImageFilter.GaussianBlur(radius=600))
 
-def render_short(json_path, index=1, out_path=None, music_path=None, font="assets/fonts/Inter-Bold.ttf"):
-    with open(json_path, "r", encoding="utf-8") as f:
-        data = json.load(f)
-
-    q = data["questions"][index-1]
-    league = (q.get("meta") or {}).get("league") or ((q.get("meta") or {}).get("leagues") or [""])[0] or "DEFAULT"
-    T = _theme(league)
-
-    bg = _gradient_bg(tuple(T["bg_accent"]), (8,10,14))
-    draw = ImageDraw.Draw(bg)
-
-    ribbon_h = 120
-    draw.rectangle([0,0,W,ribbon_h], fill=tuple(T["ribbon"]))
-
-    f_title = _pick_font(72)
-    f_body  = _pick_font(60)
-    f_small = _pick_font(48)
-
-    draw.text((PAD, 32), f"Daily Sports Trivia • {league}", font=f_title, fill=(240,240,240))
-
-    x, y = PAD+32, ribbon_h + 40
+@traced("layout")
+def _layout(draw, q, league, f_title, f_body, f_small):
+    """Every text line and pill as (name, box, text); drawing and dry runs share it."""
+    title = f"Daily Sports Trivia • {league}"
+    items = [("title", (PAD, 32, PAD + int(draw.textlength(title, font=f_title)), 32 + _line_height(draw, f_title)), title)]
+    x, y = PAD+32, RIBBON_H + 40
     maxw = W - 2*PAD - 64
-
-    for line in _wrap(draw, q["question"], f_body, maxw):
-        draw.text((x,y), line, font=f_body, fill=(255,255,255))
-        y += _line_height(draw, f_body) + 6
+    lh = _line_height(draw, f_body)
+    for line in _wrap(draw, q.question, f_body, maxw):
+        items.append(("question", (x, y, x + int(draw.textlength(line, font=f_body)), y + lh), line))
+        y += lh + 6
     y += 16
-
-    for i,opt in enumerate(q["options"], start=1):
+    for i,opt in enumerate(q.options, start=1):
+        text = f"{i}. {opt}"
         pill_h = _line_height(draw, f_small) + 28
-        pill_w = max(360, int(draw.textlength(f"{i}. {opt}", font=f_small) + 48))
-        pill = Image.new("RGBA", (pill_w, pill_h), (0,0,0,0))
-        pd = ImageDraw.Draw(pill)
-        pd.rounded_rectangle((0,0,pill_w,pill_h), radius=22, fill=(T["accent2"][0], T["accent2"][1], T["accent2"][2], 230))
-        pd.text((20, 14), f"{i}. {opt}", font=f_small, fill=(16,18,20))
-        bg.paste(pill, (x, y), pill)
+        pill_w = max(360, int(draw.textlength(text, font=f_small) + 48))
+        items.append((f"option {i}", (x, y, x + pill_w, y + pill_h), text))
         y += pill_h + 12
-
+    return items
+
+def layout_short(q, index=1, source=""):
+    """Dry run of render_short for one question: font metrics only."""
+    from layout_check import check_boxes
+    draw = ImageDraw.Draw(Image.new("RGB", (1,1)))
+    q = as_question(q)
+    items = _layout(draw, q, q.league, _pick_font(72), _pick_font(60), _pick_font(48))
+    return check_boxes([(n, b) for n,b,_ in items], (PAD, 0, W - PAD, H), source, f"short q{index:02d}")
+
+def render_short(json_path, index=1, out_path=None, music_path=None, font="assets/fonts/Inter-Bold.ttf", dry_run=False, encoder=None):
+    q = load_day(json_path).questions[index-1]
+    if dry_run:
+        return layout_short(q, index, str(json_path))
+    bg = compose_short(q)
+
+    # NumPy/moviepy only load once a video is actually encoded
+    import numpy as np
+    from moviepy.editor import ImageClip
     arr = np.array(bg)
     duration = 18
     clip = ImageClip(arr).set_duration(duration)
 
     if music_path and os.path.exists(music_path) and os.path.getsize(music_path) > 0:
         try:
-            music = AudioFileClip(music_path).volumex(0.12)
-            clip = clip.set_audio(music)
+            clip = clip.set_audio(_music_clip(music_path))
         except Exception:
             pass
 
     if not out_path:
         out_path = Path(json_path).with_suffix("").as_posix() + f"_q{index:02d}.mp4"
 
-    clip.write_videofile(out_path, fps=30, codec="libx264", audio_codec="aac", preset="medium", threads=4)
+    with span("encode", file=out_path):
+        clip.write_videofile(out_path, **write_kwargs(encoder))
     clip.close()
     print("Wrote", out_path)
     return out_path
 
+def compose_short(q):
+    """The Short's single static frame for one question."""
+    q = as_question(q)
+    league = q.league
+    T = _theme(league)
+
+    bg = _gradient_bg(tuple(T["bg_accent"]), (8,10,14))
+    draw = ImageDraw.Draw(bg)
+
+    draw.rectangle([0,0,W,RIBBON_H], fill=tuple(T["ribbon"]))
+
+    f_title = _pick_font(72)
+    f_body  = _pick_font(60)
+    f_small = _pick_font(48)
+
+    comp = Compositor(bg)
+    for name, (x0, y0, x1, y1), text in _layout(draw, q, league, f_title, f_body, f_small):
+        if name == "title":
+            glyph_atlas.text(draw, (x0, y0), text, f_title, (240,240,240))
+        elif name == "question":
+            glyph_atlas.text(draw, (x0, y0), text, f_body, (255,255,255))
+        else:
+            comp.rounded((x0, y0, x1, y1), 22, (T["accent2"][0], T["accent2"][1], T["accent2"][2], 230))
+            comp.text((x0 + 20, y0 + 14), text, f_small, (16,18,20), inside=True)
+    return comp.apply()
+
 if __name__ == "__main__":
     import sys
     render_short(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 1, sys.argv[3] if len(sys.argv) > 3 else None, "assets/soft_loop.mp3")
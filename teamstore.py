@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+teamstore.py
+Columnar store for team, roster and season tables, for question types that
+need more than the 30-row league CSVs.
+- String columns are dictionary-encoded (int32 codes + sorted categories);
+  numeric columns stay plain NumPy arrays
+- Group-by indexes (row order + offsets per category) are built once per
+  column and kept on the table, so "rows where league == NFL" is a slice and
+  counts per division is a diff, not a scan over row dicts
+- Tables save to .npz (no pickle); cached() rebuilds from the source files
+  only when one of them changed
+- teams(): the three league CSVs as one small table; leagues() turns it back
+  into what generator.load_teams() returns
+- rosters(): one row per pool lineup player (sport, team, year, pos, college/flag)
+Usage:
+  python teamstore.py [teams|rosters] [--group division]
+Requires: numpy
+"""
+import sys, csv, json
+from pathlib import Path
+from collections import defaultdict
+import numpy as np
+
+DATA_DIR = Path(__file__).parent / "data"
+CACHE_DIR = Path(__file__).parent / "assets" / "_cache"
+TEAM_CSVS = ["nfl.csv", "nba.csv", "mlb.csv"]
+
+class Table:
+    def __init__(self, cols, cats=None):
+        self.cols = cols            # name -> array (codes for string columns)
+        self.cats = cats or {}      # name -> sorted category array, string columns only
+        self.n = len(next(iter(cols.values()))) if cols else 0
+        self._groups = {}
+
+    @classmethod
+    def from_columns(cls, data):
+        cols, cats = {}, {}
+        for name, vals in data.items():
+            arr = np.asarray(vals)
+            if arr.dtype.kind in "iufb":
+                cols[name] = arr
+            else:
+                cats[name], codes = np.unique(np.array(["" if v is None else v for v in vals], dtype=str), return_inverse=True)
+                cols[name] = codes.astype(np.int32)
+        return cls(cols, cats)
+
+    @classmethod
+    def from_rows(cls, rows, columns=None):
+        columns = columns or (list(rows[0]) if rows else [])
+        return cls.from_columns({c: [r.get(c) for r in rows] for c in columns})
+
+    def __len__(self): return self.n
+
+    @property
+    def columns(self): return list(self.cols)
+
+    def code(self, col, value):
+        """Category code of value in a string column, -1 when absent."""
+        cats = self.cats[col]
+        i = int(np.searchsorted(cats, value))
+        return i if i < len(cats) and cats[i] == value else -1
+
+    def values(self, col, rows=None):
+        """Decoded column (optionally for a row index array)."""
+        v = self.cols[col] if rows is None else self.cols[col][rows]
+        return self.cats[col][v] if col in self.cats else v
+
+    def group(self, col):
+        """(offsets, order): rows with code k are order[offsets[k]:offsets[k+1]], in table order."""
+        g = self._groups.get(col)
+        if g is None:
+            codes = self.cols[col]
+            size = len(self.cats[col]) if col in self.cats else int(codes.max()) + 1 if len(codes) else 0
+            order = np.argsort(codes, kind="stable").astype(np.int32)
+            offsets = np.concatenate(([0], np.cumsum(np.bincount(codes, minlength=size)))).astype(np.int64)
+            g = self._groups[col] = (offsets, order)
+        return g
+
+    def counts(self, col):
+        """{category: rows} for a string column."""
+        offsets, _ = self.group(col)
+        return dict(zip(self.cats[col].tolist(), np.diff(offsets).tolist()))
+
+    def rows(self, col, value):
+        k = self.code(col, value) if col in self.cats else int(value)
+        offsets, order = self.group(col)
+        if k < 0 or k + 1 >= len(offsets): return order[:0]
+        return order[offsets[k]:offsets[k+1]]
+
+    def where(self, **eq):
+        """Row indices (table order) matching every col=value; the smallest group is the seed."""
+        if not eq: return np.arange(self.n, dtype=np.int32)
+        picks = sorted(((self.rows(c, v), c, v) for c, v in eq.items()), key=lambda t: len(t[0]))
+        rows = picks[0][0]
+        for _, c, v in picks[1:]:
+            k = self.code(c, v) if c in self.cats else v
+            rows = rows[self.cols[c][rows] == k]
+        return rows
+
+    def take(self, rows):
+        return Table({k: v[rows] for k, v in self.cols.items()}, self.cats)
+
+    def to_rows(self, rows=None, columns=None):
+        """Row dicts with decoded strings (the shape the QUESTION_BANK functions use)."""
+        columns = columns or self.columns
+        dec = [self.values(c, rows).tolist() for c in columns]
+        return [dict(zip(columns, vals)) for vals in zip(*dec)]
+
+    def save(self, path, **meta):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        arrays = {f"col:{k}": v for k, v in self.cols.items()}
+        arrays.update({f"cat:{k}": v for k, v in self.cats.items()})
+        arrays.update({f"meta:{k}": np.asarray(v) for k, v in meta.items()})
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """(table, meta) from a file written by save()."""
+        with np.load(path, allow_pickle=False) as z:
+            cols = {k[4:]: z[k] for k in z.files if k.startswith("col:")}
+            cats = {k[4:]: z[k] for k in z.files if k.startswith("cat:")}
+            meta = {k[5:]: z[k] for k in z.files if k.startswith("meta:")}
+        return cls(cols, cats), meta
+
+def _stamp(sources):
+    return np.array([p.stat().st_mtime_ns if p.exists() else 0 for p in sources], dtype=np.int64)
+
+def cached(name, sources, build, cache_dir=CACHE_DIR):
+    """Table from cache_dir/<name>.npz, rebuilt with build() when any source changed."""
+    path = Path(cache_dir) / f"{name}.npz"
+    stamp = _stamp(sources)
+    if path.exists():
+        try:
+            table, meta = Table.load(path)
+            if "stamp" in meta and np.array_equal(meta["stamp"], stamp): return table
+        except Exception as e:
+            print("[warn] teamstore cache unreadable:", path, e)
+    table = build()
+    try: table.save(path, stamp=stamp)
+    except OSError as e: print("[warn] teamstore cache not written:", e)
+    return table
+
+def _read_teams(files):
+    rows = []
+    for p in files:
+        with open(p, newline="", encoding="utf-8") as f:
+            rows += list(csv.DictReader(f))
+    return Table.from_rows(rows, ["league", "division", "city", "team"])
+
+def teams(data_dir=DATA_DIR):
+    files = [Path(data_dir) / f for f in TEAM_CSVS]
+    return cached("teams", files, lambda: _read_teams(files))
+
+def leagues(table):
+    """{league: [records.Team]} in CSV order, as generator.load_teams() builds it."""
+    from records import Team
+    out = defaultdict(list)
+    for r in table.to_rows(): out[r["league"]].append(Team(r["league"], r["division"], r["city"], r["team"]))
+    return out
+
+def _read_rosters(files):
+    data = defaultdict(list)
+    for p in files:
+        for i, lineup in enumerate(json.loads(p.read_text(encoding="utf-8"))):
+            for slot, pl in enumerate(lineup.get("players", [])):
+                data["sport"].append(p.stem); data["lineup"].append(i); data["slot"].append(slot)
+                data["team"].append(lineup.get("answer", "")); data["year"].append(int(lineup.get("year") or 0))
+                data["pos"].append(pl.get("pos", ""))
+                data["college"].append(pl.get("college", "")); data["flag"].append(pl.get("flag", ""))
+    cols = {k: (np.array(v, dtype=np.int32) if k in ("lineup", "slot", "year") else v) for k, v in data.items()}
+    return Table.from_columns(cols)
+
+def rosters(pools_dir=DATA_DIR / "pools"):
+    files = sorted(Path(pools_dir).glob("*.json"))
+    return cached("rosters", files, lambda: _read_rosters(files))
+
+def main(argv):
+    name = argv[0] if argv and not argv[0].startswith("--") else "teams"
+    t = {"teams": teams, "rosters": rosters}[name]()
+    print(f"{name}: {len(t)} rows; " + ", ".join(
+        f"{c}({len(t.cats[c])})" if c in t.cats else f"{c}:{t.cols[c].dtype}" for c in t.columns))
+    if "--group" in argv:
+        col = argv[argv.index("--group")+1]
+        for k, n in t.counts(col).items(): print(f"  {k or '-':24s} {n}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
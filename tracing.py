@@ -0,0 +1,112 @@
+"""
+tracing.py
+Named spans for the daily pipelines.
+- with span("encode", file=p): ...   or   @traced("gradient")
+- Each span records wall time, CPU time (this thread + child processes such
+  as ffmpeg) and peak RSS; write() dumps one JSON metrics file per run
+- Off unless TRACE_METRICS=1 (or enable() is called). When off, span()
+  returns one shared no-op object and @traced calls straight through.
+Env:
+  TRACE_METRICS=1            turn tracing on for the process
+  TRACE_METRICS_DIR=out/metrics
+"""
+import os, sys, json, time, atexit, threading, functools, datetime as dt
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_ON = False
+_SPANS = []
+_LOCK = threading.Lock()
+_T0 = time.perf_counter()
+MAX_SPANS = 100_000
+
+def _rss_mb():
+    if resource is None: return None
+    kb = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return round(kb / (1024*1024 if sys.platform == "darwin" else 1024), 1)
+
+def _child_cpu():
+    if resource is None: return 0.0
+    r = resource.getrusage(resource.RUSAGE_CHILDREN); return r.ru_utime + r.ru_stime
+
+class _Null:
+    __slots__ = ()
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def set(self, **attrs): pass
+
+_NULL = _Null()
+
+class _Span:
+    __slots__ = ("name", "attrs", "t0", "c0", "k0")
+    def __init__(self, name, attrs):
+        self.name, self.attrs = name, attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.t0, self.c0, self.k0 = time.perf_counter(), time.thread_time(), _child_cpu()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        rec = {"name":self.name, "start_s":round(self.t0 - _T0, 4),
+               "wall_s":round(time.perf_counter() - self.t0, 4),
+               "cpu_s":round(time.thread_time() - self.c0, 4),
+               "child_cpu_s":round(_child_cpu() - self.k0, 4),
+               "peak_rss_mb":_rss_mb(), "thread":threading.current_thread().name}
+        if self.attrs: rec["attrs"] = {k:str(v) for k,v in self.attrs.items()}
+        if exc_type: rec["error"] = exc_type.__name__
+        with _LOCK:
+            if len(_SPANS) < MAX_SPANS: _SPANS.append(rec)
+        return False
+
+def span(name, **attrs):
+    return _Span(name, attrs) if _ON else _NULL
+
+def traced(name=None):
+    def deco(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def wrapper(*a, **k):
+            if not _ON: return fn(*a, **k)
+            with _Span(label, {}):
+                return fn(*a, **k)
+        return wrapper
+    return deco
+
+def enabled():
+    return _ON
+
+def enable(write_at_exit=True):
+    global _ON
+    if not _ON and write_at_exit: atexit.register(write)
+    _ON = True
+
+def summary():
+    out = {}
+    with _LOCK: spans = list(_SPANS)
+    for s in spans:
+        a = out.setdefault(s["name"], {"count":0, "wall_s":0.0, "cpu_s":0.0, "child_cpu_s":0.0})
+        a["count"] += 1
+        for k in ("wall_s", "cpu_s", "child_cpu_s"): a[k] = round(a[k] + s[k], 4)
+    return out
+
+def write(path=None):
+    """One JSON file per run; returns its path (None when nothing was traced)."""
+    with _LOCK: spans = list(_SPANS)
+    if not spans: return None
+    stamp = dt.datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    path = path or os.path.join(os.environ.get("TRACE_METRICS_DIR", "out/metrics"), f"run_{stamp}_{os.getpid()}.json")
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"run":stamp, "argv":sys.argv, "wall_s":round(time.perf_counter() - _T0, 3),
+                   "cpu_s":round(time.process_time(), 3), "peak_rss_mb":_rss_mb(),
+                   "summary":summary(), "spans":spans}, f, indent=1)
+    print("Wrote metrics", path)
+    return path
+
+if os.environ.get("TRACE_METRICS", "") not in ("", "0", "false", "no"):
+    enable()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+upload_batch.py
+Uploads a batch of guess-team Shorts in one process.
+- Reads lineup JSONs (args or a manifest file, one path per line) and
+  derives title/description in-process
+- Shares one authorized session (one token decode, pooled HTTP connection)
+  and one UploadQueue, so chunk size adapts across the batch
+- Staggers uploads by a random delay BETWEEN uploads (not after the last)
+Usage:
+  python upload_batch.py [--stagger 180-420] [--manifest today.txt] data/out/DATE/lineup_*.json
+"""
+import sys, json, time, random
+from pathlib import Path
+from upload_queue import UploadQueue, UploadError
+
+SPORTS = {"basketball":"NBA", "football":"NFL", "soccer":"Soccer"}
+DESC = "Daily Guess-The-Team challenge. Can you name the squad? #Shorts #Sports #Trivia"
+TAGS = "sports,trivia,shorts"
+
+def title_for(d):
+    sport = SPORTS.get(d.get("mode",""), "")
+    base = (d.get("title") or "Guess The Team").strip()
+    year = str(d.get("year",""))
+    return base + ((" • " + sport) if sport else "") + ((" (" + year + ")") if year else "")
+
+def description_for(d):
+    answer = (d.get("answer") or "").strip()
+    return DESC + (f"\n\nAnswer: {answer}" if answer else "")
+
+def mp4_for(json_path):
+    return Path(json_path).with_suffix("").as_posix() + "_guess_team.mp4"
+
+def read_manifest(path):
+    lines = Path(path).read_text(encoding="utf-8").splitlines()
+    return [l.strip() for l in lines if l.strip() and not l.lstrip().startswith("#")]
+
+def upload_batch(json_paths, stagger=(180, 420), queue=None, privacy="public", sleep=time.sleep):
+    """Uploads each lineup's MP4; returns {json_path: video_id or None}."""
+    from upload_youtube import upload
+    if queue is None:
+        from upload_youtube import get_authorized_session
+        queue = UploadQueue(session=get_authorized_session())
+    todo = []
+    for jp in json_paths:
+        mp4 = mp4_for(jp)
+        if not Path(mp4).exists():
+            print(f"Missing {mp4} — skipping"); continue
+        todo.append((jp, mp4))
+    results = {}
+    for i, (jp, mp4) in enumerate(todo):
+        d = json.load(open(jp, "r", encoding="utf-8"))
+        title = title_for(d)
+        print(f"Uploading: {mp4} -> {title}", flush=True)
+        try:
+            results[jp] = upload(mp4, title, description_for(d), TAGS, privacy=privacy, queue=queue,
+                                 chunksize=None, exit_on_error=False)
+        except UploadError as e:
+            print("YouTube API error:", e, file=sys.stderr); results[jp] = None
+        if i < len(todo) - 1 and stagger and stagger[1] > 0:
+            s = random.randint(*stagger)
+            print(f"Sleeping {s} seconds before next upload…", flush=True)
+            sleep(s)
+    return results
+
+def main(argv):
+    stagger, paths, it = (180, 420), [], iter(argv)
+    for a in it:
+        if a == "--stagger":
+            lo, _, hi = next(it).partition("-"); stagger = (int(lo), int(hi or lo))
+        elif a == "--manifest":
+            paths += read_manifest(next(it))
+        else:
+            paths.append(a)
+    if not paths:
+        print(__doc__.strip().splitlines()[-1], file=sys.stderr); return 1
+    results = upload_batch(paths, stagger)
+    failed = [p for p, v in results.items() if v is None]
+    print(f"Uploaded {len(results) - len(failed)}/{len(results)}")
+    return 3 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
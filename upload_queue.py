@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+upload_queue.py
+Persistent, resumable upload queue for YouTube videos.
+- Each job keeps its resumable session URI and the byte offset the server
+  confirmed in .upload_queue.json, saved after every chunk
+- After a crash or network blip the job asks the server where it stopped and
+  sends only the rest of the file
+- Connection errors, 429 and 5xx retry with jittered exponential backoff
+- Per-chunk throughput is recorded on the job; with chunksize=None the next
+  chunk is sized from the measured throughput (about target_seconds each)
+- The endpoint and HTTP session can be swapped, so a local fake server can
+  stand in for YouTube; --selftest runs the queue against one (a 503 mid-upload,
+  then a crash and a resume from the queue file)
+Usage:
+  python upload_queue.py            # resume every unfinished job
+  python upload_queue.py --status
+  python upload_queue.py --selftest
+Requires: requests (google-auth for the real endpoint)
+"""
+import os, sys, json, time, random, hashlib
+from pathlib import Path
+import requests
+from tracing import span
+
+UPLOAD_URL = os.environ.get("YT_UPLOAD_URL", "https://www.googleapis.com/upload/youtube/v3/videos")
+QUEUE_FILE = Path(".upload_queue.json")
+CHUNK = 8 * 1024 * 1024      # resumable chunks must be multiples of 256 KiB
+CHUNK_UNIT = 256 * 1024
+MIN_CHUNK, MAX_CHUNK = 1024 * 1024, 64 * 1024 * 1024
+RETRY_STATUS = {429, 500, 502, 503, 504}
+KEEP_CHUNKS = 200
+
+class UploadError(Exception):
+    pass
+
+class _Retry(Exception):
+    pass
+
+class UploadQueue:
+    def __init__(self, path=QUEUE_FILE, endpoint=UPLOAD_URL, session=None,
+                 max_retries=8, backoff=1.0, max_backoff=64.0, sleep=time.sleep, target_seconds=8.0):
+        self.path = Path(path)
+        self.endpoint = endpoint
+        self.session = session or requests.Session()
+        self.max_retries, self.backoff, self.max_backoff = max_retries, backoff, max_backoff
+        self.sleep = sleep
+        self.target_seconds = target_seconds
+        self.adaptive_chunk = CHUNK  # carried across jobs so a batch starts at the learned size
+        self.jobs = self._load()
+
+    def _load(self):
+        if self.path.exists():
+            try: return json.load(open(self.path, "r", encoding="utf-8"))
+            except Exception as e: print("[warn] upload queue unreadable, starting fresh:", e)
+        return {}
+
+    def save(self):
+        tmp = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.jobs, f, indent=2)
+        tmp.replace(self.path)
+
+    def add(self, path, body):
+        """Job for this exact file (path, size, mtime); re-adding returns the existing one."""
+        st = os.stat(path)
+        jid = hashlib.sha1(f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}".encode()).hexdigest()[:16]
+        if jid not in self.jobs:
+            self.jobs[jid] = {"id":jid, "path":str(path), "size":st.st_size, "body":body,
+                              "status":"pending", "session_uri":None, "offset":0, "attempts":0,
+                              "video_id":None, "chunks":[], "created":time.time()}
+            self.save()
+        return self.jobs[jid]
+
+    def pending(self):
+        """Jobs to resume: not started or interrupted. A "failed" job (permanent HTTP
+        error, or retries used up) stays in the file for --status and only runs
+        again when its file is added again."""
+        return [j for j in self.jobs.values() if j["status"] in ("pending", "uploading")]
+
+    def drop_missing(self):
+        """Removes unfinished jobs whose file no longer exists; returns them."""
+        gone = [j for j in self.jobs.values() if j["status"] != "done" and not os.path.exists(j["path"])]
+        for j in gone: del self.jobs[j["id"]]
+        if gone: self.save()
+        return gone
+
+    def _next_chunk(self, nbytes, seconds):
+        want = nbytes / seconds * self.target_seconds
+        # move halfway towards the target so one slow chunk doesn't collapse the size
+        want = (self.adaptive_chunk + want) / 2
+        return int(min(MAX_CHUNK, max(MIN_CHUNK, want)) // CHUNK_UNIT * CHUNK_UNIT)
+
+    def run(self, job, chunksize=CHUNK):
+        """Upload (or resume) one job; returns the video id. chunksize=None adapts."""
+        if job["status"] == "done": return job["video_id"]
+        retries = 0
+        while True:
+            offset = job["offset"]
+            try:
+                return self._run_once(job, chunksize)
+            except UploadError:
+                self.save(); raise
+            except _Retry as e:
+                if job["offset"] > offset: retries = 0  # made progress since the last failure
+                retries += 1; job["attempts"] += 1; job["last_error"] = str(e)
+                if retries > self.max_retries:
+                    job["status"] = "failed"; self.save()
+                    raise UploadError(f"giving up after {self.max_retries} retries: {e}")
+                self.save()
+                delay = min(self.max_backoff, self.backoff * 2**(retries-1)) * random.uniform(0.5, 1.5)
+                print(f"  retry {retries}/{self.max_retries} in {delay:.1f}s ({e})", flush=True)
+                self.sleep(delay)
+
+    def _run_once(self, job, chunksize):
+        try:
+            if not job["session_uri"]: self._start(job)
+            else: self._sync(job)
+            last_print = 0
+            with open(job["path"], "rb") as f:
+                while job["status"] != "done":
+                    start = job["offset"]
+                    f.seek(start); data = f.read(chunksize or self.adaptive_chunk)
+                    t0 = time.perf_counter()
+                    with span("upload_chunk", offset=start, bytes=len(data)):
+                        r = self.session.put(job["session_uri"], data=data, timeout=300, headers={
+                            "Content-Length": str(len(data)),
+                            "Content-Range": f"bytes {start}-{start+len(data)-1}/{job['size']}"})
+                    dt = max(time.perf_counter() - t0, 1e-6)
+                    self._handle(job, r)
+                    if chunksize is None and len(data) >= MIN_CHUNK:
+                        self.adaptive_chunk = self._next_chunk(len(data), dt)
+                    job["chunks"] = (job["chunks"] + [{"offset":start, "bytes":len(data), "seconds":round(dt, 4),
+                                      "mbps":round(len(data)*8/dt/1e6, 2), "status":r.status_code}])[-KEEP_CHUNKS:]
+                    self.save()
+                    if time.time() - last_print > 1.5:
+                        print(f"  progress: {int(job['offset']*100/max(job['size'],1))}%", flush=True)
+                        last_print = time.time()
+        except requests.RequestException as e:
+            raise _Retry(f"{type(e).__name__}: {e}")
+        return job["video_id"]
+
+    def _start(self, job):
+        r = self.session.post(self.endpoint, params={"uploadType":"resumable", "part":"snippet,status"},
+                              json=job["body"], timeout=60, headers={
+                                  "X-Upload-Content-Length": str(job["size"]),
+                                  "X-Upload-Content-Type": "video/mp4"})
+        if r.status_code in RETRY_STATUS: raise _Retry(f"start: HTTP {r.status_code}")
+        if r.status_code != 200 or "Location" not in r.headers:
+            raise UploadError(f"start: HTTP {r.status_code} {r.text[:300]}")
+        job.update(session_uri=r.headers["Location"], offset=0, status="uploading")
+        self.save()
+
+    def _sync(self, job):
+        # ask the server how many bytes it already has
+        r = self.session.put(job["session_uri"], data=b"", timeout=60, headers={
+            "Content-Length": "0", "Content-Range": f"bytes */{job['size']}"})
+        self._handle(job, r)
+        self.save()
+
+    def _handle(self, job, r):
+        if r.status_code in (200, 201):
+            job.update(status="done", offset=job["size"], video_id=(r.json() or {}).get("id"))
+        elif r.status_code == 308:
+            rng = r.headers.get("Range")  # "bytes=0-12345"
+            job["offset"] = int(rng.rsplit("-", 1)[1]) + 1 if rng else 0
+            job["status"] = "uploading"
+        elif r.status_code in (404, 410):
+            job.update(session_uri=None, offset=0, status="pending")
+            raise _Retry(f"session expired (HTTP {r.status_code})")
+        elif r.status_code in RETRY_STATUS:
+            raise _Retry(f"HTTP {r.status_code}")
+        else:
+            job["status"] = "failed"
+            raise UploadError(f"HTTP {r.status_code} {r.text[:300]}")
+
+# --- local fake endpoint -----------------------------------------------------
+
+class _FakeUpload:
+    """Resumable-upload server on 127.0.0.1 keeping what it received in memory.
+    fail: {n: status} answers the n-th chunk PUT (1-based) with that status."""
+    def __init__(self, fail=None):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        fake = self
+        self.fail, self.puts, self.data, self.size, self.done = dict(fail or {}), 0, bytearray(), 0, False
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *a): pass
+            def _reply(self, code, headers=None, body=None):
+                raw = json.dumps(body).encode() if body is not None else b""
+                self.send_response(code)
+                for k, v in (headers or {}).items(): self.send_header(k, v)
+                self.send_header("Content-Length", str(len(raw))); self.end_headers(); self.wfile.write(raw)
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake.size, fake.data = int(self.headers["X-Upload-Content-Length"]), bytearray()
+                self._reply(200, {"Location": f"http://127.0.0.1:{fake.port}/session/1"})
+            def do_PUT(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                rng = self.headers["Content-Range"]
+                if not rng.startswith("bytes */"):
+                    fake.puts += 1
+                    if fake.puts in fake.fail: return self._reply(fake.fail[fake.puts])
+                    start = int(rng.split()[1].split("-")[0])
+                    if start != len(fake.data): return self._reply(400)
+                    fake.data += body
+                if len(fake.data) >= fake.size:
+                    fake.done = True; return self._reply(200, body={"id":"fake-video"})
+                self._reply(308, {"Range": f"bytes=0-{len(fake.data)-1}"} if fake.data else {})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}/upload"
+        import threading
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown(); self.server.server_close()
+
+class _Crash(Exception):
+    pass
+
+class _CrashAfter(requests.Session):
+    """Session that dies (like a killed process) after n chunk PUTs."""
+    def __init__(self, n):
+        super().__init__(); self.n = n
+    def put(self, url, **kw):
+        if not kw["headers"]["Content-Range"].startswith("bytes */"):
+            if self.n == 0: raise _Crash()
+            self.n -= 1
+        return super().put(url, **kw)
+
+def selftest():
+    """Uploads a 5-chunk file to _FakeUpload twice: once with a 503 on the
+    third chunk (retried in place), once crashing after two chunks and resumed
+    by a fresh queue from the queue file. Returns a list of failures."""
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix="upload_selftest_") as d:
+        return _selftest(Path(d))
+
+def _selftest(tmp):
+    video = tmp / "video.mp4"
+    payload = os.urandom(CHUNK_UNIT * 4 + 1234)
+    video.write_bytes(payload)
+    errors = []
+    fake = _FakeUpload(fail={3: 503})
+    try:
+        q = UploadQueue(tmp / "q1.json", fake.url, sleep=lambda s: None)
+        vid = q.run(q.add(video, {"snippet":{}}), chunksize=CHUNK_UNIT)
+        if vid != "fake-video" or bytes(fake.data) != payload: errors.append("503 retry: upload incomplete or corrupted")
+        if q.jobs[next(iter(q.jobs))]["attempts"] != 1: errors.append("503 retry: expected exactly one retry")
+    except UploadError as e:
+        errors.append(f"503 retry: {e}")
+    finally:
+        fake.close()
+    fake = _FakeUpload()
+    try:
+        q = UploadQueue(tmp / "q2.json", fake.url, session=_CrashAfter(2), sleep=lambda s: None)
+        try:
+            q.run(q.add(video, {"snippet":{}}), chunksize=CHUNK_UNIT)
+            errors.append("crash: the first run should not have finished")
+        except _Crash:
+            pass
+        sent = fake.puts
+        q = UploadQueue(tmp / "q2.json", fake.url, sleep=lambda s: None)  # a new process
+        jobs = q.pending()
+        if len(jobs) != 1 or jobs[0]["offset"] != 2 * CHUNK_UNIT:
+            errors.append(f"crash: queue file should hold one job at offset {2*CHUNK_UNIT}")
+        elif q.run(jobs[0], chunksize=CHUNK_UNIT) != "fake-video" or bytes(fake.data) != payload:
+            errors.append("crash: resumed upload incomplete or corrupted")
+        elif fake.puts - sent != 3:
+            errors.append(f"crash: resume sent {fake.puts - sent} chunks, expected the 3 remaining")
+        job = jobs[0] if jobs else None
+        if job:
+            job["status"] = "failed"
+            if q.pending(): errors.append("failed jobs must not be resumed")
+            job["status"] = "pending"; video.unlink()
+            if not q.drop_missing() or q.jobs: errors.append("a job whose file is gone must be dropped")
+    except UploadError as e:
+        errors.append(f"crash: resume failed: {e}")
+    finally:
+        fake.close()
+    return errors
+
+def main(argv):
+    if "--selftest" in argv:
+        errors = selftest()
+        for e in errors: print("FAIL", e)
+        print("selftest:", "failed" if errors else "ok (503 retried, crash resumed from the queue file)")
+        return 1 if errors else 0
+    q = UploadQueue()
+    if "--status" in argv:
+        for j in q.jobs.values():
+            print(f'{j["id"]} {j["status"]:9s} {j["offset"]}/{j["size"]} {j["path"]} {j.get("video_id") or ""}')
+        return 0
+    for j in q.drop_missing(): print("Dropped (file gone):", j["path"])
+    jobs = q.pending()
+    if not jobs:
+        print("Nothing to resume."); return 0
+    from upload_youtube import get_authorized_session
+    q.session = get_authorized_session()
+    code = 0
+    for j in jobs:
+        print("Resuming:", j["path"], flush=True)
+        try: print("Upload complete. videoId:", q.run(j), flush=True)
+        except UploadError as e: print("Upload failed:", e, file=sys.stderr); code = 3
+    return code
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
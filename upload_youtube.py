@@ -1,24 +1,29 @@
 # upload_youtube.py
-import os, sys, json, base64, time
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload
-from googleapiclient.errors import HttpError
-from google.oauth2.credentials import Credentials
+import os, sys, json, base64
+from upload_queue import UploadQueue, UploadError, CHUNK
 
 SCOPES = ["https://www.googleapis.com/auth/youtube.upload"]
+TOKEN_ENV = "YT_TOKEN_JSON_BASE64"
 
-def get_youtube_client():
-    token_b64 = os.environ.get("YT_TOKEN_JSON_BASE64", "")
+def has_credentials():
+    return bool(os.environ.get(TOKEN_ENV))
+
+def get_credentials():
+    token_b64 = os.environ.get(TOKEN_ENV, "")
     if not token_b64:
-        print("Missing env YT_TOKEN_JSON_BASE64", file=sys.stderr)
+        print(f"Missing env {TOKEN_ENV}", file=sys.stderr)
         sys.exit(2)
+    from google.oauth2.credentials import Credentials
     # Expect a single-line base64 of your token.json (must include refresh_token)
     info = json.loads(base64.b64decode(token_b64))
-    creds = Credentials.from_authorized_user_info(info, scopes=SCOPES)
-    return build("youtube", "v3", credentials=creds, cache_discovery=False)
+    return Credentials.from_authorized_user_info(info, scopes=SCOPES)
+
+def get_authorized_session():
+    # requests.Session that adds the bearer token and refreshes it on 401
+    from google.auth.transport.requests import AuthorizedSession
+    return AuthorizedSession(get_credentials())
 
-def upload(path, title, desc, tags_csv, privacy="public"):
-    yt = get_youtube_client()
+def upload(path, title, desc, tags_csv, privacy="public", queue=None, chunksize=CHUNK, exit_on_error=True):
     tags = [t.strip() for t in (tags_csv or "").split(",") if t.strip()]
     body = {
         "snippet": {
@@ -33,29 +38,16 @@ def upload(path, title, desc, tags_csv, privacy="public"):
             "madeForKids": False,
         },
     }
-    media = MediaFileUpload(
-        path, mimetype="video/mp4",
-        chunksize=8 * 1024 * 1024,  # 8 MB chunked, resumable
-        resumable=True
-    )
-
-    request = yt.videos().insert(part="snippet,status", body=body, media_body=media)
-
-    response = None
-    last_print = 0
+    # Persistent + resumable: a re-run picks up the saved session and offset
+    queue = queue or UploadQueue(session=get_authorized_session())
+    job = queue.add(path, body)
     try:
-        while response is None:
-            status, response = request.next_chunk()
-            if status and (time.time() - last_print > 1.5):
-                print(f"  progress: {int(status.progress()*100)}%", flush=True)
-                last_print = time.time()
-    except HttpError as e:
+        vid = queue.run(job, chunksize=chunksize)
+    except UploadError as e:
+        if not exit_on_error: raise
         print("YouTube API error:", e, file=sys.stderr)
-        if hasattr(e, "resp") and e.resp is not None:
-            print("Status:", e.resp.status, file=sys.stderr)
         sys.exit(3)
 
-    vid = response.get("id")
     print("Upload complete. videoId:", vid, flush=True)
     return vid
 
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+validate_questions.py
+Checks generated trivia against the team data.
+- Builds one in-memory index over data/*.csv (get_index() caches it)
+- Per question: answer in options, no duplicate options, and exactly one
+  option that is actually correct for the question type
+- Streams one issue per line; exit code 1 if any errors were found
+Usage:
+  python validate_questions.py                 # every out/trivia_*.json
+  python validate_questions.py out/trivia_2025-09-05.json ...
+"""
+import sys, json, glob
+from pathlib import Path
+from collections import defaultdict
+from generator import load_teams, OUT_DIR
+
+class TeamIndex:
+    def __init__(self, leagues):
+        self.labels = defaultdict(set)       # league -> {"City Team"}
+        self.label_leagues = defaultdict(set) # "City Team" -> {league}
+        self.team_div = {}                   # (league, team) -> division
+        self.label_div = {}                  # (league, "City Team") -> division
+        self.div_size = defaultdict(int)     # (league, division) -> n
+        self.city_leagues = defaultdict(set) # city -> {league}
+        for L, lst in leagues.items():
+            for t in lst:
+                lab = t.label
+                self.labels[L].add(lab); self.label_leagues[lab].add(L)
+                self.team_div[(L, t.team)] = t.division
+                self.label_div[(L, lab)] = t.division
+                self.div_size[(L, t.division)] += 1
+                self.city_leagues[t.city].add(L)
+
+    # one predicate per question type: is this option a correct answer?
+    def not_in_division(self, q, opt):
+        m = q["meta"]; d = self.label_div.get((m["league"], opt))
+        return d is not None and d != m["division"]
+
+    def pair_same_division(self, q, opt):
+        L = q["meta"]["league"]
+        a, _, b = opt.partition(" & ")
+        da, db = self.team_div.get((L, a)), self.team_div.get((L, b))
+        return a != b and da is not None and da == db
+
+    def city_cross_league(self, q, opt):
+        return set(q["meta"]["leagues"]) <= self.city_leagues.get(opt, set())
+
+    def fix_mismatch(self, q, opt):
+        return opt in self.labels[q["meta"]["league"]]
+
+    def division_count(self, q, opt):
+        m = q["meta"]
+        return opt == str(self.div_size.get((m["league"], m["division"])))
+
+CHECKED_TYPES = {"not_in_division", "pair_same_division", "city_cross_league", "fix_mismatch", "division_count"}
+
+_INDEX = None
+
+def get_index():
+    global _INDEX
+    if _INDEX is None:
+        _INDEX = TeamIndex(load_teams()[0])
+    return _INDEX
+
+def check_question(q, index=None):
+    """Yields (level, message) for one question dict."""
+    index = index or get_index()
+    opts, ans = q.get("options") or [], q.get("answer")
+    if ans not in opts: yield "error", f"answer {ans!r} not in options"
+    if len(set(opts)) != len(opts): yield "error", "duplicate options"
+    if q.get("type") not in CHECKED_TYPES:
+        yield "warn", f"no checker for type {q.get('type')!r}"; return
+    pred = getattr(index, q["type"])
+    try:
+        correct = [o for o in opts if pred(q, o)]
+    except (KeyError, TypeError) as e:
+        yield "error", f"bad meta: {e}"; return
+    if len(correct) != 1:
+        yield "error", f"{len(correct)} correct options: {correct}"
+    elif correct[0] != ans:
+        yield "error", f"answer {ans!r} is wrong, correct is {correct[0]!r}"
+    if q["type"] == "fix_mismatch":
+        L = q["meta"]["league"]
+        for o in opts:
+            if o != ans and index.label_leagues.get(o, set()) - {L}:
+                yield "warn", f"distractor {o!r} is a real team in {sorted(index.label_leagues[o])}"
+
+def iter_issues(day, index=None, source=""):
+    """Streams issue dicts for a loaded day file."""
+    index = index or get_index()
+    for i, q in enumerate(day.get("questions", []), start=1):
+        for level, msg in check_question(q, index):
+            yield {"file":source, "q":i, "type":q.get("type"), "level":level, "msg":msg}
+
+def validate_paths(paths, index=None):
+    index = index or get_index()
+    for p in paths:
+        try:
+            with open(p, "r", encoding="utf-8") as f: day = json.load(f)
+        except Exception as e:
+            yield {"file":str(p), "q":0, "type":None, "level":"error", "msg":f"unreadable: {e}"}
+            continue
+        yield from iter_issues(day, index, str(p))
+
+def is_valid_day(path, index=None):
+    return not any(i["level"] == "error" for i in validate_paths([path], index))
+
+def main(argv):
+    paths = argv or sorted(glob.glob(str(OUT_DIR / "trivia_*.json")))
+    errors = warns = 0
+    for issue in validate_paths(paths):
+        if issue["level"] == "error": errors += 1
+        else: warns += 1
+        print(f'{issue["level"]:5s} {Path(issue["file"]).name} q{issue["q"]:02d} [{issue["type"]}] {issue["msg"]}', flush=True)
+    print(f"Checked {len(paths)} file(s): {errors} error(s), {warns} warning(s)")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+variants.py
+Renders one lineup or trivia day for several brands (channels) in one pass.
+- A brand overrides only what differs between channels: "handle", "title"
+  (guess-team badge), "accent" (year and reveal pills), "card_title" (format
+  string with {league}) and "theme" (ribbon / accent2 / bg_accent for cards)
+- Guess-team: the background is decoded and resized once; logos are loaded and
+  every stack, badge and shadow is measured and placed once; each brand gets
+  its static layer (title badge + handle), the shared drawing ops replayed on
+  top, its year pill, reveal overlay and encode
+- Cards: the gradient and question text are drawn once per bg_accent; each
+  brand adds its ribbon, title, option pills and handle
+- Output is identical to rendering each brand separately; timings are
+  reported for the shared stage and per variant
+Usage:
+  python variants.py guess_team data/lineup_soccer.json [--brands assets/brands.json] [--out out/variants] [--no-encode]
+  python variants.py cards out/trivia_X.json [--index 3] [--brands assets/brands.json] [--out out/variants]
+"""
+import sys, json, time
+from pathlib import Path
+from dataclasses import replace
+from tracing import span
+from records import as_lineup, as_question, load_day, load_lineup
+
+BRANDS = Path("assets/brands.json")
+OUT = Path("out/variants")
+
+def load_brands(path=BRANDS):
+    return json.load(open(path, "r", encoding="utf-8"))
+
+def _apply(data, brand):
+    """Lineup record with the brand's overrides (fields the lineup JSON already has)."""
+    return replace(as_lineup(data), **{k: brand[k] for k in ("handle", "title", "accent") if k in brand})
+
+def guess_team_variants(data, brands, out_dir=OUT, stem="lineup", music_path=None, encoder=None, encode=True):
+    """Returns (shared seconds, [per-variant report])."""
+    import render_guess_team as rg
+    out_dir = Path(out_dir); out_dir.mkdir(parents=True, exist_ok=True)
+    t0 = time.perf_counter()
+    with span("variants.shared", kind="guess_team", brands=len(brands)):
+        data = as_lineup(data)
+        bg_path = data.background or rg.BACKGROUND
+        base = rg._background(bg_path)
+        ops, max_y = rg._lineup_ops(data, data.sport)
+    shared = time.perf_counter() - t0
+    report = []
+    for brand in brands:
+        d = _apply(data, brand)
+        t1 = time.perf_counter()
+        with span("variants.compose", brand=brand["name"]):
+            bg = rg._static_layer(bg_path, (d.title or "").strip(), rg._handle(d), base)
+            rg._paint(bg, ops + rg._year_ops(d, max_y))
+        t2 = time.perf_counter()
+        if encode:
+            out = rg.write_guess_team(bg, d, str(out_dir / f"{stem}_{brand['name']}_guess_team.mp4"), music_path, encoder)
+        else:
+            out = str(out_dir / f"{stem}_{brand['name']}_guess_team.png"); bg.save(out)
+        t3 = time.perf_counter()
+        report.append({"brand":brand["name"], "out":str(out), "compose_s":round(t2-t1, 3),
+                       "encode_s":round(t3-t2, 3), "total_s":round(t3-t1, 3)})
+    return round(shared, 3), report
+
+def card_variants(questions, brands, out_dir=OUT, stem="trivia", start=1):
+    """Cards for every question x brand into out_dir/<brand>/<stem>_cards/qNN.png."""
+    import render_cards as rc
+    shared, report = 0.0, {b["name"]: {"brand":b["name"], "out":None, "compose_s":0.0, "encode_s":0.0, "total_s":0.0}
+                           for b in brands}
+    for idx, q in enumerate(questions, start=start):
+        q, bases = as_question(q), {}
+        for brand in brands:
+            accent = tuple(rc._brand_theme(q.league, brand)["bg_accent"])
+            if accent not in bases:
+                t0 = time.perf_counter()
+                with span("variants.shared", kind="card", q=idx):
+                    bases[accent] = rc.card_base(q, brand)[:2]
+                shared += time.perf_counter() - t0
+            base, fonts = bases[accent]
+            t1 = time.perf_counter()
+            d = Path(out_dir) / brand["name"] / f"{stem}_cards"
+            d.mkdir(parents=True, exist_ok=True)
+            with span("variants.compose", brand=brand["name"], q=idx):
+                rc.save_card(rc.finish_card(base, q, fonts, brand), d / f"q{idx:02d}.png")
+            r = report[brand["name"]]
+            r["out"] = str(d); r["compose_s"] += time.perf_counter() - t1
+    for r in report.values(): r["compose_s"] = r["total_s"] = round(r["compose_s"], 3)
+    return round(shared, 3), list(report.values())
+
+def _print(shared, report):
+    print(f"shared           {shared:7.2f}s")
+    for r in report:
+        print(f"{r['brand']:16s} {r['total_s']:7.2f}s (compose {r['compose_s']:.2f}s, encode {r['encode_s']:.2f}s) -> {r['out']}")
+
+def main(argv):
+    if len(argv) < 2 or argv[0] not in ("guess_team", "cards"):
+        print(__doc__.strip(), file=sys.stderr); return 1
+    opt = lambda k, d=None: argv[argv.index(k)+1] if k in argv else d
+    kind, src = argv[0], Path(argv[1])
+    brands = load_brands(opt("--brands", BRANDS))
+    out_dir = Path(opt("--out", OUT))
+    if kind == "guess_team":
+        shared, report = guess_team_variants(load_lineup(src), brands, out_dir, src.stem, opt("--music"), opt("--encoder"),
+                                             "--no-encode" not in argv)
+    else:
+        qs = load_day(src).questions
+        if opt("--index"):
+            i = int(opt("--index")); qs = qs[i-1:i]; start = i
+        else:
+            start = 1
+        shared, report = card_variants(qs, brands, out_dir, src.stem, start)
+    _print(shared, report)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))